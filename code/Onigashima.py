@@ -1,5 +1,20 @@
 import bpy
 import math
+import time
+import inspect
+from itertools import combinations
+
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+import mesh_cache
+import donnees
+import sdf
+import bruit
+import budget
+import primitives
+import sol
 
 
 
@@ -8,10 +23,10 @@ def nettoyer_scene():
     Supprime tous les objets de la scène.
 
     Méthode:
-        Sélectionne tous les objets puis exécute l'opération de suppression de Blender.
+        Retire chaque objet de bpy.data (sans passer par la sélection et l'opérateur de suppression).
     """
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
+    for obj in list(bpy.context.scene.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
 
 
 def configurer_rendu_eevee():
@@ -47,7 +62,9 @@ def creer_materiau_roche_hostile():
     Méthode:
         Crée un material node-based, ajoute noise + bump et branche sur le Principled BSDF.
     """
-    mat = bpy.data.materials.new(name="Mat_Roche_Hostile")
+    mat, cree = donnees.materiau("Mat_Roche_Hostile")
+    if not cree:
+        return mat
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
@@ -89,7 +106,9 @@ def creer_materiau_lumiere(puissance):
     Méthode:
         Reconstruit le node tree et branche un NodeEmission sur la sortie material.
     """
-    mat = bpy.data.materials.new(name="Mat_Feu_Interne")
+    mat, cree = donnees.materiau("Mat_Feu_Interne", {"puissance": puissance})
+    if not cree:
+        return mat
     mat.use_nodes = True
     mat.node_tree.nodes.clear()
     emission = mat.node_tree.nodes.new(type='ShaderNodeEmission')
@@ -113,88 +132,410 @@ def appliquer_booleen(cible, outil, operation='DIFFERENCE'):
         Applique la transformation de rotation/scale sur l'outil, crée le modifier Boolean sur la cible,
         l'applique, puis supprime l'outil.
     """
-    bpy.ops.object.select_all(action='DESELECT')
-    bpy.context.view_layer.objects.active = outil
-    outil.select_set(True)
-    bpy.ops.object.transform_apply(location=False, rotation=True, scale=True)
+    primitives.appliquer_transformations(outil)
 
-    bpy.ops.object.select_all(action='DESELECT')
     mod = cible.modifiers.new(name="DecoupeBool", type='BOOLEAN')
     mod.operation = operation
     mod.solver = 'FLOAT'
     mod.object = outil
 
-    cible.select_set(True)
-    bpy.context.view_layer.objects.active = cible
-    bpy.context.view_layer.update()
-
-    bpy.ops.object.modifier_apply(modifier=mod.name)
+    primitives.appliquer_modificateurs(cible, [mod])
     bpy.data.objects.remove(outil, do_unlink=True)
 
 
-def ajouter_bruit_initial(objet, force, taille):
+def _est_variete_fermee(mesh):
+    """Vrai si chaque arête du maillage borde exactement deux faces (volume fermé, sans trou ni arête en T)"""
+    if len(mesh.edges) == 0:
+        return False
+    aretes = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", aretes)
+    return bool(np.all(np.bincount(aretes, minlength=len(mesh.edges)) == 2))
+
+
+def _sommets_monde(obj):
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    m = np.array(primitives.matrice_monde(obj))
+    return co.reshape(-1, 3) @ m[:3, :3].T + m[:3, 3]
+
+
+def _arbre_monde(obj, co):
+    """BVHTree de l'outil en coordonnées monde"""
+    faces = [tuple(p.vertices) for p in obj.data.polygons]
+    return BVHTree.FromPolygons(co.tolist(), faces)
+
+
+def _contient(arbre, point):
+    """Vrai si le point est à l'intérieur du volume fermé de l'arbre (côté opposé à la normale la plus proche)"""
+    proche, normale, _, _ = arbre.find_nearest(point)
+    return proche is not None and (point - proche).dot(normale) < 0.0
+
+
+def grouper_outils(outils):
     """
-    Ajoute un modificateur Displace basé sur une texture Clouds et l'applique.
+    Regroupe les outils qui se recouvrent réellement (composantes connexes du graphe de recouvrement).
+
+    Deux outils se recouvrent si leurs surfaces se coupent (BVHTree.overlap) ou si l'un contient l'autre.
+    Les boîtes englobantes ne servent que de premier filtre : des boîtes qui se touchent ne suffisent pas.
+
+    Returns:
+        list: Groupes d'outils (listes), disjoints deux à deux.
+    """
+    sommets = [_sommets_monde(o) for o in outils]
+    boites = [(co.min(axis=0), co.max(axis=0)) for co in sommets]
+    arbres = [_arbre_monde(o, co) for o, co in zip(outils, sommets)]
+
+    parent = list(range(len(outils)))
+
+    def racine(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in combinations(range(len(outils)), 2):
+        (min_a, max_a), (min_b, max_b) = boites[a], boites[b]
+        if not (np.all(min_a <= max_b) and np.all(min_b <= max_a)):
+            continue
+        if (arbres[a].overlap(arbres[b]) or _contient(arbres[b], Vector(sommets[a][0]))
+                or _contient(arbres[a], Vector(sommets[b][0]))):
+            parent[racine(a)] = racine(b)
+
+    groupes = {}
+    for i, outil in enumerate(outils):
+        groupes.setdefault(racine(i), []).append(outil)
+    return list(groupes.values())
+
+
+def choisir_solveur(outils):
+    """
+    Choisit le solveur du booléen unique.
+
+    Le solveur FLOAT (rapide) ne donne un résultat propre qu'avec des opérandes fermés et sans
+    auto-intersection. Les outils qui se recouvrent sont d'abord unis entre eux (voir grouper_outils),
+    il suffit donc qu'ils soient fermés. Sinon on passe au solveur EXACT avec "Self Intersection".
+
+    Returns:
+        tuple: (solveur, raison)
+    """
+    for outil in outils:
+        if not _est_variete_fermee(outil.data):
+            return 'EXACT', f"'{outil.name}' n'est pas un volume fermé"
+    return 'FLOAT', "outils fermés"
+
+
+def appliquer_booleen_unique(cible, outils, operation='DIFFERENCE', solveur=None):
+    """
+    Fusionne tous les outils en un seul opérande et applique un seul booléen sur la cible.
+
+    Args:
+        cible: objet cible.
+        outils: liste des objets opérateurs (supprimés à la fin).
+        operation: type d'opération boolean.
+        solveur: 'FLOAT' ou 'EXACT' ; par défaut choisi par choisir_solveur().
+
+    Méthode:
+        Une seule application des transformations pour tous les outils, une jointure, un modificateur
+        Boolean appliqué une fois (au lieu d'un aller-retour bpy.ops par outil). Avec le solveur FLOAT,
+        les outils qui se recouvrent sont d'abord unis (booléens UNION entre petits outils) pour que
+        l'opérande joint reste sans auto-intersection. Durée de chaque étape affichée.
+    """
+    debut = time.perf_counter()
+
+    for outil in outils:
+        primitives.appliquer_transformations(outil)
+    t_transformations = time.perf_counter()
+
+    raison = "imposé"
+    if solveur is None:
+        solveur, raison = choisir_solveur(outils)
+    t_choix = time.perf_counter()
+
+    if solveur == 'FLOAT':
+        groupes = grouper_outils(outils)
+        for groupe in groupes:
+            for outil in groupe[1:]:
+                appliquer_booleen(groupe[0], outil, operation='UNION')
+        outils = [groupe[0] for groupe in groupes]
+        raison += f", {len(outils)} groupe(s) disjoint(s) après union"
+    t_unions = time.perf_counter()
+
+    operande = primitives.joindre(outils)
+    t_jointure = time.perf_counter()
+
+    mod = cible.modifiers.new(name="DecoupeBool", type='BOOLEAN')
+    mod.operation = operation
+    mod.solver = solveur
+    mod.object = operande
+    if solveur == 'EXACT':
+        mod.use_self = True
+
+    primitives.appliquer_modificateurs(cible, [mod])
+    maillage = operande.data
+    bpy.data.objects.remove(operande, do_unlink=True)
+    if maillage.users == 0:
+        bpy.data.meshes.remove(maillage)
+    fin = time.perf_counter()
+
+    print(f"Booléen unique ({len(outils)} outils, {solveur} : {raison}) : transformations {t_transformations - debut:.2f} s, "
+          f"choix {t_choix - t_transformations:.2f} s, unions {t_unions - t_choix:.2f} s, "
+          f"jointure {t_jointure - t_unions:.2f} s, booléen {fin - t_jointure:.2f} s")
+    return fin - debut
+
+
+def _deplacer_sommets(objet, force, echelle, octaves, graine):
+    """Displace "Clouds" calculé en NumPy (bruit.deplacer_le_long_des_normales) : une lecture, une écriture"""
+    mesh = objet.data
+    nb = len(mesh.vertices)
+    co = np.empty(nb * 3, dtype=np.float32)
+    normales = np.empty(nb * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    mesh.vertices.foreach_get("normal", normales)
+
+    co = bruit.deplacer_le_long_des_normales(co, normales, force, echelle=echelle, mid_level=0.5, octaves=octaves,
+                                             graine=graine)
+    mesh.vertices.foreach_set("co", co.astype(np.float32).ravel())
+    mesh.update()
+
+
+def ajouter_bruit_initial(objet, force, taille, graine=0):
+    """
+    Déplace les sommets le long de leur normale selon un bruit "nuages" (Displace Clouds appliqué).
 
     Args:
         objet: cible du displacement.
         force: force (strength) du displacement.
-        taille: noise_scale de la texture.
-
+        taille: noise_scale du bruit.
+        graine: graine du bruit.
 
     Méthode:
-        Crée une texture Clouds, attache un mod Displace puis l'applique immédiatement.
+        Sommets et normales lus par foreach_get, bruit fBm évalué en NumPy (noise_depth 2, mid_level 0.5),
+        résultat réécrit d'un seul foreach_set : ni texture, ni modificateur, ni objet actif.
     """
-    tex = bpy.data.textures.new(f"BruitInit_{objet.name}", type='CLOUDS')
-    tex.noise_scale = taille
-    mod = objet.modifiers.new(name="DeformationInit", type='DISPLACE')
-    mod.texture = tex
-    mod.strength = force
-    mod.mid_level = 0.5
-    bpy.context.view_layer.objects.active = objet
-    bpy.ops.object.modifier_apply(modifier=mod.name)
+    _deplacer_sommets(objet, force, taille, octaves=3, graine=graine)
 
 
-def appliquer_bruit_final_agressif(objet, force_finale, echelle_finale, niveau_subdivision=2):
+def appliquer_bruit_final_agressif(objet, force_finale, echelle_finale, niveau_subdivision=2, graine=1000):
     """
-    Applique subsurf puis displacement final avec texture Clouds.
+    Applique subsurf puis displacement final avec un bruit "nuages".
 
     Args:
         objet: cible.
         force_finale: intensity du displacement final.
         echelle_finale: noise_scale du bruit final.
         niveau_subdivision: niveaux de subdivision.
+        graine: graine du bruit.
 
     Returns:
         None
 
     Méthode:
-        Ajoute Subsurf + Displace, configure les textures puis applique les deux modifiers.
+        Applique un Subsurf, puis déplace les sommets subdivisés en NumPy (noise_depth 4, mid_level 0.5).
     """
-    bpy.ops.object.select_all(action='DESELECT')
-    objet.select_set(True)
-    bpy.context.view_layer.objects.active = objet
-
     mod_sub = objet.modifiers.new(name="SubdivisionFinale", type='SUBSURF')
     mod_sub.levels = niveau_subdivision
     mod_sub.render_levels = niveau_subdivision
+    primitives.appliquer_modificateurs(objet, [mod_sub])
+
+    _deplacer_sommets(objet, force_finale, echelle_finale, octaves=5, graine=graine)
+
+
+# ------------------------------------------------------------------
+# CRÉATION DU CRÂNE
+# ------------------------------------------------------------------
+def _outils_crane(rayon_oeil, ecart_yeux_x, hauteur_yeux_z, profondeur_yeux_y, inclinaison_yeux,
+                  taille_nez_base, hauteur_nez_z, profondeur_nez_y, angle_nez,
+                  largeur_bouche_x, hauteur_arche_z, profondeur_bouche_y,
+                  taille_creusage_interne, position_creusage_y):
+    """Crée les cinq outils de découpe du crâne : yeux, nez, bouche, cavité"""
+    oeil_G = primitives.sphere_uv("Sphere", rayon=rayon_oeil, location=(ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z),
+                                  rotation=(0, math.radians(inclinaison_yeux), 0), echelle=(1.0, 1.5, 0.7))
+
+    oeil_D = primitives.sphere_uv("Sphere", rayon=rayon_oeil, location=(-ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z),
+                                  rotation=(0, math.radians(-inclinaison_yeux), 0), echelle=(1.0, 1.5, 0.7))
+
+    nez = primitives.cone("Cone", sommets=3, rayon1=taille_nez_base, rayon2=0.0, profondeur=9.0, location=(0, profondeur_nez_y, hauteur_nez_z),
+                          rotation=(math.radians(angle_nez), 0, math.radians(180)))
 
-    tex = bpy.data.textures.new(f"BruitFinal_{objet.name}", type='CLOUDS')
-    tex.noise_scale = echelle_finale
-    tex.noise_depth = 4
+    bouche = primitives.cylindre("Cylinder", sommets=128, rayon=1.0, profondeur=30.0, location=(0, profondeur_bouche_y, 0.0),
+                                 rotation=(math.radians(90), 0, 0), echelle=(largeur_bouche_x, hauteur_arche_z, 1.0))
 
-    mod_disp = objet.modifiers.new(name="DeformationFinale", type='DISPLACE')
-    mod_disp.texture = tex
-    mod_disp.strength = force_finale
-    mod_disp.mid_level = 0.5
+    outil_creusage = primitives.sphere_uv("Sphere", rayon=taille_creusage_interne, location=(0, position_creusage_y, 8.0),
+                                          echelle=(1.1, 0.7, 1.2))
 
-    bpy.ops.object.modifier_apply(modifier=mod_sub.name)
-    bpy.ops.object.modifier_apply(modifier=mod_disp.name)
+    return [oeil_G, oeil_D, nez, bouche, outil_creusage]
+
+
+def _sculpter_crane(location, rayon_base, echelle_crane, force_roche_initiale, force_roche_finale, echelle_roche_finale,
+                    rayon_oeil, ecart_yeux_x, hauteur_yeux_z, profondeur_yeux_y, inclinaison_yeux,
+                    taille_nez_base, hauteur_nez_z, profondeur_nez_y, angle_nez,
+                    largeur_bouche_x, hauteur_arche_z, profondeur_bouche_y,
+                    taille_creusage_interne, position_creusage_y, mat_roche,
+                    segments=160, ring_count=80, niveau_subdivision=2, graine=0):
+    """
+    Construit la géométrie du crâne (sphère, découpes, bruits), sans les lumières.
+    Les bruits utilisent les mêmes graines que champ_crane (graine, graine + 1000).
+
+    Returns:
+        crane (bpy.types.Object)
+    """
+    # bloc crâne
+    crane = primitives.sphere_uv("Crâne_Final_Hostile", rayon=rayon_base, location=location, segments=segments, anneaux=ring_count,
+                                 echelle=echelle_crane)
+    primitives.appliquer_transformations(crane, rotation=False)
+    crane.data.materials.append(mat_roche)
+    primitives.lisser(crane)
+    ajouter_bruit_initial(crane, force_roche_initiale, taille=6.0, graine=graine)
+
+    # outils: yeux, nez, bouche, cavité
+    outils = _outils_crane(rayon_oeil, ecart_yeux_x, hauteur_yeux_z, profondeur_yeux_y, inclinaison_yeux,
+                           taille_nez_base, hauteur_nez_z, profondeur_nez_y, angle_nez,
+                           largeur_bouche_x, hauteur_arche_z, profondeur_bouche_y,
+                           taille_creusage_interne, position_creusage_y)
+
+    # exécution des découpes : un seul booléen pour les cinq outils
+    appliquer_booleen_unique(crane, outils)
+
+    # bruit final
+    appliquer_bruit_final_agressif(crane, force_finale=force_roche_finale, echelle_finale=echelle_roche_finale,
+                                   niveau_subdivision=niveau_subdivision, graine=graine + 1000)
+
+    return crane
+
+
+def comparer_booleens(**params):
+    """
+    Mesure les découpes du crâne avec les paramètres par défaut (surchargés par params) :
+    cinq booléens FLOAT successifs (ancienne méthode) contre appliquer_booleen_unique.
+    Les deux crânes de mesure sont supprimés à la fin.
+
+    Returns:
+        tuple: (secondes booléens successifs, secondes booléen unique)
+    """
+    defauts = {nom: p.default for nom, p in inspect.signature(creer_crane_final_onigashima).parameters.items()}
+    reglages = dict(defauts, **params)
+    noms_outils = inspect.signature(_outils_crane).parameters
+
+    temps = []
+    for unique in (False, True):
+        crane = primitives.sphere_uv("Crâne_Mesure", rayon=reglages["rayon_base"], location=reglages["location"],
+                                     segments=reglages["segments"], anneaux=reglages["ring_count"],
+                                     echelle=reglages["echelle_crane"])
+        primitives.appliquer_transformations(crane, rotation=False)
+        ajouter_bruit_initial(crane, reglages["force_roche_initiale"], taille=6.0, graine=reglages["graine"])
+        outils = _outils_crane(**{nom: reglages[nom] for nom in noms_outils})
+
+        debut = time.perf_counter()
+        if unique:
+            appliquer_booleen_unique(crane, outils)
+        else:
+            for outil in outils:
+                appliquer_booleen(crane, outil)
+        temps.append(time.perf_counter() - debut)
+
+        maillage = crane.data
+        bpy.data.objects.remove(crane, do_unlink=True)
+        bpy.data.meshes.remove(maillage)
+
+    print(f"Découpes du crâne : {len(outils)} booléens FLOAT successifs {temps[0]:.2f} s, "
+          f"booléen unique {temps[1]:.2f} s (x{temps[0] / max(temps[1], 1e-9):.1f})")
+    return tuple(temps)
 
 
 # ------------------------------------------------------------------
-# CRÉATION DU CRÂNE
+# CRÂNE IMPLICITE (CHAMP DE DISTANCE + VOXELS)
 # ------------------------------------------------------------------
+def champ_crane(p, location, rayon_base, echelle_crane, force_roche_initiale, force_roche_finale, echelle_roche_finale,
+                rayon_oeil, ecart_yeux_x, hauteur_yeux_z, profondeur_yeux_y, inclinaison_yeux,
+                taille_nez_base, hauteur_nez_z, profondeur_nez_y, angle_nez,
+                largeur_bouche_x, hauteur_arche_z, profondeur_bouche_y,
+                taille_creusage_interne, position_creusage_y, bande=0.5, graine=0):
+    """
+    Distance signée au crâne en chaque point (N, 3), coordonnées monde, mêmes paramètres que _sculpter_crane.
+
+    Les outils des booléens deviennent des primitives de sdf (mêmes positions, rotations et échelles)
+    et les deux Displace "Clouds" un décalage du champ par fbm_3d (mid_level 0.5, coordonnées locales).
+    Le bruit n'est évalué que dans une bande autour de la surface : ailleurs il ne change pas le signe.
+
+    Args:
+        bande: demi-largeur (en plus de l'amplitude du bruit) de la zone où le bruit est évalué.
+        graine: graine du bruit de roche.
+    """
+    local = p - np.asarray(location, dtype=np.float64)
+    d = sdf.ellipsoide(p, location, [rayon_base * e for e in echelle_crane])
+
+    # bruit initial (Displace force_roche_initiale, noise_scale 6, noise_depth 2)
+    proche = np.abs(d) < force_roche_initiale * 0.5 + bande
+    d[proche] -= force_roche_initiale * (bruit.fbm_3d(*local[proche].T, echelle=6.0, octaves=3, graine=graine) - 0.5)
+
+    # outils: yeux, nez, bouche, cavité (inutiles là où le crâne est loin)
+    seuil_final = force_roche_finale * 0.5 + bande
+    zone = d < seuil_final
+    q = p[zone]
+    outils = np.minimum.reduce([
+        sdf.ellipsoide(q, (ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z), (rayon_oeil, rayon_oeil * 1.5, rayon_oeil * 0.7),
+                       rotation=(0, math.radians(inclinaison_yeux), 0)),
+        sdf.ellipsoide(q, (-ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z), (rayon_oeil, rayon_oeil * 1.5, rayon_oeil * 0.7),
+                       rotation=(0, math.radians(-inclinaison_yeux), 0)),
+        sdf.pyramide(q, (0, profondeur_nez_y, hauteur_nez_z), taille_nez_base, 9.0, cotes=3,
+                     rotation=(math.radians(angle_nez), 0, math.radians(180))),
+        sdf.cylindre_elliptique(q, (0, profondeur_bouche_y, 0.0), (largeur_bouche_x, hauteur_arche_z), 30.0,
+                                rotation=(math.radians(90), 0, 0)),
+        sdf.ellipsoide(q, (0, position_creusage_y, 8.0),
+                       (taille_creusage_interne * 1.1, taille_creusage_interne * 0.7, taille_creusage_interne * 1.2)),
+    ])
+    d[zone] = np.maximum(d[zone], -outils)
+
+    # bruit final (Displace force_roche_finale, noise_depth 4)
+    proche = np.abs(d) < seuil_final
+    d[proche] -= force_roche_finale * (bruit.fbm_3d(*local[proche].T, echelle=echelle_roche_finale, octaves=5,
+                                                     graine=graine + 1000) - 0.5)
+    return d
+
+
+def _sculpter_crane_implicite(mat_roche, taille_voxel=0.2, memoire_max_mo=256, **geometrie):
+    """
+    Construit la géométrie du crâne par extraction de surface d'un champ de distance, sans booléen.
+
+    Args:
+        mat_roche: matériau du crâne.
+        taille_voxel: pas de la grille ; le nombre de faces varie comme 1 / taille_voxel².
+        memoire_max_mo: mémoire de travail d'une tranche de la grille (la grille entière n'est jamais allouée).
+        **geometrie: paramètres de géométrie de creer_crane_final_onigashima.
+
+    Returns:
+        crane (bpy.types.Object)
+    """
+    location = np.asarray(geometrie["location"], dtype=np.float64)
+    rayons = np.array([geometrie["rayon_base"] * e for e in geometrie["echelle_crane"]])
+    marge = (geometrie["force_roche_initiale"] + geometrie["force_roche_finale"]) * 0.5 + 3 * taille_voxel
+    bande = 3 * taille_voxel
+
+    co, quads, stats = sdf.extraire_surface(
+        lambda p: champ_crane(p, bande=bande, **geometrie),
+        location - rayons - marge, location + rayons + marge, taille_voxel, memoire_max_mo
+    )
+
+    nb_faces = len(quads)
+    mesh = mesh_cache.construire_maillage("Crâne_Final_Hostile", {
+        "co": (co - location.astype(np.float32)).ravel(),
+        "boucles": quads.ravel(),
+        "debuts": np.arange(0, 4 * nb_faces, 4, dtype=np.int32),
+        "tailles": np.full(nb_faces, 4, dtype=np.int32),
+        "materiau": np.zeros(nb_faces, dtype=np.int32),
+        "lisse": np.ones(nb_faces, dtype=bool),
+    }, materiaux=[mat_roche])
+
+    crane = bpy.data.objects.new("Crâne_Final_Hostile", mesh)
+    bpy.context.collection.objects.link(crane)
+    crane.location = geometrie["location"]
+
+    nx, ny, nz = stats["grille"]
+    print(f"Crâne implicite : voxel {taille_voxel}, grille {nx}x{ny}x{nz} en {stats['tranches']} tranche(s) "
+          f"de ~{stats['memoire_tranche_mo']:.0f} Mo, {len(co)} sommets, {nb_faces} faces, {stats['temps']:.2f} s")
+    return crane
+
+
 def creer_crane_final_onigashima(
     location=(0, 0, 8.0),
     rayon_base = 13.0,
@@ -222,13 +563,32 @@ def creer_crane_final_onigashima(
     taille_creusage_interne = 11.0,
     position_creusage_y = 3.5,
 
-    puissance_lumiere = 120.0
+    puissance_lumiere = 120.0,
+
+    graine = 0,
+
+    utiliser_cache = True,
+
+    methode = "booleens",
+    taille_voxel = 0.2,
+    memoire_max_mo = 256,
+
+    segments = 160,
+    ring_count = 80,
+    niveau_subdivision = 2
 ):
     """
     Construit le crâne complet avec découpes (yeux, nez, bouche, cavité) et lumières internes.
 
     Args:
         Paramètres de géométrie et d'éclairage (voir signatures).
+        graine: graine du bruit de roche (mêmes reliefs pour les deux méthodes).
+        utiliser_cache: relit le crâne découpé depuis le cache disque si la géométrie n'a pas changé.
+        methode: "booleens" (sphère, découpes booléennes, modificateurs) ou "sdf" (champ de distance maillé
+            sur une grille de voxels, voir _sculpter_crane_implicite).
+        taille_voxel, memoire_max_mo: résolution et mémoire de travail de la méthode "sdf".
+        segments, ring_count, niveau_subdivision: résolution de la méthode "booleens" (sphère de base et
+            subdivision avant le bruit final).
 
     Returns:
         crane (bpy.types.Object)
@@ -236,82 +596,67 @@ def creer_crane_final_onigashima(
     Méthode:
         Crée une sphère dense, applique matériaux, effectue des booleans avec des primitives outils,
         applique bruit initial et final, puis ajoute des objets lumineux parentés au crâne.
+        Le maillage final (avant lumières) est mis en cache, indexé par les paramètres de géométrie.
     """
+    params_geometrie = {k: v for k, v in locals().items()
+                        if k not in ("puissance_lumiere", "utiliser_cache", "methode", "taille_voxel", "memoire_max_mo",
+                                     "segments", "ring_count", "niveau_subdivision")}
+    resolution_sphere = {"segments": segments, "ring_count": ring_count, "niveau_subdivision": niveau_subdivision}
+
     configurer_rendu_eevee()
     mat_roche = creer_materiau_roche_hostile()
     mat_feu = creer_materiau_lumiere(puissance_lumiere)
 
-    # bloc crâne
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=rayon_base, location=location, segments=160, ring_count=80)
-    crane = bpy.context.active_object
-    crane.name = "Crâne_Final_Hostile"
-    crane.scale = echelle_crane
-    bpy.ops.object.transform_apply(scale=True)
-    crane.data.materials.append(mat_roche)
-    bpy.ops.object.shade_smooth()
-    ajouter_bruit_initial(crane, force_roche_initiale, taille=6.0)
-
-    # outils: yeux, nez, bouche, cavité
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=rayon_oeil, location=(ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z))
-    oeil_G = bpy.context.active_object
-    oeil_G.scale = (1.0, 1.5, 0.7)
-    oeil_G.rotation_euler = (0, math.radians(inclinaison_yeux), 0)
-
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=rayon_oeil, location=(-ecart_yeux_x, profondeur_yeux_y, hauteur_yeux_z))
-    oeil_D = bpy.context.active_object
-    oeil_D.scale = (1.0, 1.5, 0.7)
-    oeil_D.rotation_euler = (0, math.radians(-inclinaison_yeux), 0)
-
-    bpy.ops.mesh.primitive_cone_add(vertices=3, radius1=taille_nez_base, radius2=0.0, depth=9.0, location=(0, profondeur_nez_y, hauteur_nez_z))
-    nez = bpy.context.active_object
-    nez.rotation_euler = (math.radians(angle_nez), 0, math.radians(180))
-
-    bpy.ops.mesh.primitive_cylinder_add(vertices=128, radius=1.0, depth=30.0, location=(0, profondeur_bouche_y, 0.0))
-    bouche = bpy.context.active_object
-    bouche.rotation_euler = (math.radians(90), 0, 0)
-    bouche.scale = (largeur_bouche_x, hauteur_arche_z, 1.0)
-
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=taille_creusage_interne, location=(0, position_creusage_y, 8.0))
-    outil_creusage = bpy.context.active_object
-    outil_creusage.scale = (1.1, 0.7, 1.2)
-
-    # exécution des découpes
-    appliquer_booleen(crane, oeil_G)
-    appliquer_booleen(crane, oeil_D)
-    appliquer_booleen(crane, nez)
-    appliquer_booleen(crane, bouche)
-    appliquer_booleen(crane, outil_creusage)
-
-    # bruit final
-    appliquer_bruit_final_agressif(crane, force_finale=force_roche_finale, echelle_finale=echelle_roche_finale, niveau_subdivision=2)
+    if methode == "sdf":
+        cle = mesh_cache.cle_cache("crane", dict(params_geometrie, methode=methode, taille_voxel=taille_voxel),
+                                   _sculpter_crane_implicite, champ_crane, sdf.extraire_surface, sdf._sommets_tranche,
+                                   sdf._quads_tranche, sdf.ellipsoide, sdf.pyramide, sdf.cylindre_elliptique, bruit.fbm_3d)
+    else:
+        cle = mesh_cache.cle_cache("crane", dict(params_geometrie, **resolution_sphere), _sculpter_crane,
+                                   appliquer_booleen_unique, choisir_solveur, grouper_outils, _outils_crane, ajouter_bruit_initial, appliquer_bruit_final_agressif,
+                                   _deplacer_sommets, bruit.deplacer_le_long_des_normales, bruit.fbm_3d)
+    en_cache = mesh_cache.charger(cle, "Crâne_Final_Hostile", materiaux=[mat_roche]) if utiliser_cache else None
+    if en_cache:
+        crane = bpy.data.objects.new("Crâne_Final_Hostile", en_cache[0])
+        bpy.context.collection.objects.link(crane)
+        crane.location = location
+    else:
+        if methode == "sdf":
+            crane = _sculpter_crane_implicite(mat_roche, taille_voxel, memoire_max_mo, **params_geometrie)
+        else:
+            crane = _sculpter_crane(**params_geometrie, **resolution_sphere, mat_roche=mat_roche)
+        if utiliser_cache:
+            mesh_cache.sauver(cle, crane)
 
     # lumières internes
     offset_fond_oeil_y = 1.0
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=rayon_oeil*0.6, location=(ecart_yeux_x, profondeur_yeux_y + offset_fond_oeil_y, hauteur_yeux_z))
-    lum_G = bpy.context.active_object
-    lum_G.scale = (1.0, 0.2, 0.7)
-    lum_G.rotation_euler = (0, math.radians(inclinaison_yeux), 0)
+    lum_G = primitives.sphere_uv("Sphere", rayon=rayon_oeil*0.6, location=(ecart_yeux_x, profondeur_yeux_y + offset_fond_oeil_y, hauteur_yeux_z),
+                                 rotation=(0, math.radians(inclinaison_yeux), 0), echelle=(1.0, 0.2, 0.7))
     lum_G.data.materials.append(mat_feu)
 
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=rayon_oeil*0.6, location=(-ecart_yeux_x, profondeur_yeux_y + offset_fond_oeil_y, hauteur_yeux_z))
-    lum_D = bpy.context.active_object
-    lum_D.scale = (1.0, 0.2, 0.7)
-    lum_D.rotation_euler = (0, math.radians(-inclinaison_yeux), 0)
+    lum_D = primitives.sphere_uv("Sphere", rayon=rayon_oeil*0.6, location=(-ecart_yeux_x, profondeur_yeux_y + offset_fond_oeil_y, hauteur_yeux_z),
+                                 rotation=(0, math.radians(-inclinaison_yeux), 0), echelle=(1.0, 0.2, 0.7))
     lum_D.data.materials.append(mat_feu)
 
-    bpy.ops.object.light_add(type='POINT', radius=10.0, location=(0, 5.0, 5.0))
-    grosse_lumiere = bpy.context.active_object
-    grosse_lumiere.data.energy = puissance_lumiere * 200
-    grosse_lumiere.data.color = (1.0, 0.05, 0.01)
+    lumiere = bpy.data.lights.new("Point", type='POINT')
+    lumiere.shadow_soft_size = 10.0
+    lumiere.energy = puissance_lumiere * 200
+    lumiere.color = (1.0, 0.05, 0.01)
+    grosse_lumiere = bpy.data.objects.new("Point", lumiere)
+    bpy.context.collection.objects.link(grosse_lumiere)
+    grosse_lumiere.location = (0, 5.0, 5.0)
 
-    # parentage lumières
+    # parentage lumières (matrix_world du crâne n'est pas encore à jour : recalculée)
+    inverse_crane = primitives.matrice_monde(crane).inverted()
     lum_G.parent = crane
-    lum_G.matrix_parent_inverse = crane.matrix_world.inverted()
+    lum_G.matrix_parent_inverse = inverse_crane
     lum_D.parent = crane
-    lum_D.matrix_parent_inverse = crane.matrix_world.inverted()
+    lum_D.matrix_parent_inverse = inverse_crane
     grosse_lumiere.parent = crane
-    grosse_lumiere.matrix_parent_inverse = crane.matrix_world.inverted()
+    grosse_lumiere.matrix_parent_inverse = inverse_crane
 
+    # dimensions et matrix_world du crâne (lus par les cornes) ne sont à jour qu'après une évaluation de la scène
+    bpy.context.view_layer.update()
     return crane
 
 
@@ -319,6 +664,51 @@ def creer_crane_final_onigashima(
 # CORNES ADAPTATIVES
 # ------------------------------------------------------------------
 
+def maillage_corne(longueur, rayon_base, rayon_pointe, angle_courbure, segments=64, anneaux=48):
+    """
+    Corne analytique : tube effilé le long de Z (base en z = 0), fermé par deux éventails, puis courbé
+    exactement comme le modificateur SIMPLE_DEFORM "BEND" d'axe Y de l'ancienne pile.
+
+    Args:
+        longueur, rayon_base, rayon_pointe: dimensions du cône d'origine.
+        angle_courbure: angle de courbure en degrés.
+        segments: sommets par anneau.
+        anneaux: anneaux le long de la corne (la courbure n'est lisse qu'avec assez d'anneaux).
+
+    Returns:
+        tuple: (co (N, 3), triangles (T, 3), quads (Q, 4)) dans le repère de la corne.
+    """
+    t = np.linspace(0.0, 1.0, anneaux)
+    rayon = rayon_base + (rayon_pointe - rayon_base) * t
+    angle = 2 * math.pi * np.arange(segments) / segments
+    x = (rayon[:, None] * np.cos(angle)).ravel()
+    y = (rayon[:, None] * np.sin(angle)).ravel()
+    z = np.repeat(t * longueur, segments)
+    # centre de la base puis pointe
+    co = np.column_stack((np.append(x, [0.0, 0.0]), np.append(y, [0.0, 0.0]), np.append(z, [0.0, longueur])))
+    centre, pointe = len(co) - 2, len(co) - 1
+
+    j = np.arange(segments)
+    suivant = (j + 1) % segments
+    a = (np.arange(anneaux - 1)[:, None] * segments + j).ravel()
+    b = (np.arange(anneaux - 1)[:, None] * segments + suivant).ravel()
+    quads = np.column_stack((a, b, b + segments, a + segments))
+    dernier = (anneaux - 1) * segments
+    triangles = np.concatenate([
+        np.column_stack((np.full(segments, centre), suivant, j)),
+        np.column_stack((dernier + j, dernier + suivant, np.full(segments, pointe))),
+    ])
+
+    # Courbure (formule de Blender, axe Y : l'angle suit z, le décalage se fait en x)
+    k = math.radians(angle_courbure) / longueur
+    if abs(k) > 1e-7:
+        theta = co[:, 2] * k
+        decale = co[:, 0] - 1.0 / k
+        co[:, 2] = -decale * np.sin(theta)
+        co[:, 0] = decale * np.cos(theta) + 1.0 / k
+    return co, triangles, quads
+
+
 def ajouter_cornes_adaptatives(
     objet_cible,
     taille_relative = 0.95,
@@ -329,19 +719,29 @@ def ajouter_cornes_adaptatives(
     pos_rel_y = -0.05,
     pos_rel_z = 0.20,
     rotation_deg = (0.0, 65.0, -10.0),
-    nom_materiau = "Mat_Roche_Hostile"
+    nom_materiau = "Mat_Roche_Hostile",
+    segments = 64,
+    anneaux = 48,
+    interactif = False,
+    vertices = 128,
+    niveau_subdivision = 3
 ):
     """
     Génère et attache des cornes coniques, symétrisées et parentées à l'objet cible.
 
     Args:
         Voir la signature pour les paramètres de proportion, position et rotation.
+        segments, anneaux: résolution de la paire cuite (sommets par anneau, anneaux le long de la corne).
+        interactif: garde l'ancienne pile de modificateurs vivante (Subsurf + Bend + Miroir) pour l'édition.
+        vertices, niveau_subdivision: résolution du cône et de la subdivision en mode interactif.
 
     Returns:
         corne (bpy.types.Object) ou None si objet_cible est absent.
 
     Méthode:
-        Crée un cône, ajoute Subsurf + Bend, place et miroir pour obtenir la paire, puis parent.
+        Par défaut, la paire est calculée directement (voir maillage_corne), placée, symétrisée par rapport
+        à l'objet cible et écrite dans un seul maillage statique : rien à réévaluer quand le crâne bouge.
+        En mode interactif : crée un cône, ajoute Subsurf + Bend, place et miroir pour obtenir la paire, puis parent.
     """
     if not objet_cible:
         print("ERREUR : L'objet cible est manquant.")
@@ -352,21 +752,62 @@ def ajouter_cornes_adaptatives(
     rayon_base = largeur_ref * epaisseur_relative
     rayon_pointe = largeur_ref * finesse_pointe
 
-    bpy.ops.mesh.primitive_cone_add(
-        vertices=128,
-        radius1=rayon_base,
-        radius2=rayon_pointe,
-        depth=longueur_corne,
+    if interactif:
+        return _cornes_interactives(objet_cible, longueur_corne, rayon_base, rayon_pointe, angle_courbure,
+                                    pos_rel_x, pos_rel_y, pos_rel_z, rotation_deg, nom_materiau, vertices, niveau_subdivision)
+
+    co, triangles, quads = maillage_corne(longueur_corne, rayon_base, rayon_pointe, angle_courbure, segments, anneaux)
+
+    # repère de la corne (même placement que l'ancienne pile), puis repère local de la cible
+    loc = np.array([
+        objet_cible.location.x + (objet_cible.dimensions.x * pos_rel_x),
+        objet_cible.location.y + (objet_cible.dimensions.y * pos_rel_y),
+        objet_cible.location.z + (objet_cible.dimensions.z * pos_rel_z),
+    ])
+    monde = co @ sdf.matrice_euler([math.radians(a) for a in rotation_deg]).T + loc
+    vers_cible = np.array(objet_cible.matrix_world.inverted())
+    local = monde @ vers_cible[:3, :3].T + vers_cible[:3, 3]
+
+    # symétrie en X dans le repère de la cible (comme le Miroir avec mirror_object) : ordre des faces inversé
+    miroir = local * np.array([-1.0, 1.0, 1.0])
+    n = len(local)
+    faces = [triangles, quads, triangles[:, ::-1] + n, quads[:, ::-1] + n]
+
+    tailles = np.concatenate([np.full(len(f), f.shape[1]) for f in faces])
+    nb_faces = len(tailles)
+    mesh = mesh_cache.construire_maillage("Corne_Onigashima", {
+        "co": np.concatenate((local, miroir)).astype(np.float32).ravel(),
+        "boucles": np.concatenate([f.ravel() for f in faces]).astype(np.int32),
+        "debuts": (np.cumsum(tailles) - tailles).astype(np.int32),
+        "tailles": tailles.astype(np.int32),
+        "materiau": np.zeros(nb_faces, dtype=np.int32),
+        "lisse": np.ones(nb_faces, dtype=bool),
+    }, materiaux=[bpy.data.materials.get(nom_materiau)])
+
+    corne = bpy.data.objects.new("Corne_Onigashima", mesh)
+    bpy.context.collection.objects.link(corne)
+    # le maillage est déjà exprimé dans le repère de la cible
+    corne.parent = objet_cible
+    return corne
+
+
+def _cornes_interactives(objet_cible, longueur_corne, rayon_base, rayon_pointe, angle_courbure,
+                         pos_rel_x, pos_rel_y, pos_rel_z, rotation_deg, nom_materiau, vertices, niveau_subdivision):
+    """Ancienne construction : cône + Subsurf + Bend + Miroir laissés vivants, pour ajuster les cornes à la main"""
+    corne = primitives.cone(
+        "Corne_Onigashima",
+        sommets=vertices,
+        rayon1=rayon_base,
+        rayon2=rayon_pointe,
+        profondeur=longueur_corne,
         location=(0, 0, longueur_corne / 2)
     )
-    corne = bpy.context.active_object
-    corne.name = "Corne_Onigashima"
 
-    bpy.ops.object.transform_apply(location=True, rotation=False, scale=False)
+    primitives.appliquer_transformations(corne, location=True, rotation=False, echelle=False)
 
     mod_sub = corne.modifiers.new(name="Subdivision", type='SUBSURF')
-    mod_sub.levels = 3
-    mod_sub.render_levels = 3
+    mod_sub.levels = niveau_subdivision
+    mod_sub.render_levels = niveau_subdivision
 
     mod_bend = corne.modifiers.new(name="Courbure", type='SIMPLE_DEFORM')
     mod_bend.deform_method = 'BEND'
@@ -388,7 +829,7 @@ def ajouter_cornes_adaptatives(
     corne.parent = objet_cible
     corne.matrix_parent_inverse = objet_cible.matrix_world.inverted()
 
-    bpy.ops.object.shade_smooth()
+    primitives.lisser(corne)
     mat = bpy.data.materials.get(nom_materiau)
     if mat:
         corne.data.materials.append(mat)
@@ -396,14 +837,94 @@ def ajouter_cornes_adaptatives(
     return corne
 
 
+# ------------------------------------------------------------------
+# BUDGET DE POLYGONES
+# ------------------------------------------------------------------
+
+# Rapport faces / aire de l'ellipsoïde englobant mesuré sur le crâne par défaut (orbites, bouche
+# et cavité ajoutent de la surface) : sert à estimer le coût de la méthode "sdf"
+SURFACE_RELATIVE_SDF = 2.4
+
+
+def _aire_ellipsoide(a, b, c):
+    """Aire approchée d'un ellipsoïde (formule de Knud Thomsen, erreur < 1.1 %)"""
+    p = 1.6075
+    return 4 * math.pi * (((a * b) ** p + (a * c) ** p + (b * c) ** p) / 3) ** (1 / p)
+
+
+def cout_crane(methode="booleens", segments=160, ring_count=80, niveau_subdivision=2, taille_voxel=0.2,
+               rayon_base=13.0, echelle_crane=(1.45, 1.05, 1.15)):
+    """Triangles estimés du crâne (les découpes booléennes changent peu le compte de la sphère subdivisée)"""
+    if methode == "sdf":
+        aire = _aire_ellipsoide(*(rayon_base * e for e in echelle_crane))
+        return int(2 * SURFACE_RELATIVE_SDF * aire / (taille_voxel * taille_voxel))
+    return budget.cout_sphere_uv(segments, ring_count, niveau_subdivision)
+
+
+def cout_cornes(segments=64, anneaux=48, interactif=False, vertices=128, niveau_subdivision=3):
+    """
+    Triangles de la paire de cornes (x2 pour la symétrie) : tube de quads fermé par deux éventails,
+    ou en mode interactif cône à deux faces n-gones subdivisé.
+    """
+    if interactif:
+        return 2 * budget.cout_subdivision(quads=vertices, ngones=(vertices, vertices), niveaux=niveau_subdivision)
+    return 2 * budget.cout_subdivision(quads=segments * (anneaux - 1), triangles=2 * segments)
+
+
+def declarer_budget(region="Onigashima", methode="booleens", cornes_interactives=False):
+    """Déclare le crâne et les cornes au budget de polygones"""
+    if methode == "sdf":
+        candidats_crane = [{"methode": "sdf", "taille_voxel": round(0.05 * 1.1 ** k, 4)} for k in range(40)]
+        nominal_crane = {"methode": "sdf", "taille_voxel": 0.2}
+    else:
+        candidats_crane = [{"segments": s, "ring_count": s // 2, "niveau_subdivision": n}
+                           for n in (2, 1, 0) for s in range(16, 641, 16)]
+        nominal_crane = {"segments": 160, "ring_count": 80, "niveau_subdivision": 2}
+    budget.declarer("crane", region, nominal_crane, cout_crane,
+                    lambda tri: budget.choisir(candidats_crane, cout_crane, tri), objets=("Crâne_Final_Hostile",))
+
+    if cornes_interactives:
+        candidats_cornes = [{"interactif": True, "vertices": v, "niveau_subdivision": n}
+                            for n in (3, 2, 1, 0) for v in range(8, 257, 8)]
+        nominal_cornes = {"interactif": True, "vertices": 128, "niveau_subdivision": 3}
+    else:
+        # environ deux anneaux par segment de tour : la courbure reste aussi lisse que la section
+        candidats_cornes = [{"segments": n, "anneaux": max(4, (n * 3) // 4)} for n in range(8, 257, 4)]
+        nominal_cornes = {"segments": 64, "anneaux": 48}
+    budget.declarer("cornes", region, nominal_cornes, cout_cornes,
+                    lambda tri: budget.choisir(candidats_cornes, cout_cornes, tri), objets=("Corne_Onigashima",))
+
+
 # ------------------------------------------------------------------
 # FONCTION D'ASSEMBLAGE
 # ------------------------------------------------------------------
+def _hauteur_pose(crane, champ, echantillons=9):
+    """
+    Hauteur de l'origine du crâne pour que sa base touche le sol.
+
+    Le sol est lu en bloc sur une grille couvrant l'emprise du crâne : sa base est posée sur le point
+    le plus bas, pour ne flotter nulle part. Sans sol sous l'emprise, le crâne garde sa hauteur.
+    """
+    if champ is None:
+        return crane.location.z
+    matrice = np.array(crane.matrix_world)
+    coins = np.array([tuple(c) for c in crane.bound_box]) @ matrice[:3, :3].T + matrice[:3, 3]
+    xs, ys = np.meshgrid(np.linspace(coins[:, 0].min(), coins[:, 0].max(), echantillons),
+                         np.linspace(coins[:, 1].min(), coins[:, 1].max(), echantillons))
+    hauteurs = sol.hauteur_en(champ, xs, ys)
+    if np.isnan(hauteurs).all():
+        return crane.location.z
+    return float(np.nanmin(hauteurs)) + (crane.location.z - coins[:, 2].min())
+
+
 def construire(
     ile_base,
     ratio_taille = 0.65,
     enfoncement_z = 0.0,
-    decalage_y = 0.0
+    decalage_y = 0.0,
+    reglages_crane = None,
+    reglages_cornes = None,
+    suivre_sol = True
 ):
     """
     Orquestre la génération complète et positionne le crâne sur l'île donnée.
@@ -413,6 +934,10 @@ def construire(
         ratio_taille: portion de la largeur de l'île pour la taille du crâne.
         enfoncement_z: profondeur d'enfoncement.
         decalage_y: décalage sur l'axe Y.
+        reglages_crane: arguments de résolution de creer_crane_final_onigashima (voir declarer_budget).
+        reglages_cornes: arguments de résolution de ajouter_cornes_adaptatives.
+        suivre_sol: pose la base du crâne sur le relief de l'île (point le plus bas du sol sous son emprise,
+            voir sol.py) avant l'enfoncement ; False : base au centre de l'île.
 
     Returns:
         None
@@ -423,12 +948,12 @@ def construire(
     """
     print(f"--- DÉBUT DE LA CONSTRUCTION SUR L'ÎLE : {ile_base.name if ile_base else 'Aucune'} ---")
 
-    crane = creer_crane_final_onigashima()
+    crane = creer_crane_final_onigashima(**(reglages_crane or {}))
     if not crane:
         print("Erreur lors de la génération du crâne.")
         return None
 
-    ajouter_cornes_adaptatives(objet_cible=crane)
+    ajouter_cornes_adaptatives(objet_cible=crane, **(reglages_cornes or {}))
 
     if ile_base:
         largeur_voulue = ile_base.dimensions.x * ratio_taille
@@ -444,6 +969,9 @@ def construire(
             ile_base.location.y + decalage_y,
             ile_base.location.z - enfoncement_z
         )
+        if suivre_sol:
+            bpy.context.view_layer.update()
+            crane.location.z = _hauteur_pose(crane, sol.champ_hauteur(ile_base)) - enfoncement_z
         crane.parent = ile_base
         crane.matrix_parent_inverse = ile_base.matrix_world.inverted()
         print(f"Assemblage terminé ! Crâne placé en {crane.location}")
@@ -2,9 +2,57 @@ import bpy
 import random
 import math
 
+import numpy as np
 
+import mesh_cache
+import spatial
+import graines
+import instances
+import cache_particules
+import terrain
+import bruit
+import gabarits
+import donnees
+import budget
+import primitives
+import sol
 
-def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000):
+
+
+def creer_flocon_maitre():
+    """
+    Crée le flocon modèle (petite ico-sphère émissive cachée sous la scène).
+
+    Returns:
+        bpy.types.Object: Le flocon.
+    """
+    # Création d'une sphère de base placée loin sous la scène pour ne pas être vue
+    flocon = primitives.ico_sphere("Flocon_Master", rayon=0.15, subdivisions=1, location=(0, 0, -100))
+    flocon.visible_shadow = False # Désactivation des ombres pour plus de clarté
+
+    # Création d'un matériau émissif pour que les flocons brillent même dans l'ombre
+    mat_neige, cree = donnees.materiau("Mat_Flocon_Particule")
+    if cree:
+        mat_neige.use_nodes = True
+        mat_neige.diffuse_color = (1.0, 1.0, 1.0, 1.0)
+
+        nodes = mat_neige.node_tree.nodes
+        links = mat_neige.node_tree.links
+        for n in nodes: nodes.remove(n) # Nettoyage des noeuds par défaut
+
+        sortie = nodes.new(type='ShaderNodeOutputMaterial')
+        emission = nodes.new(type='ShaderNodeEmission')
+        emission.inputs['Color'].default_value = (1.0, 1.0, 1.0, 1.0)
+        emission.inputs['Strength'].default_value = 3.0 # Intensité de la brillance
+        links.new(emission.outputs['Emission'], sortie.inputs['Surface'])
+
+    flocon.data.materials.append(mat_neige)
+    flocon.hide_render = True # On cache l'objet original au rendu final
+    return flocon
+
+
+
+def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000, graine=None):
     """
     Crée un système de particules circulaire simulant une chute de neige.
     
@@ -13,6 +61,7 @@ def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000):
         rayon (float): Le rayon du disque émetteur de particules.
         hauteur_nuage (float): L'altitude de l'émetteur par rapport à l'île.
         nb_flocons (int): Nombre total de particules à générer.
+        graine (int): Graine de construction (voir graines.py) ; None garde la graine par défaut de Blender.
     """
     print("Génération de la tempête de neige circulaire...")
 
@@ -20,49 +69,26 @@ def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000):
     location = (ile_cible.location.x, ile_cible.location.y, ile_cible.location.z + hauteur_nuage)
 
     # --- 1. Création du modèle de flocon ---
-    # Création d'une sphère de base placée loin sous la scène pour ne pas être vue
-    bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=1, radius=0.15, location=(0, 0, -100))
-    flocon = bpy.context.active_object
-    flocon.name = "Flocon_Master"
-    flocon.visible_shadow = False # Désactivation des ombres pour plus de clarté
-
-    # Création d'un matériau émissif pour que les flocons brillent même dans l'ombre
-    mat_neige = bpy.data.materials.new(name="Mat_Flocon_Particule")
-    mat_neige.use_nodes = True
-    mat_neige.diffuse_color = (1.0, 1.0, 1.0, 1.0)
-
-    nodes = mat_neige.node_tree.nodes
-    links = mat_neige.node_tree.links
-    for n in nodes: nodes.remove(n) # Nettoyage des noeuds par défaut
-
-    sortie = nodes.new(type='ShaderNodeOutputMaterial')
-    emission = nodes.new(type='ShaderNodeEmission')
-    emission.inputs['Color'].default_value = (1.0, 1.0, 1.0, 1.0)
-    emission.inputs['Strength'].default_value = 3.0 # Intensité de la brillance
-    links.new(emission.outputs['Emission'], sortie.inputs['Surface'])
-
-    flocon.data.materials.append(mat_neige)
-    flocon.hide_render = True # On cache l'objet original au rendu final
+    flocon = gabarits.get_or_build("Flocon_Master", {}, creer_flocon_maitre)
 
     # --- 2. Création de l'émetteur (le nuage invisible) ---
     # Utilisation d'un cercle pour limiter la chute à la forme de l'île
-    bpy.ops.mesh.primitive_circle_add(vertices=64, radius=rayon, fill_type='NGON', location=location)
-    nuage = bpy.context.active_object
-    nuage.name = "Nuage_Emetteur"
+    nuage = primitives.cercle("Nuage_Emetteur", rayon=rayon, sommets=64, remplissage='NGON', location=location)
 
     # Création d'un matériau transparent pour l'émetteur
-    mat_invis = bpy.data.materials.new(name="Mat_Nuage_Invisible")
-    mat_invis.use_nodes = True
-    mat_invis.blend_method = 'CLIP' # Mode de transparence pour Eevee
-    mat_invis.diffuse_color = (0, 0, 0, 0) # Alpha à zéro
-
-    n_nodes = mat_invis.node_tree.nodes
-    n_links = mat_invis.node_tree.links
-    for n in n_nodes: n_nodes.remove(n)
+    mat_invis, cree = donnees.materiau("Mat_Nuage_Invisible")
+    if cree:
+        mat_invis.use_nodes = True
+        mat_invis.blend_method = 'CLIP' # Mode de transparence pour Eevee
+        mat_invis.diffuse_color = (0, 0, 0, 0) # Alpha à zéro
+
+        n_nodes = mat_invis.node_tree.nodes
+        n_links = mat_invis.node_tree.links
+        for n in n_nodes: n_nodes.remove(n)
     
-    n_out = n_nodes.new('ShaderNodeOutputMaterial')
-    n_transp = n_nodes.new('ShaderNodeBsdfTransparent') 
-    n_links.new(n_transp.outputs['BSDF'], n_out.inputs['Surface'])
+        n_out = n_nodes.new('ShaderNodeOutputMaterial')
+        n_transp = n_nodes.new('ShaderNodeBsdfTransparent') 
+        n_links.new(n_transp.outputs['BSDF'], n_out.inputs['Surface'])
 
     nuage.data.materials.append(mat_invis)
 
@@ -78,6 +104,8 @@ def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000):
     # --- 3. Configuration du système de particules ---
     nuage.modifiers.new("Reglages_Neige", type='PARTICLE_SYSTEM')
     part_sys = nuage.particle_systems[0].settings
+    if graine is not None:
+        nuage.particle_systems[0].seed = graines.graine_blender(graine, "ringo", ile_cible.name, "neige")
 
     # Paramètres d'émission
     part_sys.count = nb_flocons
@@ -108,6 +136,117 @@ def creer_tempete_neige(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000):
     bpy.context.view_layer.update()
     bpy.context.scene.frame_set(1)
     bpy.context.view_layer.update()
+    return nuage
+
+
+
+def arbre_neige_analytique(nom, flocon, hauteur_chute, nb_flocons_viewport):
+    """
+    Arbre Geometry Nodes de la neige analytique : la position de chaque flocon est une formule du temps.
+
+        chute = (vitesse * t + phase * hauteur) modulo hauteur     (le flocon reboucle en haut)
+        angle = pulsation * t + phase * 2pi
+        position = départ + (sin(angle) * amplitude, cos(angle) * amplitude, -chute)
+
+    Aucune simulation : n'importe quelle frame coûte autant que la première.
+    Dans le viewport, seuls les nb_flocons_viewport premiers flocons sont gardés.
+    """
+    arbre, entree, sortie = instances.nouvel_arbre_geonodes(nom)
+    noeuds, liens = arbre.nodes, arbre.links
+    op = lambda operation, a, b=None, x=0, y=0: instances.noeud_math(arbre, operation, a, b, (x, y))
+
+    # 1. Moins de flocons dans le viewport
+    est_viewport = noeuds.new('GeometryNodeIsViewport')
+    est_viewport.location = (-800, 400)
+    index = noeuds.new('GeometryNodeInputIndex')
+    index.location = (-800, 300)
+    trop = op('GREATER_THAN', index.outputs[0], nb_flocons_viewport - 0.5, -600, 300)
+    a_retirer = op('MULTIPLY', trop, est_viewport.outputs[0], -400, 350)
+
+    supprimer = noeuds.new('GeometryNodeDeleteGeometry')
+    supprimer.domain = 'POINT'
+    supprimer.location = (-200, 0)
+    liens.new(entree.outputs[0], supprimer.inputs["Geometry"])
+    liens.new(a_retirer, supprimer.inputs["Selection"])
+
+    # 2. Trajectoire fermée en fonction du temps de la scène
+    temps = noeuds.new('GeometryNodeInputSceneTime')
+    temps.location = (-800, -200)
+    t = temps.outputs["Seconds"]
+    phase = instances.lire_attribut(arbre, "phase", 'FLOAT', (-800, -350))
+    vitesse = instances.lire_attribut(arbre, "vitesse", 'FLOAT', (-800, -450))
+    amplitude = instances.lire_attribut(arbre, "amplitude", 'FLOAT', (-800, -550))
+    pulsation = instances.lire_attribut(arbre, "pulsation", 'FLOAT', (-800, -650))
+
+    avance = op('ADD', op('MULTIPLY', vitesse, t, -600, -300), op('MULTIPLY', phase, hauteur_chute, -600, -400), -400, -300)
+    chute = op('MODULO', avance, hauteur_chute, -200, -300)
+    angle = op('ADD', op('MULTIPLY', pulsation, t, -600, -600), op('MULTIPLY', phase, 2 * math.pi, -600, -700), -400, -600)
+
+    decalage = noeuds.new('ShaderNodeCombineXYZ')
+    decalage.location = (0, -400)
+    liens.new(op('MULTIPLY', op('SINE', angle, None, -200, -550), amplitude, -100, -500), decalage.inputs["X"])
+    liens.new(op('MULTIPLY', op('COSINE', angle, None, -200, -700), amplitude, -100, -650), decalage.inputs["Y"])
+    liens.new(op('MULTIPLY', chute, -1.0, -100, -300), decalage.inputs["Z"])
+
+    deplacer = noeuds.new('GeometryNodeSetPosition')
+    deplacer.location = (200, 0)
+    liens.new(supprimer.outputs[0], deplacer.inputs["Geometry"])
+    liens.new(decalage.outputs[0], deplacer.inputs["Offset"])
+
+    # 3. Un flocon par point
+    info = noeuds.new('GeometryNodeObjectInfo')
+    info.location = (200, 300)
+    info.inputs["Object"].default_value = flocon
+    info.inputs["As Instance"].default_value = True
+
+    instancier = noeuds.new('GeometryNodeInstanceOnPoints')
+    instancier.location = (500, 0)
+    liens.new(deplacer.outputs[0], instancier.inputs["Points"])
+    liens.new(info.outputs["Geometry"], instancier.inputs["Instance"])
+    liens.new(instances.lire_attribut(arbre, "taille", 'FLOAT', (200, -300)), instancier.inputs["Scale"])
+    liens.new(instancier.outputs["Instances"], sortie.inputs[0])
+    return arbre
+
+
+def creer_neige_analytique(ile_cible, rayon, hauteur_nuage=30.0, nb_flocons=15000, nb_flocons_viewport=3000, graine=None):
+    """
+    Chute de neige déterministe sans simulation : un nuage de points (paramètres tirés une fois)
+    animé par une formule Geometry Nodes du temps de la scène.
+
+    Args:
+        ile_cible (bpy.types.Object): L'objet servant de base pour la position.
+        rayon (float): Le rayon du disque d'où tombent les flocons.
+        hauteur_nuage (float): L'altitude du nuage par rapport à l'île (hauteur de chute).
+        nb_flocons (int): Nombre de flocons au rendu.
+        nb_flocons_viewport (int): Nombre de flocons affichés dans le viewport.
+        graine (int): Graine de construction (voir graines.py).
+    """
+    print("Génération de la neige analytique...")
+    alea = graines.flux_numpy(graine, "ringo", ile_cible.name, "neige")
+    flocon = gabarits.get_or_build("Flocon_Master", {}, creer_flocon_maitre)
+
+    # Départs uniformes dans le disque, au niveau du nuage
+    angle = alea.uniform(0.0, 2 * math.pi, nb_flocons)
+    r = rayon * np.sqrt(alea.random(nb_flocons))
+    positions = np.column_stack((r * np.cos(angle), r * np.sin(angle), np.zeros(nb_flocons)))
+
+    mesh = instances.nuage_de_points("Neige_Analytique", positions, {
+        "phase": (alea.random(nb_flocons), 'FLOAT'),
+        "vitesse": (alea.uniform(1.0, 2.5, nb_flocons), 'FLOAT'),
+        "amplitude": (alea.uniform(0.2, 1.0, nb_flocons), 'FLOAT'),
+        "pulsation": (alea.uniform(0.5, 2.0, nb_flocons), 'FLOAT'),
+        # Même distribution que particle_size=0.3 / size_random=0.6 de la version particules
+        "taille": (0.3 * (1.0 - 0.6 * alea.random(nb_flocons)), 'FLOAT'),
+    })
+    nuage = bpy.data.objects.new("Nuage_Emetteur", mesh)
+    bpy.context.collection.objects.link(nuage)
+    nuage.location = (ile_cible.location.x, ile_cible.location.y, ile_cible.location.z + hauteur_nuage)
+    nuage.parent = ile_cible
+    nuage.matrix_parent_inverse = ile_cible.matrix_world.inverted()
+
+    mod = nuage.modifiers.new(name="Neige_Analytique", type='NODES')
+    mod.node_group = arbre_neige_analytique("GN_Neige_Analytique", flocon, hauteur_nuage, nb_flocons_viewport)
+    return nuage
 
 
 
@@ -150,7 +289,35 @@ def creer_materiau_neige_pure():
 
 
 
-def ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur=0.5):
+def maillage_manteau(nom, rayon, epaisseur, nb_triangles, materiau, graine=None):
+    """
+    Construit directement le maillage final du manteau : disque en anneaux au budget de triangles voulu,
+    bosses de bruit calculées en NumPy (équivalent de la texture CLOUDS, échelle 3, profondeur 2, force 0.3)
+    et épaisseur intégrée. Aucun modificateur à réévaluer.
+
+    Returns:
+        bpy.types.Mesh: Le maillage.
+    """
+    xy, triangles, nb_bord = terrain.disque_triangule(rayon, nb_triangles)
+    graine_bruit = graines.graine_derivee(graine, "ringo", "manteau") % (2 ** 32)
+    z = 0.3 * bruit.fbm_2d(xy[:, 0], xy[:, 1], echelle=3.0, octaves=3, graine=graine_bruit)
+    co, faces = terrain.dalle_epaisse(xy, z, triangles, nb_bord, epaisseur)
+
+    tailles = np.concatenate([np.full(len(f), f.shape[1]) for f in faces])
+    nb_faces = len(tailles)
+    donnees = {
+        "co": co.astype(np.float32).ravel(),
+        "boucles": np.concatenate([f.ravel() for f in faces]).astype(np.int32),
+        "debuts": (np.cumsum(tailles) - tailles).astype(np.int32),
+        "tailles": tailles.astype(np.int32),
+        "materiau": np.zeros(nb_faces, dtype=np.int32),
+        "lisse": np.ones(nb_faces, dtype=bool),
+    }
+    return mesh_cache.construire_maillage(nom, donnees, materiaux=[materiau])
+
+
+def ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur=0.5, utiliser_cache=True, mode="champ_hauteur",
+                            triangles=8000, triangles_viewport=None, graine=None, niveau_subdivision=4):
     """
     Ajoute une géométrie de sol enneigée avec du relief sur l'île.
     
@@ -158,9 +325,16 @@ def ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur=0.5):
         ile_cible (bpy.types.Object): L'objet sur lequel poser la neige.
         hauteur_sol_z (float): Décalage vertical du sol.
         epaisseur (float): Épaisseur de la couche de neige générée.
+        utiliser_cache (bool): Relit le manteau déjà évalué (modificateurs appliqués) depuis le cache disque (mode "modificateurs").
+        mode (str): "champ_hauteur" (maillage final construit en NumPy, voir maillage_manteau)
+                    ou "modificateurs" (cercle + Subdivision + Displace + Solidify).
+        triangles (int): Budget de triangles de la face du dessus (mode "champ_hauteur").
+        triangles_viewport (int): Si donné, un second manteau plus léger est affiché dans le viewport et le
+                                  manteau complet n'apparaît qu'au rendu.
+        graine (int): Graine de construction du bruit (voir graines.py).
+        niveau_subdivision (int): Subdivision du cercle (mode "modificateurs").
     """
     print(f"Ajout du manteau neigeux au sol (épaisseur : {epaisseur}m)...")
-    bpy.ops.object.select_all(action='DESELECT')
 
     # Rayon légèrement réduit pour éviter les artefacts sur les bords de l'île
     rayon_ile = ile_cible.dimensions.x / 2.0
@@ -168,42 +342,73 @@ def ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur=0.5):
 
     # Placement du disque de neige juste au-dessus du sol
     cz = ile_cible.location.z + hauteur_sol_z + 0.1
-    bpy.ops.mesh.primitive_circle_add(
-        vertices=128, 
-        radius=rayon_neige, 
-        fill_type='NGON',
-        location=(ile_cible.location.x, ile_cible.location.y, cz)
-    )
-    neige = bpy.context.active_object
-    neige.name = "Manteau_Neigeux_Sol"
-
-    # Ajout d'une subdivision pour permettre la déformation (relief)
-    mod_sub = neige.modifiers.new(name="Subdivision_Neige", type='SUBSURF')
-    mod_sub.levels = 4
-    mod_sub.render_levels = 4
-
-    # Création d'une texture procédurale pour générer des bosses
-    tex_neige = bpy.data.textures.new("Tex_Neige_Relief", type='CLOUDS')
-    tex_neige.noise_scale = 3.0  
-    tex_neige.noise_depth = 2
-
-    # Application de la déformation par texture
-    mod_disp = neige.modifiers.new(name="Deformation_Neige", type='DISPLACE')
-    mod_disp.texture = tex_neige
-    mod_disp.strength = 0.3 
-    mod_disp.mid_level = 0.0
-
-    # Transformation du disque plat en volume 3D
-    mod_solid = neige.modifiers.new(name="Epaisseur_Neige", type='SOLIDIFY')
-    mod_solid.thickness = epaisseur 
-    mod_solid.offset = 1.0 
-
-    # Lissage visuel
-    bpy.ops.object.shade_smooth()
-
-    # Assignation du matériau de neige
     mat_neige_pure = creer_materiau_neige_pure()
-    neige.data.materials.append(mat_neige_pure)
+
+    if mode == "champ_hauteur":
+        neige = bpy.data.objects.new("Manteau_Neigeux_Sol", maillage_manteau("Manteau_Neigeux_Sol", rayon_neige, epaisseur, triangles, mat_neige_pure, graine))
+        bpy.context.collection.objects.link(neige)
+        neige.location = (ile_cible.location.x, ile_cible.location.y, cz)
+
+        if triangles_viewport:
+            apercu = bpy.data.objects.new("Manteau_Neigeux_Viewport", maillage_manteau("Manteau_Neigeux_Viewport", rayon_neige, epaisseur, triangles_viewport, mat_neige_pure, graine))
+            bpy.context.collection.objects.link(apercu)
+            apercu.location = neige.location
+            apercu.hide_render = True
+            neige.hide_viewport = True
+            apercu.parent = ile_cible
+            apercu.matrix_parent_inverse = ile_cible.matrix_world.inverted()
+
+        neige.parent = ile_cible
+        neige.matrix_parent_inverse = ile_cible.matrix_world.inverted()
+        return neige
+
+    cle = mesh_cache.cle_cache("manteau", {"rayon": rayon_neige, "epaisseur": epaisseur, "niveau_subdivision": niveau_subdivision},
+                               ajouter_manteau_neigeux)
+    en_cache = mesh_cache.charger(cle, "Manteau_Neigeux_Sol", materiaux=[mat_neige_pure]) if utiliser_cache else None
+
+    if en_cache:
+        # Le maillage en cache contient déjà la subdivision, le relief et l'épaisseur
+        neige = bpy.data.objects.new("Manteau_Neigeux_Sol", en_cache[0])
+        bpy.context.collection.objects.link(neige)
+        neige.location = (ile_cible.location.x, ile_cible.location.y, cz)
+    else:
+        neige = primitives.cercle(
+            "Manteau_Neigeux_Sol",
+            rayon=rayon_neige,
+            sommets=128,
+            remplissage='NGON',
+            location=(ile_cible.location.x, ile_cible.location.y, cz)
+        )
+
+        # Ajout d'une subdivision pour permettre la déformation (relief)
+        mod_sub = neige.modifiers.new(name="Subdivision_Neige", type='SUBSURF')
+        mod_sub.levels = niveau_subdivision
+        mod_sub.render_levels = niveau_subdivision
+
+        # Création d'une texture procédurale pour générer des bosses
+        tex_neige, _ = donnees.texture("Tex_Neige_Relief", 'CLOUDS', {"noise_scale": 3.0, "noise_depth": 2})
+        tex_neige.noise_scale = 3.0  
+        tex_neige.noise_depth = 2
+
+        # Application de la déformation par texture
+        mod_disp = neige.modifiers.new(name="Deformation_Neige", type='DISPLACE')
+        mod_disp.texture = tex_neige
+        mod_disp.strength = 0.3 
+        mod_disp.mid_level = 0.0
+
+        # Transformation du disque plat en volume 3D
+        mod_solid = neige.modifiers.new(name="Epaisseur_Neige", type='SOLIDIFY')
+        mod_solid.thickness = epaisseur 
+        mod_solid.offset = 1.0 
+
+        # Lissage visuel
+        primitives.lisser(neige)
+
+        # Assignation du matériau de neige
+        neige.data.materials.append(mat_neige_pure)
+
+        if utiliser_cache:
+            mesh_cache.sauver(cle, neige, evalue=True)
 
     # Liaison à l'île pour la hiérarchie
     neige.parent = ile_cible
@@ -213,6 +418,29 @@ def ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur=0.5):
 
 
 
+def cout_manteau(mode="champ_hauteur", triangles=8000, niveau_subdivision=4):
+    """Triangles du manteau : dessus et dessous du disque + bord (champ_hauteur), ou cercle subdivisé et solidifié"""
+    if mode == "champ_hauteur":
+        # disque_triangule arrondit au nombre d'anneaux K : 6K² triangles par face, 6K sommets de bord
+        k = max(1, int(round(math.sqrt(triangles / 6.0))))
+        return 12 * k * k + 12 * k
+    dessus = budget.cout_subdivision(ngones=(128,), niveaux=niveau_subdivision)
+    return 2 * dessus + 2 * 128 * 2 ** niveau_subdivision
+
+
+def declarer_budget(region="Ringo", mode="champ_hauteur"):
+    """Déclare le manteau neigeux au budget de polygones (les objets du cimetière sont des copies liées)"""
+    if mode == "champ_hauteur":
+        candidats = [{"triangles": 6 * k * k} for k in range(4, 600)]
+        nominal = {"triangles": 8000}
+    else:
+        candidats = [{"mode": mode, "niveau_subdivision": n} for n in range(7)]
+        nominal = {"mode": mode, "niveau_subdivision": 4}
+    budget.declarer("manteau", region, nominal, cout_manteau,
+                    lambda tri: budget.choisir(candidats, cout_manteau, tri), objets=("Manteau_Neigeux_Sol",))
+
+
+
 def creer_materiaux_cimetiere():
     """
     Initialise les matériaux de base pour les éléments du cimetière.
@@ -265,43 +493,41 @@ def creer_tombe_maitre(mat_pierre, mat_metal, mat_neige, epaisseur_neige):
     """
     Génère le modèle de référence d'une tombe avec une épée plantée et de la neige.
     """
-    bpy.ops.object.select_all(action='DESELECT')
     elements = []
 
     # Construction de la stèle
-    bpy.ops.mesh.primitive_cube_add(scale=(0.6, 0.2, 0.8), location=(0, 0, 0.8))
-    stele = bpy.context.active_object
+    stele = primitives.cube("Cube", echelle=(0.6, 0.2, 0.8), location=(0, 0, 0.8))
     stele.data.materials.append(mat_pierre)
+    primitives.appliquer_transformations(stele, rotation=False)
     elements.append(stele)
 
     # Ajout d'une couche de neige géométrique sur le dessus
     if epaisseur_neige > 0:
-        bpy.ops.mesh.primitive_cube_add(scale=(0.62, 0.22, epaisseur_neige), location=(0, 0, 1.6 + (epaisseur_neige/2)))
-        neige_stele = bpy.context.active_object
+        neige_stele = primitives.cube("Cube", echelle=(0.62, 0.22, epaisseur_neige), location=(0, 0, 1.6 + (epaisseur_neige/2)))
         neige_stele.data.materials.append(mat_neige)
+        primitives.appliquer_transformations(neige_stele, rotation=False)
         elements.append(neige_stele)
 
     # Construction de l'épée (lame, garde, manche)
-    bpy.ops.mesh.primitive_cube_add(scale=(0.05, 0.02, 0.7), location=(0, 0.3, 0.7))
-    elements.append(bpy.context.active_object)
-    bpy.context.active_object.data.materials.append(mat_metal)
+    lame = primitives.cube("Cube", echelle=(0.05, 0.02, 0.7), location=(0, 0.3, 0.7))
+    lame.data.materials.append(mat_metal)
+    primitives.appliquer_transformations(lame, rotation=False)
+    elements.append(lame)
 
-    bpy.ops.mesh.primitive_cube_add(scale=(0.25, 0.04, 0.02), location=(0, 0.3, 1.4))
-    elements.append(bpy.context.active_object)
-    bpy.context.active_object.data.materials.append(mat_metal)
+    garde = primitives.cube("Cube", echelle=(0.25, 0.04, 0.02), location=(0, 0.3, 1.4))
+    garde.data.materials.append(mat_metal)
+    primitives.appliquer_transformations(garde, rotation=False)
+    elements.append(garde)
 
-    bpy.ops.mesh.primitive_cylinder_add(radius=0.04, depth=0.3, location=(0, 0.3, 1.55))
-    manche = bpy.context.active_object
+    manche = primitives.cylindre("Cylinder", rayon=0.04, profondeur=0.3, location=(0, 0.3, 1.55))
     manche.data.materials.append(mat_pierre) 
     elements.append(manche)
 
     # Fusion des éléments en un seul objet
-    for obj in elements: obj.select_set(True)
-    bpy.context.view_layer.objects.active = stele
-    bpy.ops.object.join()
+    primitives.joindre(elements)
 
     # Configuration du point d'origine au sol et masquage de l'original
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    primitives.definir_origine(stele)
     stele.hide_viewport = True
     stele.hide_render = True
     return stele
@@ -312,30 +538,25 @@ def creer_rocher_maitre(mat_pierre, mat_neige, epaisseur_neige):
     """
     Génère le modèle de référence d'un rocher enneigé.
     """
-    bpy.ops.object.select_all(action='DESELECT')
     elements = []
     
-    bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=2, radius=1.0, location=(0, 0, 0.5))
-    rocher = bpy.context.active_object
+    rocher = primitives.ico_sphere("Icosphere", rayon=1.0, subdivisions=2, location=(0, 0, 0.5))
     rocher.data.materials.append(mat_pierre)
     rocher.scale = (1.5, 1.2, 0.8)
-    bpy.ops.object.transform_apply(scale=True)
+    primitives.appliquer_transformations(rocher, rotation=False)
     elements.append(rocher)
     
     # Ajout d'une calotte neigeuse
     if epaisseur_neige > 0:
-        bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=2, radius=1.0, location=(0, 0, 1.1 + (epaisseur_neige/2)))
-        neige_roc = bpy.context.active_object
+        neige_roc = primitives.ico_sphere("Icosphere", rayon=1.0, subdivisions=2, location=(0, 0, 1.1 + (epaisseur_neige/2)))
         neige_roc.data.materials.append(mat_neige)
         neige_roc.scale = (1.4, 1.1, epaisseur_neige)
-        bpy.ops.object.transform_apply(scale=True)
+        primitives.appliquer_transformations(neige_roc, rotation=False)
         elements.append(neige_roc)
 
-    for obj in elements: obj.select_set(True)
-    bpy.context.view_layer.objects.active = rocher
-    bpy.ops.object.join()
+    primitives.joindre(elements)
 
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    primitives.definir_origine(rocher)
     rocher.hide_viewport = True
     rocher.hide_render = True
     return rocher
@@ -345,40 +566,45 @@ def creer_arbre_maitre(mat_bois, mat_feuilles, mat_neige, epaisseur_neige):
     """
     Génère le modèle de référence d'un sapin enneigé.
     """
-    bpy.ops.object.select_all(action='DESELECT')
     elements = []
 
-    bpy.ops.mesh.primitive_cylinder_add(radius=0.3, depth=3.0, location=(0, 0, 1.5))
-    tronc = bpy.context.active_object
+    tronc = primitives.cylindre("Cylinder", rayon=0.3, profondeur=3.0, location=(0, 0, 1.5))
     tronc.data.materials.append(mat_bois)
     elements.append(tronc)
 
-    bpy.ops.mesh.primitive_cone_add(vertices=8, radius1=1.5, depth=4.0, location=(0, 0, 4.0))
-    feuillage = bpy.context.active_object
+    feuillage = primitives.cone("Cone", sommets=8, rayon1=1.5, profondeur=4.0, location=(0, 0, 4.0))
     feuillage.data.materials.append(mat_feuilles)
     elements.append(feuillage)
 
     # Ajout d'une couche de neige épousant la forme du cône
     if epaisseur_neige > 0:
-        bpy.ops.mesh.primitive_cone_add(vertices=8, radius1=1.52, depth=4.0, location=(0, 0, 4.0 + epaisseur_neige))
-        neige_arbre = bpy.context.active_object
+        neige_arbre = primitives.cone("Cone", sommets=8, rayon1=1.52, profondeur=4.0, location=(0, 0, 4.0 + epaisseur_neige))
         neige_arbre.data.materials.append(mat_neige)
         elements.append(neige_arbre)
 
-    for obj in elements: obj.select_set(True)
-    bpy.context.view_layer.objects.active = tronc
-    bpy.ops.object.join()
+    primitives.joindre(elements)
 
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    primitives.definir_origine(tronc)
     tronc.hide_viewport = True
     tronc.hide_render = True
     return tronc
 
 
-def construire(ile_cible, nb_tombes=150, nb_rochers=30, nb_arbres=40, ratio_vide_centre=0.3, marge_bordure_pct=0.1, hauteur_sol_z=0.0, variation_echelle=(0.7, 1.3), inclinaison_max_deg=15.0, epaisseur_neige_objets=0.4):
+def construire(ile_cible, nb_tombes=150, nb_rochers=30, nb_arbres=40, ratio_vide_centre=0.3, marge_bordure_pct=0.1, hauteur_sol_z=0.0, variation_echelle=(0.7, 1.3), inclinaison_max_deg=15.0, epaisseur_neige_objets=0.4, mode_placement="lots", graine=None, mode_neige="analytique", frames_particules=None, reglages_manteau=None, suivre_sol=True, accrochage="grille", pente_max_deg=sol.PENTE_MAX_DEG):
     """
     Point d'entrée principal pour la génération procédurale du cimetière.
     Gère le placement aléatoire, les collisions et l'instanciation des objets.
+
+    mode_placement : "lots" (candidats et transformations tirés par tableaux NumPy, voir spatial.disperser_anneau)
+                     ou "sequentiel" (un tirage aléatoire à la fois, 50 essais par objet).
+    graine : graine de construction ; arbres, rochers et tombes tirent dans leurs propres flux (voir graines.py).
+    mode_neige : "analytique" (formule Geometry Nodes, voir creer_neige_analytique) ou "particules" (simulation Newton).
+    frames_particules : (début, fin) pour cuire la neige "particules" sur disque et la relire au lieu de la simuler.
+    reglages_manteau : résolution du manteau neigeux (voir declarer_budget).
+    suivre_sol : pose les objets sur le relief de l'île (champ de hauteur, voir sol.py) et penche tombes et rochers
+                 selon la pente ; False : tous à la hauteur cz.
+    accrochage : "grille" (champ de hauteur interpolé) ou "bvh" (lancer de rayons exact sur l'île, en un lot par
+                 famille d'objets ; les placements sur une pente de plus de pente_max_deg sont abandonnés).
     """
     if not ile_cible:
         return
@@ -387,10 +613,20 @@ def construire(ile_cible, nb_tombes=150, nb_rochers=30, nb_arbres=40, ratio_vide
     mat_pierre, mat_metal, mat_bois, mat_feuilles = creer_materiaux_cimetiere()
     mat_neige_cap = creer_materiau_neige_pure()
 
-    # Création des gabarits
-    tombe_master = creer_tombe_maitre(mat_pierre, mat_metal, mat_neige_cap, epaisseur_neige_objets)
-    rocher_master = creer_rocher_maitre(mat_pierre, mat_neige_cap, epaisseur_neige_objets)
-    arbre_master = creer_arbre_maitre(mat_bois, mat_feuilles, mat_neige_cap, epaisseur_neige_objets)
+    # Création des gabarits (une seule fois par épaisseur de neige et jeu de matériaux, voir gabarits.py)
+    params_gabarits = {"epaisseur_neige": epaisseur_neige_objets,
+                       "materiaux": [m.name for m in (mat_pierre, mat_metal, mat_bois, mat_feuilles, mat_neige_cap)]}
+    # (le code des constructeurs et de leurs helpers fait partie de la clé : le modifier reconstruit le gabarit)
+    outils_gabarits = (primitives.appliquer_transformations, primitives.joindre, primitives.definir_origine)
+    tombe_master = gabarits.get_or_build("Tombe_Master", params_gabarits, creer_tombe_maitre,
+                                         mat_pierre, mat_metal, mat_neige_cap, epaisseur_neige_objets,
+                                         dependances=outils_gabarits)
+    rocher_master = gabarits.get_or_build("Rocher_Master", params_gabarits, creer_rocher_maitre,
+                                          mat_pierre, mat_neige_cap, epaisseur_neige_objets,
+                                          dependances=outils_gabarits)
+    arbre_master = gabarits.get_or_build("Arbre_Master", params_gabarits, creer_arbre_maitre,
+                                         mat_bois, mat_feuilles, mat_neige_cap, epaisseur_neige_objets,
+                                         dependances=outils_gabarits)
 
     # Calcul des zones de spawn
     rayon_ile = ile_cible.dimensions.x / 2.0
@@ -398,58 +634,182 @@ def construire(ile_cible, nb_tombes=150, nb_rochers=30, nb_arbres=40, ratio_vide
     rayon_max = rayon_ile * (1.0 - marge_bordure_pct) 
 
     cx, cy, cz = ile_cible.location.x, ile_cible.location.y, ile_cible.location.z + hauteur_sol_z
-    objets_places = []
-
-    def trouver_position_libre(rayon_collision, max_essais=50):
-        """Recherche une coordonnée (x,y) n'intersectant pas d'objet existant."""
+    # Index spatial des disques déjà occupés (conflit si distance < somme des rayons)
+    objets_places = spatial.GrilleOccupation(taille_cellule=2.0, regle="somme")
+    # Tours de tirage au plus par famille : les suivants remplacent les placements rejetés par le sol
+    TOURS_PLACEMENT = 5
+    # Sol de l'île : champ de hauteur (un seul calcul, puis des lectures en bloc) ou BVH (un lancer de rayons par lot)
+    champ_sol = sol.champ_hauteur(ile_cible) if suivre_sol and accrochage != "bvh" else None
+    # (l'arbre BVH est construit une fois : chaque tour de placement le réutilise sans relire le maillage)
+    arbre_sol = sol.arbre_bvh(ile_cible) if suivre_sol and accrochage == "bvh" else None
+
+    def sol_en(xs, ys):
+        """Hauteur, normale du sol et placements gardés sous des points (cz et None hors du sol ou sans suivre_sol)."""
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        gardes = np.ones(len(xs), dtype=bool)
+        if suivre_sol and accrochage == "bvh":
+            resultat = sol.accrocher(ile_cible, xs, ys, pente_max_deg=pente_max_deg, arbre=arbre_sol)
+            return np.where(np.isnan(resultat["z"]), cz, resultat["z"]), resultat["normales"], ~resultat["rejet"]
+        if champ_sol is None:
+            return np.full(len(xs), cz), None, gardes
+        zs = sol.hauteur_en(champ_sol, xs, ys)
+        return np.where(np.isnan(zs), cz, zs), sol.normale_en(champ_sol, xs, ys), gardes
+
+    def trouver_position_libre(grille, rayon_collision, alea=random, max_essais=50):
+        """Recherche une coordonnée (x,y) n'intersectant aucun disque de la grille."""
         for _ in range(max_essais):
-            angle = random.uniform(0, 2 * math.pi)
-            r = math.sqrt(random.uniform(rayon_min**2, rayon_max**2))
+            angle = alea.uniform(0, 2 * math.pi)
+            r = math.sqrt(alea.uniform(rayon_min**2, rayon_max**2))
             px = cx + r * math.cos(angle)
             py = cy + r * math.sin(angle)
-            collision = False
-            for ox, oy, orayon in objets_places:
-                if math.hypot(px - ox, py - oy) < (rayon_collision + orayon):
-                    collision = True
-                    break 
-            if not collision: return px, py 
+            if grille.est_libre(px, py, rayon_collision): return px, py 
         return None 
 
-    def placer_elements(master_obj, quantite, nom_base, rayon_collision, pencher=True, echelle_base=1.0):
+    def placer_elements(master_obj, quantite, nom_base, rayon_collision, pencher=True, echelle_base=1.0, alea=random):
         """Instancie et transforme les objets sur l'île."""
-        for i in range(quantite):
-            pos = trouver_position_libre(rayon_collision)
-            if not pos: continue 
-            
-            px, py = pos
-            objets_places.append((px, py, rayon_collision))
-            
+        # 1. Tirages contre une copie de l'index, posés sur le sol en une passe par tour : seuls les placements
+        #    gardés occupent objets_places, et les places rejetées (pente, eau, rayon manqué) sont retirées au tour suivant
+        tirages, z_sol, normales = [], [], []
+        for _ in range(TOURS_PLACEMENT):
+            essai = objets_places.copier()
+            lot = []
+            for _ in range(quantite - len(tirages)):
+                pos = trouver_position_libre(essai, rayon_collision, alea)
+                if not pos: continue 
+
+                px, py = pos
+                essai.ajouter(px, py, rayon_collision)
+                enfoncement = alea.uniform(0.0, 0.4)
+                lacet = alea.uniform(0, 2 * math.pi)
+                inclinaison = None
+                if pencher:
+                    inclinaison = (math.radians(alea.uniform(-inclinaison_max_deg, inclinaison_max_deg)),
+                                   math.radians(alea.uniform(-inclinaison_max_deg, inclinaison_max_deg)))
+                s = alea.uniform(variation_echelle[0], variation_echelle[1]) * echelle_base
+                lot.append((px, py, enfoncement, lacet, inclinaison, s))
+            if not lot:
+                break
+
+            z_lot, normales_lot, gardes = sol_en([t[0] for t in lot], [t[1] for t in lot])
+            for i, tirage in enumerate(lot):
+                if not gardes[i]: continue
+                objets_places.ajouter(tirage[0], tirage[1], rayon_collision)
+                tirages.append(tirage)
+                z_sol.append(float(z_lot[i]))
+                normales.append(normales_lot[i] if normales_lot is not None else None)
+            # Aucun rejet : le manque éventuel vient d'un anneau saturé, un nouveau tour n'y changerait rien
+            if len(tirages) >= quantite or gardes.all():
+                break
+
+        for i, (px, py, enfoncement, lacet, inclinaison, s) in enumerate(tirages):
             # Copie de l'objet maître
-            n_obj = master_obj.copy()
+            n_obj = gabarits.copier(master_obj)
             n_obj.data = master_obj.data 
             bpy.context.collection.objects.link(n_obj)
             
             # Transformation aléatoire (Position, Rotation, Échelle)
-            n_obj.location = (px, py, cz - random.uniform(0.0, 0.4))
-            n_obj.rotation_euler[2] = random.uniform(0, 2 * math.pi)
-            if pencher:
-                n_obj.rotation_euler[0] = math.radians(random.uniform(-inclinaison_max_deg, inclinaison_max_deg))
-                n_obj.rotation_euler[1] = math.radians(random.uniform(-inclinaison_max_deg, inclinaison_max_deg))
+            n_obj.location = (px, py, z_sol[i] - enfoncement)
+            n_obj.rotation_euler[2] = lacet
+            if inclinaison is not None:
+                n_obj.rotation_euler[0], n_obj.rotation_euler[1] = inclinaison
+                if normales[i] is not None:
+                    n_obj.rotation_euler = sol.incliner(n_obj.rotation_euler, normales[i])
             
-            s = random.uniform(variation_echelle[0], variation_echelle[1]) * echelle_base
             n_obj.scale = (s, s, s)
             n_obj.hide_viewport = n_obj.hide_render = False
             n_obj.parent = ile_cible
             n_obj.matrix_parent_inverse = ile_cible.matrix_world.inverted()
 
-    # Exécution du placement
-    placer_elements(arbre_master, nb_arbres, "Arbre", 2.0, False, 1.5)
-    placer_elements(rocher_master, nb_rochers, "Rocher", 1.5, True, 1.0)
-    placer_elements(tombe_master, nb_tombes, "Tombe", 0.8, True, 1.0)
+        if len(tirages) < quantite:
+            print(f"⚠️ {nom_base} : {len(tirages)}/{quantite} placés (anneau saturé ou pentes rejetées)")
+
+    def tirer_transformations(quantite, rayon_collision, pencher, echelle_base, alea):
+        """
+        Tire par tableaux NumPy les positions libres et les transformations d'un type d'objet.
+
+        Chaque tour disperse les places manquantes dans une copie de l'index, les pose sur le sol en une passe,
+        puis n'enregistre dans objets_places que les placements gardés : un rejet ne bloque plus de place
+        et il est remplacé au tour suivant.
+        """
+        lots = []
+        places = 0
+        for _ in range(TOURS_PLACEMENT):
+            xs, ys = spatial.disperser_anneau(objets_places.copier(), quantite - places, rayon_collision,
+                                              rayon_min, rayon_max, centre=(cx, cy), alea=alea)
+            n = len(xs)
+            if n == 0:
+                break
+            z_sol, normales, gardes = sol_en(xs, ys)
+            zs = z_sol - alea.uniform(0.0, 0.4, n)
+            lacets = alea.uniform(0, 2 * math.pi, n)
+            if pencher:
+                inclinaisons = np.radians(alea.uniform(-inclinaison_max_deg, inclinaison_max_deg, (n, 2)))[gardes]
+                normales = normales[gardes] if normales is not None else None
+            else:
+                inclinaisons = normales = None
+            echelles = alea.uniform(variation_echelle[0], variation_echelle[1], n) * echelle_base
+
+            for x, y in zip(xs[gardes].tolist(), ys[gardes].tolist()):
+                objets_places.ajouter(x, y, rayon_collision)
+            lots.append((np.column_stack((xs, ys, zs))[gardes], lacets[gardes], inclinaisons, echelles[gardes], normales))
+            places += int(gardes.sum())
+            # Aucun rejet : le manque éventuel vient d'un anneau saturé, un nouveau tour n'y changerait rien
+            if places >= quantite or gardes.all():
+                break
+
+        if not lots:
+            return np.empty((0, 3)), np.empty(0), None, np.empty(0), None
+        return tuple(None if colonne[0] is None else np.concatenate(colonne) for colonne in zip(*lots))
+
+    def placer_lot(master_obj, quantite, nom_base, rayon_collision, pencher=True, echelle_base=1.0, alea=None):
+        """Crée les objets à partir des transformations tirées en lot : bpy ne fait plus que les écrire."""
+        alea = alea if alea is not None else np.random.default_rng()
+        positions, lacets, inclinaisons, echelles, normales = tirer_transformations(quantite, rayon_collision, pencher,
+                                                                                    echelle_base, alea)
+        collection = bpy.context.collection
+        inverse_parent = ile_cible.matrix_world.inverted()
+
+        for i, (position, lacet, s) in enumerate(zip(positions.tolist(), lacets.tolist(), echelles.tolist())):
+            n_obj = gabarits.copier(master_obj)
+            n_obj.data = master_obj.data
+            collection.objects.link(n_obj)
+
+            n_obj.location = position
+            n_obj.rotation_euler[2] = lacet
+            if inclinaisons is not None:
+                n_obj.rotation_euler[0], n_obj.rotation_euler[1] = inclinaisons[i]
+            if normales is not None:
+                n_obj.rotation_euler = sol.incliner(n_obj.rotation_euler, normales[i])
+            n_obj.scale = (s, s, s)
+            n_obj.hide_viewport = n_obj.hide_render = False
+            n_obj.parent = ile_cible
+            n_obj.matrix_parent_inverse = inverse_parent
+
+        if len(positions) < quantite:
+            print(f"⚠️ {nom_base} : {len(positions)}/{quantite} placés (anneau saturé ou pentes rejetées)")
+
+    # Exécution du placement (un flux aléatoire par famille d'objets)
+    for master_obj, quantite, nom_base, rayon_collision, pencher, echelle_base in (
+        (arbre_master, nb_arbres, "Arbre", 2.0, False, 1.5),
+        (rocher_master, nb_rochers, "Rocher", 1.5, True, 1.0),
+        (tombe_master, nb_tombes, "Tombe", 0.8, True, 1.0),
+    ):
+        if mode_placement == "lots":
+            alea = graines.flux_numpy(graine, "ringo", ile_cible.name, nom_base)
+            placer_lot(master_obj, quantite, nom_base, rayon_collision, pencher, echelle_base, alea)
+        else:
+            alea = graines.flux(graine, "ringo", ile_cible.name, nom_base)
+            placer_elements(master_obj, quantite, nom_base, rayon_collision, pencher, echelle_base, alea)
 
     # Finalisation environnementale
-    ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur_neige_objets)
-    creer_tempete_neige(ile_cible, rayon_ile * 0.95)
+    ajouter_manteau_neigeux(ile_cible, hauteur_sol_z, epaisseur_neige_objets, triangles_viewport=2000, graine=graine,
+                            **(reglages_manteau or {}))
+    if mode_neige == "analytique":
+        creer_neige_analytique(ile_cible, rayon_ile * 0.95, graine=graine)
+    else:
+        nuage = creer_tempete_neige(ile_cible, rayon_ile * 0.95, graine=graine)
+        if frames_particules:
+            cache_particules.cuire_et_relire(nuage, (), *frames_particules)
 
 
 
@@ -459,9 +819,9 @@ if __name__ == "__main__":
     bpy.ops.object.delete()
 
     # Création de la base de l'île
-    bpy.ops.mesh.primitive_cylinder_add(radius=50.0, depth=10.0, location=(0, 0, 5.0))
-    ile = bpy.context.active_object
-    ile.name = "Ringo_Base"
+    ile = primitives.cylindre("Ringo_Base", rayon=50.0, profondeur=10.0, location=(0, 0, 5.0))
+    # dimensions et matrix_world ne sont à jour qu'après une évaluation de la scène
+    bpy.context.view_layer.update()
 
     # Lancement du générateur
     construire(ile_cible=ile, hauteur_sol_z=5.0)
@@ -0,0 +1,210 @@
+import numpy as np
+
+
+
+# ==========================================
+#  BRUIT DE PERLIN VECTORISÉ
+# ==========================================
+#
+# Bruit évalué en NumPy sur des tableaux de points, sans bpy : on peut calculer le relief d'un maillage
+# avant même de le créer (et dans un autre processus). fbm_2d() joue le rôle des textures "CLOUDS" de
+# Blender : valeurs dans [0, 1], noise_scale -> echelle, noise_depth -> octaves - 1.
+
+
+
+_GRADIENTS = np.array([(1, 1), (-1, 1), (1, -1), (-1, -1), (1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.float64)
+
+
+def _permutation(graine):
+    perm = np.random.default_rng(graine).permutation(256)
+    return np.concatenate([perm, perm])
+
+
+def _lisser(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def perlin_2d(x, y, graine=0):
+    """
+    Bruit de gradient de Perlin 2D.
+
+    Args:
+        x, y (np.ndarray): Coordonnées des points.
+        graine (int): Graine de la table de permutation.
+
+    Returns:
+        np.ndarray: Valeurs dans [-1, 1] environ, nulles aux points entiers.
+    """
+    perm = _permutation(graine)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx, fy = x - x0, y - y0
+    ix = x0.astype(np.int64) & 255
+    iy = y0.astype(np.int64) & 255
+
+    def coin(dx, dy):
+        g = _GRADIENTS[perm[perm[ix + dx] + iy + dy] & 7]
+        return g[..., 0] * (fx - dx) + g[..., 1] * (fy - dy)
+
+    u, v = _lisser(fx), _lisser(fy)
+    bas = coin(0, 0) + u * (coin(1, 0) - coin(0, 0))
+    haut = coin(0, 1) + u * (coin(1, 1) - coin(0, 1))
+    return bas + v * (haut - bas)
+
+
+def fbm_2d(x, y, echelle=1.0, octaves=3, persistance=0.5, lacunarite=2.0, graine=0):
+    """
+    Somme d'octaves de bruit de Perlin ("nuages"), ramenée dans [0, 1].
+
+    Args:
+        x, y (np.ndarray): Coordonnées des points.
+        echelle (float): Taille des plus grosses bosses (comme noise_scale).
+        octaves (int): Nombre d'octaves (noise_depth + 1).
+        persistance (float): Atténuation de l'amplitude d'une octave à la suivante.
+        lacunarite (float): Multiplication de la fréquence d'une octave à la suivante.
+        graine (int): Graine ; chaque octave utilise une table décalée.
+
+    Returns:
+        np.ndarray: Valeurs dans [0, 1].
+    """
+    x = np.asarray(x, dtype=np.float64) / echelle
+    y = np.asarray(y, dtype=np.float64) / echelle
+    total = np.zeros(np.broadcast(x, y).shape)
+    amplitude, frequence, norme = 1.0, 1.0, 0.0
+    for octave in range(octaves):
+        total += amplitude * perlin_2d(x * frequence, y * frequence, graine + octave)
+        norme += amplitude
+        amplitude *= persistance
+        frequence *= lacunarite
+    # Le bruit de Perlin 2D reste dans [-0.71, 0.71] : on étale sur [0, 1]
+    return np.clip(0.5 + total / norme / 1.42, 0.0, 1.0)
+
+
+_GRADIENTS_3D = np.array([(1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0),
+                          (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1),
+                          (0, 1, 1), (0, -1, 1), (0, 1, -1), (0, -1, -1),
+                          (1, 1, 0), (-1, 1, 0), (0, -1, 1), (0, -1, -1)], dtype=np.float64)
+
+
+def perlin_3d(x, y, z, graine=0):
+    """
+    Bruit de gradient de Perlin 3D (même construction que perlin_2d, 16 gradients sur les arêtes du cube).
+
+    Returns:
+        np.ndarray: Valeurs dans [-1, 1] environ, nulles aux points entiers.
+    """
+    perm = _permutation(graine)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+
+    x0, y0, z0 = np.floor(x), np.floor(y), np.floor(z)
+    fx, fy, fz = x - x0, y - y0, z - z0
+    ix = x0.astype(np.int64) & 255
+    iy = y0.astype(np.int64) & 255
+    iz = z0.astype(np.int64) & 255
+
+    def coin(dx, dy, dz):
+        g = _GRADIENTS_3D[perm[perm[perm[ix + dx] + iy + dy] + iz + dz] & 15]
+        return g[..., 0] * (fx - dx) + g[..., 1] * (fy - dy) + g[..., 2] * (fz - dz)
+
+    u, v, w = _lisser(fx), _lisser(fy), _lisser(fz)
+
+    def ligne(dy, dz):
+        a = coin(0, dy, dz)
+        return a + u * (coin(1, dy, dz) - a)
+
+    bas = ligne(0, 0) + v * (ligne(1, 0) - ligne(0, 0))
+    haut = ligne(0, 1) + v * (ligne(1, 1) - ligne(0, 1))
+    return bas + w * (haut - bas)
+
+
+def fbm_3d(x, y, z, echelle=1.0, octaves=3, persistance=0.5, lacunarite=2.0, graine=0):
+    """
+    Équivalent 3D de fbm_2d() : la texture "CLOUDS" évaluée en chaque point d'un volume ou d'un maillage.
+
+    Returns:
+        np.ndarray: Valeurs dans [0, 1].
+    """
+    x = np.asarray(x, dtype=np.float64) / echelle
+    y = np.asarray(y, dtype=np.float64) / echelle
+    z = np.asarray(z, dtype=np.float64) / echelle
+    total = np.zeros(np.broadcast(x, y, z).shape)
+    amplitude, frequence, norme = 1.0, 1.0, 0.0
+    for octave in range(octaves):
+        total += amplitude * perlin_3d(x * frequence, y * frequence, z * frequence, graine + octave)
+        norme += amplitude
+        amplitude *= persistance
+        frequence *= lacunarite
+    # Le bruit de Perlin 3D reste dans [-1, 1] : on étale sur [0, 1]
+    return np.clip(0.5 + total / norme / 2.0, 0.0, 1.0)
+
+
+
+def voronoi_3d(x, y, z, echelle=1.0, graine=0):
+    """
+    Bruit cellulaire ("VORONOI" de Blender, distance_metric 'DISTANCE', poids w1 = 1) : distance au point
+    caractéristique le plus proche (F1), un point tiré au hasard dans chaque cellule unité.
+
+    Args:
+        x, y, z (np.ndarray): Coordonnées des points.
+        echelle (float): Taille des cellules (comme noise_scale).
+        graine (int): Graine des points caractéristiques.
+
+    Returns:
+        np.ndarray: Distances F1, dans [0, ~1] (0 sur un point caractéristique).
+    """
+    perm = _permutation(graine)
+    decalages = np.random.default_rng(graine + 7919).random((256, 3))
+    x = np.asarray(x, dtype=np.float64) / echelle
+    y = np.asarray(y, dtype=np.float64) / echelle
+    z = np.asarray(z, dtype=np.float64) / echelle
+
+    x0, y0, z0 = np.floor(x), np.floor(y), np.floor(z)
+    fx, fy, fz = x - x0, y - y0, z - z0
+    ix = x0.astype(np.int64)
+    iy = y0.astype(np.int64)
+    iz = z0.astype(np.int64)
+
+    meilleur = np.full(np.broadcast(x, y, z).shape, np.inf)
+    # Les 27 cellules voisines : le point le plus proche est forcément dans l'une d'elles
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                h = perm[perm[perm[(ix + dx) & 255] + ((iy + dy) & 255)] + ((iz + dz) & 255)]
+                point = decalages[h]
+                d2 = (dx + point[..., 0] - fx) ** 2 + (dy + point[..., 1] - fy) ** 2 + (dz + point[..., 2] - fz) ** 2
+                np.minimum(meilleur, d2, out=meilleur)
+    return np.sqrt(meilleur)
+
+
+# ==========================================
+#  DÉPLACEMENT DE SOMMETS
+# ==========================================
+
+def deplacer_le_long_des_normales(co, normales, force, echelle=1.0, mid_level=0.5, octaves=3, graine=0):
+    """
+    Équivalent NumPy d'un modificateur Displace (direction NORMAL, coordonnées LOCAL) avec une texture "CLOUDS".
+
+    Chaque sommet avance de force * (nuages(co) - mid_level) le long de sa normale, comme dans Blender :
+    même force, même noise_scale (echelle), même mid_level ; noise_depth correspond à octaves - 1.
+
+    Args:
+        co (np.ndarray): Coordonnées locales des sommets (N, 3).
+        normales (np.ndarray): Normales des sommets (N, 3), unitaires.
+        force (float): strength du Displace.
+        echelle (float): noise_scale de la texture.
+        mid_level (float): Valeur de la texture qui ne déplace pas le sommet.
+        octaves (int): noise_depth + 1.
+        graine (int): Graine du bruit.
+
+    Returns:
+        np.ndarray: Nouvelles coordonnées (N, 3).
+    """
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    normales = np.asarray(normales, dtype=np.float64).reshape(-1, 3)
+    valeur = fbm_3d(co[:, 0], co[:, 1], co[:, 2], echelle=echelle, octaves=octaves, graine=graine)
+    return co + normales * (force * (valeur - mid_level))[:, None]
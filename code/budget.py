@@ -0,0 +1,213 @@
+import bpy
+
+from utils import bprint
+
+
+
+# ==========================================
+#  BUDGET DE POLYGONES
+# ==========================================
+#
+# Chaque générateur coûteux déclare un "poste" avant la construction :
+#   - ses réglages nominaux (ceux écrits en dur jusqu'ici : segments, niveaux de subdivision, ...)
+#   - cout(reglages)        -> triangles estimés au rendu
+#   - reglages_pour(tri)    -> les meilleurs réglages dont le coût tient dans tri triangles
+#   - les noms des objets produits (pour compter les triangles réels à la fin)
+#
+# repartir() cherche, région par région, un facteur s commun tel que la somme des
+# cout(reglages_pour(s * cout_nominal)) tienne dans le budget : chaque poste garde sa part
+# du coût nominal (les postes négligeables restent aux réglages nominaux).
+# Par défaut le budget est un plafond (s <= 1) ; remplir=True monte au-dessus des réglages
+# nominaux pour utiliser tout le budget.
+#
+# Sans appel à repartir(), reglages() renvoie les réglages nominaux : le build est inchangé.
+
+PROFILS = {
+    "apercu": 2_000_000,
+    "final": 30_000_000,
+}
+
+# Un poste qui coûte moins que cette part du budget garde ses réglages nominaux (le réduire ne gagne rien)
+PART_NEGLIGEABLE = 0.001
+
+_postes = {}
+_repartition = {"profil": None, "total": None, "regions": {}}
+
+
+
+# ==========================================
+#  MODÈLES DE COÛT COMMUNS
+# ==========================================
+
+def cout_subdivision(quads=0, triangles=0, ngones=(), niveaux=0):
+    """
+    Triangles d'un maillage après un Subdivision Surface (Catmull-Clark).
+
+    Au premier niveau un quad donne 4 quads, un triangle 3, un n-gone n ; chaque niveau suivant multiplie par 4.
+    Sans subdivision, un n-gone compte pour n - 2 triangles.
+    """
+    if niveaux <= 0:
+        return 2 * quads + triangles + sum(n - 2 for n in ngones)
+    return 2 * (4 * quads + 3 * triangles + sum(ngones)) * 4 ** (niveaux - 1)
+
+
+def cout_sphere_uv(segments, ring_count, niveaux=0):
+    """Triangles d'une primitive_uv_sphere_add (quads + deux éventails de triangles aux pôles)"""
+    return cout_subdivision(quads=segments * (ring_count - 2), triangles=2 * segments, niveaux=niveaux)
+
+
+def choisir(candidats, cout, triangles):
+    """
+    Parmi des réglages candidats, le plus coûteux qui tient dans le budget (le moins coûteux sinon).
+    À coût égal, le premier de la liste l'emporte.
+    """
+    couts = [cout(**c) for c in candidats]
+    dans_budget = [i for i, c in enumerate(couts) if c <= triangles]
+    if not dans_budget:
+        return dict(candidats[min(range(len(couts)), key=couts.__getitem__)])
+    return dict(candidats[max(dans_budget, key=lambda i: (couts[i], -i))])
+
+
+
+# ==========================================
+#  DÉCLARATION ET RÉPARTITION
+# ==========================================
+
+def reinitialiser():
+    _postes.clear()
+    _repartition.update({"profil": None, "total": None, "regions": {}})
+
+
+def declarer(nom, region, nominal, cout, reglages_pour, objets=()):
+    """
+    Déclare un poste de budget (un générateur et ses réglages de résolution).
+
+    Args:
+        nom (str): Identifiant du poste ("ile:Kuri", "crane", ...).
+        region (str): Région de l'archipel (pour les budgets par région).
+        nominal (dict): Réglages par défaut du générateur.
+        cout (callable): cout(**reglages) -> triangles estimés.
+        reglages_pour (callable): reglages_pour(triangles) -> réglages.
+        objets (tuple): Noms des objets produits, comptés par rapport_budget().
+    """
+    _postes[nom] = {
+        "region": region, "nominal": dict(nominal), "cout": cout, "reglages_pour": reglages_pour,
+        "objets": tuple(objets), "reglages": dict(nominal), "estime": cout(**nominal),
+    }
+
+
+def _facteur(postes, budget, remplir):
+    """Plus grand facteur s (dichotomie) tel que les réglages choisis pour s * nominal tiennent dans le budget"""
+    def total(s):
+        return sum(p["cout"](**p["reglages_pour"](s * p["cout"](**p["nominal"]))) for p in postes)
+
+    bas, haut = 1e-4, (64.0 if remplir else 1.0)
+    if total(haut) <= budget:
+        return haut
+    for _ in range(40):
+        milieu = (bas * haut) ** 0.5
+        if total(milieu) <= budget:
+            bas = milieu
+        else:
+            haut = milieu
+    return bas
+
+
+def repartir(profil="final", total=None, regions=None, remplir=False):
+    """
+    Répartit un budget de triangles entre les postes déclarés.
+
+    Args:
+        profil (str): Nom d'un budget de PROFILS (ignoré si total est donné).
+        total (int): Budget global en triangles.
+        regions (dict): Budgets propres à certaines régions {region: triangles}, retirés du global.
+        remplir (bool): Autorise des réglages plus fins que les nominaux pour atteindre le budget.
+
+    Returns:
+        dict: poste -> réglages retenus.
+    """
+    total = total if total is not None else PROFILS[profil]
+    regions = dict(regions or {})
+    _repartition.update({"profil": profil, "total": total, "regions": regions})
+
+    groupes = {r: [p for p in _postes.values() if p["region"] == r] for r in regions}
+    groupes[None] = [p for p in _postes.values() if p["region"] not in regions]
+    budgets = dict(regions)
+    budgets[None] = max(0, total - sum(regions.values()))
+
+    for region, postes in groupes.items():
+        negligeables = [p for p in postes if p["cout"](**p["nominal"]) < budgets[region] * PART_NEGLIGEABLE]
+        ajustables = [p for p in postes if p not in negligeables]
+        for p in negligeables:
+            p["reglages"], p["estime"] = dict(p["nominal"]), p["cout"](**p["nominal"])
+        if not ajustables:
+            continue
+
+        reste = budgets[region] - sum(p["estime"] for p in negligeables)
+        s = _facteur(ajustables, reste, remplir)
+        for p in ajustables:
+            # s = 1 : tout tient, on garde exactement les réglages nominaux
+            p["reglages"] = dict(p["nominal"]) if s == 1.0 else p["reglages_pour"](s * p["cout"](**p["nominal"]))
+            p["estime"] = p["cout"](**p["reglages"])
+
+    return {nom: p["reglages"] for nom, p in _postes.items()}
+
+
+def reglages(nom, defaut=None):
+    """Réglages retenus pour un poste (les nominaux sans répartition, defaut si le poste n'est pas déclaré)"""
+    poste = _postes.get(nom)
+    if poste is None:
+        return dict(defaut or {})
+    return dict(poste["reglages"])
+
+
+
+# ==========================================
+#  MESURE ET RAPPORT
+# ==========================================
+
+def triangles_objet(obj):
+    """
+    Triangles de l'objet évalué (modificateurs compris).
+
+    Le depsgraph évalue les Subdivision aux niveaux du viewport : si le rendu en demande plus,
+    le compte est extrapolé (x4 par niveau) et signalé.
+
+    Returns:
+        tuple: (triangles, extrapole)
+    """
+    obj_eval = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    mesh = obj_eval.to_mesh()
+    mesh.calc_loop_triangles()
+    nb = len(mesh.loop_triangles)
+    obj_eval.to_mesh_clear()
+
+    ecart = sum(max(0, m.render_levels - m.levels) for m in obj.modifiers if m.type == 'SUBSURF' and m.show_viewport)
+    return nb * 4 ** ecart, ecart > 0
+
+
+def rapport_budget():
+    """Affiche, poste par poste, les réglages retenus, l'estimation et le compte réel de triangles"""
+    total_estime, total_reel = 0, 0
+    entete = f"📐 Budget de polygones ({_repartition['profil'] or 'nominal'}"
+    if _repartition["total"] is not None:
+        entete += f", {_repartition['total']:,} triangles"
+    bprint(entete + ")")
+
+    for nom, p in _postes.items():
+        reel, extrapole = 0, False
+        for nom_objet in p["objets"]:
+            obj = bpy.data.objects.get(nom_objet)
+            if obj is not None and obj.type == 'MESH':
+                n, e = triangles_objet(obj)
+                reel += n
+                extrapole = extrapole or e
+        total_estime += p["estime"]
+        total_reel += reel
+        ecart = f"{(reel - p['estime']) / p['estime'] * 100:+.0f}%" if p["estime"] else "-"
+        reglages_txt = ", ".join(f"{k}={v}" for k, v in p["reglages"].items())
+        bprint(f"   {nom:<22} [{p['region']}] {reglages_txt} : estimé {p['estime']:,}, "
+               f"réel {'~' if extrapole else ''}{reel:,} ({ecart})")
+
+    bprint(f"   TOTAL : estimé {total_estime:,}, réel {total_reel:,}")
+    return total_estime, total_reel
@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import hashlib
+
+import numpy as np
+import bpy
+
+from utils import bprint
+import mesh_cache
+import instances
+
+
+
+# Les caches de particules vivent à côté des maillages en cache (même dossier ignoré par git)
+DOSSIER_PARTICULES = os.path.join(mesh_cache.DOSSIER_CACHE, "particules")
+
+# Propriété posée sur les porteurs relus depuis le cache (elle est sauvegardée avec le .blend)
+PROP_CLE = "cache_particules"
+
+# Caches déjà ouverts (clé -> (meta, positions, rotations, tailles)) : le handler de frame ne relit ni
+# meta.json ni les en-têtes .npy à chaque frame. Une clé désigne un contenu figé, elle reste donc valide.
+_ouverts = {}
+
+
+
+# ==========================================
+#  CLÉS
+# ==========================================
+
+def _parametres_rna(struct):
+    """Toutes les propriétés simples (nombres, booléens, énumérations, textes) d'un struct Blender"""
+    params = {}
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == "rna_type" or prop.type not in ('BOOLEAN', 'INT', 'FLOAT', 'ENUM', 'STRING'):
+            continue
+        valeur = getattr(struct, prop.identifier)
+        if prop.type == 'FLOAT' and getattr(prop, "array_length", 0):
+            valeur = [round(v, 6) for v in valeur]
+        elif prop.type == 'FLOAT':
+            valeur = round(valeur, 6)
+        elif prop.type == 'ENUM' and getattr(prop, "is_enum_flag", False):
+            valeur = sorted(valeur)
+        params[prop.identifier] = valeur
+    return params
+
+
+def _empreinte_maillage(mesh):
+    """Empreinte des coordonnées des sommets : change dès que l'émetteur est remodelé"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return hashlib.sha256(co.tobytes()).hexdigest()
+
+
+def cle_particules(emetteur, champs_force=(), debut=1, fin=250):
+    """
+    Clé du cache d'un émetteur : réglages des particules, graine du système, placement et sommets de l'émetteur,
+    réglages et placement des champs de force, plage de frames.
+    """
+    psys = emetteur.particle_systems[0]
+    params = {
+        "reglages": _parametres_rna(psys.settings),
+        "graine": psys.seed,
+        "matrice": [round(v, 5) for ligne in emetteur.matrix_world for v in ligne],
+        "maillage": _empreinte_maillage(emetteur.data),
+        "champs": [
+            {"reglages": _parametres_rna(champ.field),
+             "matrice": [round(v, 5) for ligne in champ.matrix_world for v in ligne]}
+            for champ in sorted(champs_force, key=lambda o: o.name)
+        ],
+        "frames": [debut, fin],
+    }
+    return mesh_cache.cle_cache("particules", params)
+
+
+def _chemins(cle):
+    dossier = os.path.join(DOSSIER_PARTICULES, cle)
+    return {nom: os.path.join(dossier, nom + ".npy") for nom in ("positions", "rotations", "tailles")}, dossier
+
+
+
+# ==========================================
+#  CUISSON
+# ==========================================
+
+def _quaternions_vers_euler(q):
+    """Quaternions (N, 4) wxyz -> angles d'Euler XYZ (N, 3), la convention de Blender"""
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    rx = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    ry = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+    rz = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return np.column_stack((rx, ry, rz))
+
+
+def cuire(emetteur, champs_force=(), debut=1, fin=250):
+    """
+    Simule une fois l'émetteur sur [debut, fin] et écrit ses particules frame par frame sur le disque.
+
+    Trois tableaux .npy (lisibles en mémoire mappée) :
+        positions (F, N, 3) float32 en coordonnées monde
+        rotations (F, N, 3) float16 en angles d'Euler
+        tailles   (F, N)    float16, 0 pour une particule pas encore née ou déjà morte
+
+    Returns:
+        str: La clé du cache (rien n'est recalculé si elle existe déjà).
+    """
+    cle = cle_particules(emetteur, champs_force, debut, fin)
+    chemins, dossier = _chemins(cle)
+    if os.path.exists(os.path.join(dossier, "meta.json")):
+        return cle
+
+    scene = bpy.context.scene
+    frame_origine = scene.frame_current
+    # Le nombre de particules se lit sur le système évalué à la première frame (celui de l'objet
+    # original n'est pas simulé et peut être vide)
+    scene.frame_set(debut)
+    nb = len(emetteur.evaluated_get(bpy.context.evaluated_depsgraph_get()).particle_systems[0].particles)
+    nb_frames = fin - debut + 1
+
+    os.makedirs(dossier, exist_ok=True)
+    positions = np.lib.format.open_memmap(chemins["positions"], mode="w+", dtype=np.float32, shape=(nb_frames, nb, 3))
+    rotations = np.lib.format.open_memmap(chemins["rotations"], mode="w+", dtype=np.float16, shape=(nb_frames, nb, 3))
+    tailles = np.lib.format.open_memmap(chemins["tailles"], mode="w+", dtype=np.float16, shape=(nb_frames, nb))
+
+    co = np.empty(nb * 3, dtype=np.float32)
+    quat = np.empty(nb * 4, dtype=np.float32)
+    taille = np.empty(nb, dtype=np.float32)
+    visible = np.empty(nb, dtype=bool)
+
+    debut_cuisson = time.perf_counter()
+    # La simulation doit avancer frame par frame depuis le début pour rester valide
+    for i, frame in enumerate(range(debut, fin + 1)):
+        scene.frame_set(frame)
+        psys = emetteur.evaluated_get(bpy.context.evaluated_depsgraph_get()).particle_systems[0]
+        psys.particles.foreach_get("location", co)
+        psys.particles.foreach_get("rotation", quat)
+        psys.particles.foreach_get("size", taille)
+        psys.particles.foreach_get("is_visible", visible)
+
+        positions[i] = co.reshape(nb, 3)
+        rotations[i] = _quaternions_vers_euler(quat.reshape(nb, 4))
+        tailles[i] = np.where(visible, taille, 0.0)
+
+    for tableau in (positions, rotations, tailles):
+        tableau.flush()
+    del positions, rotations, tailles
+
+    with open(os.path.join(dossier, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"debut": debut, "fin": fin, "particules": nb, "emetteur": emetteur.name}, f)
+
+    scene.frame_set(frame_origine)
+    bprint(f"🔥 Particules de '{emetteur.name}' cuites : {nb_frames} frames en {time.perf_counter() - debut_cuisson:.1f} s")
+    return cle
+
+
+
+# ==========================================
+#  LECTURE
+# ==========================================
+
+def ouvrir(cle):
+    """
+    Ouvre un cache en mémoire mappée : (meta, positions, rotations, tailles), rien n'est lu tout de suite.
+    Un cache n'est ouvert qu'une fois par session, les appels suivants réutilisent les mêmes tableaux.
+    """
+    ouvert = _ouverts.get(cle)
+    if ouvert is None:
+        chemins, dossier = _chemins(cle)
+        with open(os.path.join(dossier, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        ouvert = (meta, *(np.load(chemins[nom], mmap_mode="r") for nom in ("positions", "rotations", "tailles")))
+        _ouverts[cle] = ouvert
+    return ouvert
+
+
+def fermer(cle=None):
+    """Oublie les caches ouverts (tous si cle est None), par exemple avant d'effacer leurs fichiers"""
+    if cle is None:
+        _ouverts.clear()
+    else:
+        _ouverts.pop(cle, None)
+
+
+def lire_frame(cle, frame):
+    """Retourne (positions, rotations, tailles) d'une frame (bornée à la plage cuite)"""
+    meta, positions, rotations, tailles = ouvrir(cle)
+    i = min(max(frame, meta["debut"]), meta["fin"]) - meta["debut"]
+    return np.array(positions[i]), np.array(rotations[i], dtype=np.float32), np.array(tailles[i], dtype=np.float32)
+
+
+@bpy.app.handlers.persistent
+def _mettre_a_jour_porteurs(scene, *args):
+    """Handler de changement de frame : recopie la frame courante du cache dans chaque porteur"""
+    for porteur in scene.objects:
+        cle = porteur.get(PROP_CLE)
+        if cle is None or (cle not in _ouverts and not os.path.exists(_chemins(cle)[1])):
+            continue
+        positions, rotations, tailles = lire_frame(cle, scene.frame_current)
+        mesh = porteur.data
+        mesh.vertices.foreach_set("co", positions.ravel())
+        mesh.attributes["rot_instance"].data.foreach_set("vector", rotations.ravel())
+        mesh.attributes["echelle_instance"].data.foreach_set("vector", np.repeat(tailles, 3))
+        mesh.update()
+
+
+def activer_lecture():
+    """Enregistre le handler de lecture (une seule fois, même après un rechargement du module)"""
+    handlers = bpy.app.handlers.frame_change_pre
+    for h in [h for h in handlers if getattr(h, "__name__", "") == _mettre_a_jour_porteurs.__name__]:
+        handlers.remove(h)
+    handlers.append(_mettre_a_jour_porteurs)
+
+
+def remplacer_par_cache(emetteur, cle):
+    """
+    Coupe la simulation de l'émetteur et affiche à la place un porteur d'instances relu depuis le cache.
+
+    Returns:
+        bpy.types.Object: Le porteur, ou None si l'émetteur n'instancie pas un objet.
+    """
+    psys = emetteur.particle_systems[0]
+    modele = psys.settings.instance_object
+    if psys.settings.render_type != 'OBJECT' or modele is None:
+        bprint(f"⚠️ '{emetteur.name}' n'instancie pas un objet : cache ignoré, la simulation reste active")
+        return None
+
+    positions, rotations, tailles = lire_frame(cle, bpy.context.scene.frame_current)
+    porteur = instances.creer_porteur_instances(
+        f"{emetteur.name}_Cache", [modele], positions, rotations, np.repeat(tailles[:, None], 3, axis=1),
+        np.zeros(len(positions), dtype=np.int32), collection=emetteur.users_collection[0]
+    )
+
+    for mod in emetteur.modifiers:
+        if mod.type == 'PARTICLE_SYSTEM':
+            mod.show_viewport = mod.show_render = False
+
+    porteur[PROP_CLE] = cle
+    activer_lecture()
+    return porteur
+
+
+def cuire_et_relire(emetteur, champs_force=(), debut=1, fin=250):
+    """Cuit l'émetteur si besoin, le remplace par son cache et affiche taille et temps de lecture par frame"""
+    if not emetteur or not emetteur.particle_systems:
+        return None
+    cle = cuire(emetteur, champs_force, debut, fin)
+    porteur = remplacer_par_cache(emetteur, cle)
+
+    chemins, _ = _chemins(cle)
+    taille = sum(os.path.getsize(c) for c in chemins.values()) / (1024 * 1024)
+    echantillon = range(debut, fin + 1, max(1, (fin - debut) // 10))
+    t = time.perf_counter()
+    for frame in echantillon:
+        lire_frame(cle, frame)
+    temps_frame = (time.perf_counter() - t) / len(echantillon) * 1000
+    bprint(f"💾 Cache particules '{emetteur.name}' : {taille:.1f} Mo, frames {debut}-{fin}, {temps_frame:.2f} ms de lecture par frame")
+    return porteur
@@ -1,10 +1,18 @@
 import bpy
 import random
 import math
-from mathutils import Vector
-import time
-from utils import bprint
-random.seed(time.time())
+from mathutils import Vector, Euler
+
+import numpy as np
+
+from utils import bprint, lire_sommets, ecrire_sommets
+import terrain
+import spatial
+import instances
+import graines
+import cache_particules
+import donnees
+import sol
 
 # ==========================================
 # 🎨 1. NOS PALETTES DE COULEURS
@@ -44,6 +52,11 @@ def placer_objet_fixe(nom_objet,position, collection=None,rotation=(0.0, 0.0, 0.
 
         bprint(f"⚠️ ERREUR FATALE : Objet introuvable : '{nom_objet}'. Vérifie son nom exact dans Blender !")
         return None
+
+    # Mode instancié : le décor devient un point du porteur de sa famille (pas d'objet créé)
+    if _instances is not None and nom_objet in FAMILLE_PAR_ASSET:
+        enregistrer_instance(nom_objet, position, rotation, echelle)
+        return None
         
     nouvel_obj = obj_source.copy()
     if nouvel_obj.data: 
@@ -58,10 +71,60 @@ def placer_objet_fixe(nom_objet,position, collection=None,rotation=(0.0, 0.0, 0.
 
 
 
+# Teinte par objet : les matériaux partagés lisent couleur / rugosité / métal dans ces propriétés
+# (nœuds Attribute en mode "Instancer" : propriété de l'instanceur s'il existe, sinon de l'objet lui-même)
+TEINTE_PAR_OBJET = True
+ATTR_COULEUR = "teinte_couleur"
+ATTR_RUGOSITE = "teinte_rugosite"
+ATTR_METAL = "teinte_metal"
+
+
+def preparer_materiau_teinte(mat):
+    """ Branche des nœuds Attribute sur le Principled BSDF du matériau (une seule fois) """
+    if not mat.use_nodes or not mat.node_tree: return False
+    noeuds = mat.node_tree.nodes
+    if "Principled BSDF" not in noeuds: return False
+    if "Teinte_Couleur" in noeuds: return True
+
+    bsdf = noeuds["Principled BSDF"]
+    defauts = {
+        ATTR_COULEUR: tuple(bsdf.inputs["Base Color"].default_value),
+        ATTR_RUGOSITE: bsdf.inputs["Roughness"].default_value,
+        ATTR_METAL: bsdf.inputs["Metallic"].default_value,
+    }
+
+    branchements = [
+        ("Teinte_Couleur", ATTR_COULEUR, "Color", "Base Color"),
+        ("Teinte_Rugosite", ATTR_RUGOSITE, "Fac", "Roughness"),
+        ("Teinte_Metal", ATTR_METAL, "Fac", "Metallic"),
+    ]
+    for i, (nom_noeud, attribut, sortie, entree) in enumerate(branchements):
+        noeud = noeuds.new('ShaderNodeAttribute')
+        noeud.name = nom_noeud
+        noeud.attribute_type = 'INSTANCER'
+        noeud.attribute_name = attribut
+        noeud.location = (bsdf.location.x - 300, bsdf.location.y - 180 * i)
+        mat.node_tree.links.new(noeud.outputs[sortie], bsdf.inputs[entree])
+
+    # Les objets qui utilisent déjà ce matériau (les modèles d'origine) gardent leur apparence
+    for obj in bpy.data.objects:
+        if any(slot.material == mat for slot in obj.material_slots):
+            for attribut, valeur in defauts.items():
+                if attribut not in obj: obj[attribut] = valeur
+    return True
+
+
 def modifier_apparence_materiau(objet, nom_partie_a_cibler, couleur_base, rugosite=0.8, metallique=0.0):
     if not objet.material_slots: return 
     for slot in objet.material_slots:
         if slot.material and nom_partie_a_cibler.lower() in slot.material.name.lower():
+            if TEINTE_PAR_OBJET and preparer_materiau_teinte(slot.material):
+                # Le matériau reste partagé : seule la teinte de l'objet change
+                objet[ATTR_COULEUR] = couleur_base
+                objet[ATTR_RUGOSITE] = rugosite
+                objet[ATTR_METAL] = metallique
+                continue
+
             mat_unique = slot.material.copy()
             slot.link = 'OBJECT' 
             slot.material = mat_unique
@@ -74,34 +137,144 @@ def modifier_apparence_materiau(objet, nom_partie_a_cibler, couleur_base, rugosi
                     bsdf.inputs["Metallic"].default_value = metallique
                     
             
-
-def transformer_objet(objet, cible_x, cible_y, echelle_min, echelle_max, est_maison):
-    taille = random.uniform(echelle_min, echelle_max)
-    objet.scale = (taille, taille, taille)
+def rapport_materiaux(collection, nb_materiaux_avant, modeles_instancies=()):
+    """ Affiche le coût matériaux de la ville : datablocks créés, matériaux distincts à compiler et nœuds """
+    objets = list(collection.objects) + list(modeles_instancies)
+    utilises = {slot.material for obj in objets for slot in obj.material_slots if slot.material}
+    nb_noeuds = sum(len(m.node_tree.nodes) for m in utilises if m.use_nodes and m.node_tree)
+    bprint(f"🎨 Matériaux : {len(bpy.data.materials) - nb_materiaux_avant} créés pendant la génération, "
+           f"{len(utilises)} distincts dans {collection.name} ({nb_noeuds} nœuds de shader à compiler)"
+           f" | teinte par objet : {TEINTE_PAR_OBJET}")
+
+
+def calculer_transformation(location, cible_x, cible_y, echelle_min, echelle_max, est_maison, alea=random):
+    """ Tire l'échelle et l'angle (autour de Z) d'un objet posé en location : (angle, taille) """
+    taille = alea.uniform(echelle_min, echelle_max)
     if est_maison:
-        angle = math.atan2(cible_y - objet.location.y, cible_x - objet.location.x)
-        objet.rotation_euler[2] = angle + (math.pi / 2)
+        angle = math.atan2(cible_y - location.y, cible_x - location.x) + (math.pi / 2)
     else:
-        objet.rotation_euler[2] = random.uniform(0, 2 * math.pi)
+        angle = alea.uniform(0, 2 * math.pi)
+    return angle, taille
+
+
+def transformer_objet(objet, cible_x, cible_y, echelle_min, echelle_max, est_maison, alea=random):
+    angle, taille = calculer_transformation(objet.location, cible_x, cible_y, echelle_min, echelle_max, est_maison, alea)
+    objet.scale = (taille, taille, taille)
+    objet.rotation_euler[2] = angle
+
+
+
+# ==========================================
+#  MODE INSTANCIÉ (Geometry Nodes)
+# ==========================================
+# Au lieu d'une copie d'objet par placement, chaque placement devient un point d'un "porteur"
+# (un par famille d'assets) instancié par un seul modificateur Geometry Nodes.
+
+FAMILLES_INSTANCES = {
+    "maisons": ("maison_pauvre", "maison_riche"),
+    "arbres": ("arbre",),
+    "decor": ("maison_shogun", "temple", "pont", "tori", "grand_arbre"),
+}
+FAMILLE_PAR_ASSET = {nom: famille for famille, noms in FAMILLES_INSTANCES.items() for nom in noms}
+
+_instances = None  # None : mode objets / dict famille -> liste de placements : mode instancié
+
+
+def activer_instances():
+    global _instances
+    _instances = {famille: [] for famille in FAMILLES_INSTANCES}
 
 
-def trouver_point_sur_terrain(nom_terrain, positions_deja_prises, distance_min):
+def teinte_instance(obj_source, nom_partie_a_cibler, couleur_base, rugosite=0.8, metallique=0.0):
+    """ Prépare les matériaux ciblés du modèle et retourne la teinte à stocker sur le point (None si aucun) """
+    prepare = False
+    for slot in obj_source.material_slots:
+        if slot.material and nom_partie_a_cibler.lower() in slot.material.name.lower():
+            prepare = preparer_materiau_teinte(slot.material) or prepare
+    return (couleur_base, rugosite, metallique) if prepare else None
+
+
+def enregistrer_instance(nom_objet, position, rotation, echelle, teinte=None):
+    _instances[FAMILLE_PAR_ASSET[nom_objet]].append((nom_objet, tuple(position), tuple(rotation), tuple(echelle), teinte))
+
+
+def finaliser_instances(collection):
+    """
+    Construit un porteur par famille à partir des placements enregistrés, puis repasse en mode objets.
+
+    Returns:
+        list: Les objets modèles instanciés (pour le rapport matériaux).
+    """
+    global _instances
+    placements_par_famille, _instances = _instances, None
+    modeles = []
+    total = 0
+
+    for famille, placements in placements_par_famille.items():
+        if not placements: continue
+        sources = [bpy.data.objects[nom] for nom in FAMILLES_INSTANCES[famille] if nom in bpy.data.objects]
+        indice_source = {src.name: i for i, src in enumerate(sources)}
+
+        attributs = {}
+        if any(p[4] is not None for p in placements):
+            # Les placements sans teinte reprennent celle du modèle
+            teintes = [p[4] or (tuple(bpy.data.objects[p[0]].get(ATTR_COULEUR, (1.0, 1.0, 1.0, 1.0))),
+                                bpy.data.objects[p[0]].get(ATTR_RUGOSITE, 0.8),
+                                bpy.data.objects[p[0]].get(ATTR_METAL, 0.0)) for p in placements]
+            attributs = {
+                ATTR_COULEUR: ([t[0] for t in teintes], 'FLOAT_COLOR'),
+                ATTR_RUGOSITE: ([t[1] for t in teintes], 'FLOAT'),
+                ATTR_METAL: ([t[2] for t in teintes], 'FLOAT'),
+            }
+
+        instances.creer_porteur_instances(
+            f"Instances_{famille}", sources,
+            positions=[p[1] for p in placements],
+            rotations=[p[2] for p in placements],
+            echelles=[p[3] for p in placements],
+            indices=[indice_source[p[0]] for p in placements],
+            attributs=attributs, collection=collection
+        )
+        modeles.extend(sources)
+        total += len(placements)
+
+    bprint(f"🧩 Instances : {total} placements répartis dans {sum(1 for p in placements_par_famille.values() if p)} porteur(s)")
+    return modeles
+
+
+_masque_placement = None
+
+
+def compiler_masque_placement(rayon_max, resolution=0.25):
+    """ Rasterise une fois les zones interdites du plateau à partir de RELIEF_CAPITALE (marge de 2m au bord) """
+    global _masque_placement
+    _masque_placement = terrain.rasteriser_exclusions(RELIEF_CAPITALE, rayon_max, pas=resolution, marge_bord=2.0)
+    return _masque_placement
+
+
+def position_valide(rel_x, rel_y, rayon_max):
+    """ Vrai si le point (relatif au centre du tapis) tombe sur l'herbe : hors montagnes, douves, rivière et allée """
+    if _masque_placement is None or _masque_placement["rayon"] != rayon_max:
+        compiler_masque_placement(rayon_max)
+    return terrain.lire_masque(_masque_placement, rel_x, rel_y)
+
+
+def trouver_point_sur_terrain(nom_terrain, positions_deja_prises, distance_min, alea=random):
     obj_terrain = bpy.data.objects.get(nom_terrain)
     if not obj_terrain: return None
     
     # On calcule le rayon réel du tapis (en prenant la plus grande dimension)
     rayon_max = max(obj_terrain.dimensions.x, obj_terrain.dimensions.y) / 2.0
     
+    if _masque_placement is None or _masque_placement["rayon"] != rayon_max:
+        compiler_masque_placement(rayon_max)
+
     #on fait jusqu'à 30 tentatives pour trouver un point vert valide
     for _ in range(30):
-        # 1. Génération d'un point aléatoire uniformément réparti dans un cercle
-        angle = random.uniform(0, 2 * math.pi)
-        # math.sqrt permet de bien répartir les maisons partout, et pas juste au centre !
-        r = rayon_max * math.sqrt(random.random()) 
-        
-        rel_x = r * math.cos(angle)
-        rel_y = r * math.sin(angle)
-        
+        # 1. Tirage direct parmi les cellules libres du masque : le point est déjà hors des zones interdites !
+        point = terrain.tirer_point_libre(_masque_placement, alea)
+        if point is None: return None
+        rel_x, rel_y = point
 
         loc_abs = Vector((
             obj_terrain.location.x + rel_x,
@@ -109,97 +282,157 @@ def trouver_point_sur_terrain(nom_terrain, positions_deja_prises, distance_min):
             obj_terrain.location.z
         ))
         
-
-        dist_centre = math.hypot(rel_x, rel_y)
-        dist_nw = math.hypot(rel_x - (-16.0), rel_y - 15.0)
-        
-        est_valide = True
-        
-        # On évite que ça déborde dans le vide au bord de l'île (marge de 2m)
-        if dist_centre > rayon_max - 2.0: est_valide = False
-            
-        # On évite la Montagne Shogun et ses douves (eau jusqu'à 11.5m)
-        if dist_centre < 11.5: est_valide = False
-            
-        #on évite la Montagne Neige (Rayon de 5m)
-        if dist_nw < 5: est_valide = False
-            
-        # on évite la Rivière Nord
-        if rel_y > 0.0 and abs(rel_x) < 4.5 and dist_centre >= 11.0: est_valide = False
-            
-        # on évite L'Allée Centrale Sud (Largeur 1.5m de sécurité de chaque côté)
-        if abs(rel_x) < 1.5 and rel_y < -10.5: est_valide = False
-            
-        if not est_valide:
-            continue # Point invalide, on annule et on boucle pour en chercher un autre !
-            
-        # on vérifie qu'on ne chevauche pas une autre maison ou arbre
+        # on vérifie qu'on ne chevauche pas une autre maison ou arbre (index spatial : voisins immédiats seulement)
         collision = False
         if positions_deja_prises is not None:
-            for pos_prise in positions_deja_prises:
-                rayon_obstacle = pos_prise.get("radius", distance_min) 
-                if (loc_abs - pos_prise["loc"]).length < rayon_obstacle: 
-                    collision = True
-                    break
+            collision = not positions_deja_prises.est_libre(loc_abs.x, loc_abs.y, distance_min)
                     
         if not collision:
             return loc_abs # ✅ Point parfait trouvé sur l'herbe !
             
     return None # Échec après 30 tentatives
 
+# ==========================================
+#  SOL DE L'ÎLE
+# ==========================================
+# Maisons et arbres sont posés sur le relief réel de l'île plutôt qu'à la hauteur du tapis (voir sol.py) :
+#   {"champ": ...}                  : lecture du champ de hauteur (interpolation sur grille)
+#   {"ile": obj, "arbre": ..., "niveau_eau": z} : lancer de rayons exact sur le BVH de l'île, pentes et eau rejetées
+# None : ils gardent la hauteur du tapis.
+
+_sol = None
+
+# L'eau peinte par appliquer_materiel_capitale commence sous ce niveau (relatif au centre de l'île)
+NIVEAU_EAU_CAPITALE = -1.1
+
+# Tours de semis au plus en mode "poisson" : les suivants remplacent les emplacements rejetés par le sol
+TOURS_PLACEMENT = 5
+
+
+def accrocher_lot(impacts, rapport=True):
+    """
+    Pose un lot de positions sur le sol en une passe.
+    rapport : affiche le débit de rayons (désactivé pour les placements unitaires)
+
+    Returns:
+        list: (position posée, normale du sol) par impact ; (None, None) pour un placement rejeté
+              (mode lancer de rayons : pente, eau ou île manquée). Hors du champ de hauteur,
+              la position est inchangée et la normale None.
+    """
+    if _sol is None or not impacts:
+        return [(impact, None) for impact in impacts]
+
+    xs = np.array([impact.x for impact in impacts])
+    ys = np.array([impact.y for impact in impacts])
+    if "champ" in _sol:
+        zs, normales = sol.hauteur_en(_sol["champ"], xs, ys), sol.normale_en(_sol["champ"], xs, ys)
+        rejets = np.zeros(len(impacts), dtype=bool)
+    else:
+        resultat = sol.accrocher(_sol["ile"], xs, ys, niveau_eau=_sol["niveau_eau"], rapport=rapport,
+                                 arbre=_sol["arbre"])
+        zs, normales, rejets = resultat["z"], resultat["normales"], resultat["rejet"]
+
+    poses = []
+    for impact, z, normale, rejet in zip(impacts, zs.tolist(), normales.tolist(), rejets.tolist()):
+        if rejet:
+            poses.append((None, None))
+        elif z != z:
+            poses.append((impact, None))
+        else:
+            poses.append((Vector((impact.x, impact.y, z)), normale))
+    return poses
+
+
+def poser_sur_sol(impact):
+    """ Retourne (position posée sur le sol, normale du sol) pour un seul placement (voir accrocher_lot) """
+    return accrocher_lot([impact], rapport=False)[0]
+
 # ==========================================
  #LES MÉTHODES DE GÉNÉRATION (Unitaires)
 # ==========================================
 
-def generer_maison(type_maison, nom_terrain, collection, positions_placees=None, position_exacte=None):
+def generer_maison(type_maison, nom_terrain, collection, positions_placees=None, position_exacte=None, alea=random,
+                   normale=None):
+    """ normale : position_exacte est déjà posée sur le sol (accrocher_lot), elle n'est pas relue """
     obj_source = bpy.data.objects.get(type_maison)
     if not obj_source: return False
 
     impact = position_exacte
     if impact is None:
 
-        impact = trouver_point_sur_terrain(nom_terrain, positions_placees, 2.5)
+        impact = trouver_point_sur_terrain(nom_terrain, positions_placees, 2.5, alea)
+
+    # Les maisons restent droites : seule la hauteur suit le sol
+    if impact and normale is None:
+        impact, _ = poser_sur_sol(impact)
         
-    if impact:
+    if impact and _instances is not None:
+        angle, taille = calculer_transformation(impact, 0.0, 5.0, 0.9, 1.1, est_maison=True, alea=alea)
+        coul = alea.choice(PALETTE_SAMOURAI)
+        rotation = (obj_source.rotation_euler.x, obj_source.rotation_euler.y, angle)
+        enregistrer_instance(type_maison, impact, rotation, (taille, taille, taille),
+                             teinte_instance(obj_source, "toit", coul, rugosite=0.9))
+
+    elif impact:
         nouvel_obj = obj_source.copy()
         if nouvel_obj.data: nouvel_obj.data = obj_source.data
         collection.objects.link(nouvel_obj)
         nouvel_obj.location = impact
         
-        transformer_objet(nouvel_obj, 0.0, 5.0, 0.9, 1.1, est_maison=True)
-        coul = random.choice(PALETTE_SAMOURAI)
+        transformer_objet(nouvel_obj, 0.0, 5.0, 0.9, 1.1, est_maison=True, alea=alea)
+        coul = alea.choice(PALETTE_SAMOURAI)
         modifier_apparence_materiau(nouvel_obj, "toit", coul, rugosite=0.9)
         
+    if impact:
         if positions_placees is not None and position_exacte is None:
-            positions_placees.append({"loc": impact})
+            positions_placees.ajouter(impact.x, impact.y)
         return True
     return False
 
-def generer_arbre(nom_arbre, nom_terrain, collection, positions_placees=None, position_exacte=None):
+def generer_arbre(nom_arbre, nom_terrain, collection, positions_placees=None, position_exacte=None, alea=random,
+                  normale=None):
+    """ normale : position_exacte est déjà posée sur le sol (accrocher_lot), elle n'est pas relue """
     obj_source = bpy.data.objects.get(nom_arbre)
     if not obj_source: return False
 
     impact = position_exacte
     if impact is None:
 
-        impact = trouver_point_sur_terrain(nom_terrain, positions_placees, 1)
+        impact = trouver_point_sur_terrain(nom_terrain, positions_placees, 1, alea)
+
+    # Les arbres suivent la hauteur et la pente du sol
+    if impact and normale is None:
+        impact, normale = poser_sur_sol(impact)
         
-    if impact:
+    if impact and _instances is not None:
+        angle, taille = calculer_transformation(impact, 0.0, 5.0, 0.6, 1.4, est_maison=False, alea=alea)
+        coul = alea.choice(PALETTE_ARBRES)
+        est_rose = coul[0] > 0.7 and coul[1] < 0.6
+        rotation = (obj_source.rotation_euler.x, obj_source.rotation_euler.y, angle)
+        if normale is not None:
+            rotation = sol.incliner(Euler(rotation, obj_source.rotation_euler.order), normale)
+        enregistrer_instance(nom_arbre, impact, rotation, (taille, taille, taille),
+                             teinte_instance(obj_source, "feuill", coul, rugosite=0.3 if est_rose else 0.8))
+
+    elif impact:
         nouvel_obj = obj_source.copy()
         if nouvel_obj.data: nouvel_obj.data = obj_source.data
         collection.objects.link(nouvel_obj)
         nouvel_obj.location = impact
         
-        transformer_objet(nouvel_obj, 0.0, 5.0, 0.6, 1.4, est_maison=False)
+        transformer_objet(nouvel_obj, 0.0, 5.0, 0.6, 1.4, est_maison=False, alea=alea)
+        if normale is not None:
+            nouvel_obj.rotation_euler = sol.incliner(nouvel_obj.rotation_euler, normale)
         
-        coul = random.choice(PALETTE_ARBRES)
+        coul = alea.choice(PALETTE_ARBRES)
         est_rose = coul[0] > 0.7 and coul[1] < 0.6 
         metal =  0.0
         rugosite = 0.3 if est_rose else 0.8
         modifier_apparence_materiau(nouvel_obj, "feuill", coul, rugosite=rugosite, metallique=metal)
-        
+
+    if impact:
         if positions_placees is not None and position_exacte is None:
-            positions_placees.append({"loc": impact})
+            positions_placees.ajouter(impact.x, impact.y)
         return True
     return False
 
@@ -207,22 +440,94 @@ def generer_arbre(nom_arbre, nom_terrain, collection, positions_placees=None, po
 # 🏘️ 4. LES MÉTHODES DE GROUPES (Plurielles)
 # ==========================================
 
-def generer_maisons(nb_cible, types_maisons_possibles, nom_terrain, collection, positions_placees):
+def positions_poisson(nb_cible, nom_terrain, positions_placees, distance_min, etiquette="objets", alea=random):
+    """
+    Tire jusqu'à nb_cible emplacements en bruit bleu (Bridson) sur le tapis, hors zones interdites
+    et hors emplacements déjà pris. Signale la densité maximale si la cible n'est pas atteignable.
+
+    Returns:
+        list: Les positions absolues (Vector) retenues.
+    """
+    obj_terrain = bpy.data.objects.get(nom_terrain)
+    if not obj_terrain: return []
+
+    rayon_max = max(obj_terrain.dimensions.x, obj_terrain.dimensions.y) / 2.0
+    ox, oy, oz = obj_terrain.location
+
+    # Le semis est saturé (densité maximale), puis on en garde nb_cible au hasard :
+    # un sous-ensemble d'un semis de Poisson respecte toujours la distance minimale.
+    points = spatial.echantillonner_poisson(
+        positions_placees, distance_min,
+        est_valide=lambda x, y: position_valide(x - ox, y - oy, rayon_max),
+        rayon_zone=rayon_max, centre=(ox, oy), alea=alea
+    )
+    if len(points) < nb_cible:
+        bprint(f"⚠️ Densité maximale atteinte : {len(points)} {etiquette} possibles pour {nb_cible} demandés")
+
+    choisis = alea.sample(points, min(nb_cible, len(points)))
+    return [Vector((x, y, oz)) for x, y in choisis]
+
+
+def placer_poisson(nb_cible, nom_terrain, positions_placees, distance_min, etiquette, alea, placer):
+    """
+    Semis de Poisson posé sur le sol par tours (au plus TOURS_PLACEMENT) : chaque tour tire les emplacements
+    manquants, les pose sur le sol en une passe et n'enregistre que ceux qui sont gardés. Les rejetés
+    (pente, eau) n'occupent aucune place et sont remplacés au tour suivant.
+
+    placer(impact, normale) crée l'objet et retourne True s'il a été posé.
+
+    Returns:
+        int: Le nombre d'objets posés.
+    """
+    poses = 0
+    for _ in range(TOURS_PLACEMENT):
+        impacts = positions_poisson(nb_cible - poses, nom_terrain, positions_placees, distance_min, etiquette, alea)
+        rejets = 0
+        for impact, normale in accrocher_lot(impacts):
+            if impact is None:
+                rejets += 1
+                continue
+            if placer(impact, normale):
+                positions_placees.ajouter(impact.x, impact.y)
+                poses += 1
+        # Aucun rejet : le manque éventuel vient de la densité maximale, un nouveau tour n'y changerait rien
+        if poses >= nb_cible or not impacts or rejets == 0:
+            break
+
+    if poses < nb_cible:
+        bprint(f"⚠️ {poses}/{nb_cible} {etiquette} posés (densité maximale ou emplacements rejetés par le sol)")
+    return poses
+
+
+def generer_maisons(nb_cible, types_maisons_possibles, nom_terrain, collection, positions_placees, mode="rejet", alea=random):
+    """ mode "rejet" : tirages aléatoires avec rejet / mode "poisson" : semis de Bridson par tours (voir placer_poisson) """
+    if mode == "poisson":
+        return placer_poisson(nb_cible, nom_terrain, positions_placees, 2.5, "maisons", alea,
+                              lambda impact, normale: generer_maison(alea.choice(types_maisons_possibles), nom_terrain,
+                                                                     collection, position_exacte=impact, alea=alea,
+                                                                     normale=normale))
+
     posees = 0
     tentatives = 0
     while posees < nb_cible and tentatives < (nb_cible * 50):
         tentatives += 1
-        type_choisi = random.choice(types_maisons_possibles)
-        if generer_maison(type_choisi, nom_terrain, collection, positions_placees):
+        type_choisi = alea.choice(types_maisons_possibles)
+        if generer_maison(type_choisi, nom_terrain, collection, positions_placees, alea=alea):
             posees += 1
     return posees
 
-def generer_arbres(nb_cible, nom_arbre, nom_terrain, collection, positions_placees):
+def generer_arbres(nb_cible, nom_arbre, nom_terrain, collection, positions_placees, mode="rejet", alea=random):
+    """ mode "rejet" : tirages aléatoires avec rejet / mode "poisson" : semis de Bridson par tours (voir placer_poisson) """
+    if mode == "poisson":
+        return placer_poisson(nb_cible, nom_terrain, positions_placees, 1, "arbres", alea,
+                              lambda impact, normale: generer_arbre(nom_arbre, nom_terrain, collection,
+                                                                    position_exacte=impact, alea=alea, normale=normale))
+
     poses = 0
     tentatives = 0
     while poses < nb_cible and tentatives < (nb_cible * 50):
         tentatives += 1
-        if generer_arbre(nom_arbre, nom_terrain, collection, positions_placees):
+        if generer_arbre(nom_arbre, nom_terrain, collection, positions_placees, alea=alea):
             poses += 1
     return poses
 
@@ -231,42 +536,48 @@ def generer_arbres(nb_cible, nom_arbre, nom_terrain, collection, positions_place
     # ==========================================
 # ⛰️  SCULPTURE SUR-MESURE DE L'ÎLE
 # ==========================================
+RELIEF_CAPITALE = [
+    # "marge_placement" : la zone (élargie de cette marge) est interdite aux maisons et aux arbres
+
+    # 1. Montagne Centrale Shogun
+    {"nom": "montagne_shogun", "forme": "disque", "centre": (0.0, 0.0), "rayon": 7.0,
+     "profil": "cosinus", "hauteur": 15.0, "plafond": 12.0, "operation": "max", "marge_placement": 0.5},
+
+    # 2. L'EAU AUTOUR DE LA MONTAGNE (Les Douves, eau jusqu'à 11.5m avec la marge)
+    {"nom": "douves", "forme": "anneau", "centre": (0.0, 0.0), "rayon_int": 7.0, "rayon": 11.0,
+     "profil": "constant", "valeur": -2.0, "operation": "set", "marge_placement": 0.5},
+
+    # 3. Grande Montagne Neige (DÉCALÉE À GAUCHE 🎯 : x - (-16.0))
+    {"nom": "montagne_neige", "forme": "disque", "centre": (-16.0, 15.0), "rayon": 4.5,
+     "profil": "cosinus", "hauteur": 30.0, "plafond": 27.0, "operation": "max", "marge_placement": 0.5},
+
+    # 4. LA RIVIÈRE DERRIÈRE (hors douves et hors montagne neige)
+    {"nom": "riviere_nord", "forme": "boite", "min": (-4.0, 0.0), "max": (4.0, math.inf),
+     "exclure": [((0.0, 0.0), 11.0), ((-16.0, 15.0), 4.5)],
+     "profil": "constant", "valeur": -2.0, "operation": "set", "marge_placement": 0.5},
+
+    # 5. L'ALLÉE CENTRALE SUD (seulement peinte par le matériau, le terrain reste plat)
+    {"nom": "allee_sud", "forme": "boite", "min": (-1.0, -math.inf), "max": (1.0, -11.0),
+     "profil": "constant", "valeur": 0.0, "operation": None, "marge_placement": 0.5},
+]
+
+
 def sculpter_ile_capitale(nom_ile):
     """ Prend l'île générée et soulève le terrain pour faire les montagnes avec des sommets plats """
     ile = bpy.data.objects.get(nom_ile)
     if not ile: return
 
     scale_z = ile.scale[2]
-    
-    for v in ile.data.vertices:
-        if abs(v.co.z) < 0.001:
-            x, y = v.co.x, v.co.y
-            z_val = 0.0
-            
-            # 1. Montagne Centrale Shogun
-            dist_centre = math.hypot(x, y)
-            if dist_centre < 7.0:
-                hauteur_courbe = math.cos(dist_centre / 7.0 * (math.pi / 2)) * 15.0
-                z_val = max(z_val, min(hauteur_courbe, 12.0))
-                
-            # 2. L'EAU AUTOUR DE LA MONTAGNE (Les Douves)
-            elif dist_centre >= 7.0 and dist_centre < 11.0:
-                z_val = -2.0
-                
-            # 3. Grande Montagne Neige (DÉCALÉE À GAUCHE 🎯 : x - (-16.0))
-            dist_nw = math.hypot(x - (-16.0), y - 15.0)
-            if dist_nw < 4.5:
-                hauteur_courbe = math.cos(dist_nw / 4.5 * (math.pi / 2)) * 30.0
-                z_val = max(z_val, min(hauteur_courbe, 27.0))
-                
-            # 4. LA RIVIÈRE DERRIÈRE
-            if y > 0.0 and abs(x) < 4.0 and dist_centre >= 11.0 and dist_nw > 4.5:
-                z_val = -2.0 
-                
-            if z_val != 0.0:
-                v.co.z = z_val / scale_z
-                
-    ile.data.update()
+
+    # Seul le plateau plat (z = 0) est sculpté
+    co = lire_sommets(ile.data)
+    plateau = np.abs(co[:, 2]) < 0.001
+    z_val = terrain.evaluer_relief(co[plateau, 0], co[plateau, 1], np.zeros(plateau.sum()), RELIEF_CAPITALE)
+
+    # Les sommets qu'aucune feature n'a touchés restent tels quels
+    idx = np.flatnonzero(plateau)[z_val != 0.0]
+    co[idx, 2] = z_val[z_val != 0.0] / scale_z
+    ecrire_sommets(ile.data, co)
     
 def appliquer_materiel_capitale(nom_ile):
     """ Peint l'île avec des masques vectoriels pour cibler chaque montagne et l'allée ! """
@@ -512,20 +823,22 @@ def placer_decor_custom(collection, centre_ile, rayon_plateau, positions_memoire
     
     plane = bpy.data.objects.get("Plane_sakura")
     
-    mat_invis = bpy.data.materials.new(name="Mat_Nuage_Invisible")
-    mat_invis.use_nodes = True
-    mat_invis.blend_method = 'CLIP' # Mode de transparence pour Eevee
-    mat_invis.diffuse_color = (0, 0, 0, 0) # Alpha à zéro
+    mat_invis, cree = donnees.materiau("Mat_Nuage_Invisible")
+    if cree:
+        mat_invis.use_nodes = True
+        mat_invis.blend_method = 'CLIP' # Mode de transparence pour Eevee
+        mat_invis.diffuse_color = (0, 0, 0, 0) # Alpha à zéro
 
-    n_nodes = mat_invis.node_tree.nodes
-    n_links = mat_invis.node_tree.links
-    for n in n_nodes: n_nodes.remove(n)
+        n_nodes = mat_invis.node_tree.nodes
+        n_links = mat_invis.node_tree.links
+        for n in n_nodes: n_nodes.remove(n)
     
-    n_out = n_nodes.new('ShaderNodeOutputMaterial')
-    n_transp = n_nodes.new('ShaderNodeBsdfTransparent') 
-    n_links.new(n_transp.outputs['BSDF'], n_out.inputs['Surface'])
+        n_out = n_nodes.new('ShaderNodeOutputMaterial')
+        n_transp = n_nodes.new('ShaderNodeBsdfTransparent') 
+        n_links.new(n_transp.outputs['BSDF'], n_out.inputs['Surface'])
 
-    plane.data.materials.append(mat_invis)
+    if mat_invis.name not in plane.data.materials:
+        plane.data.materials.append(mat_invis)
     
 
     # 2. On place le vent exactement au même endroit
@@ -535,17 +848,25 @@ def placer_decor_custom(collection, centre_ile, rayon_plateau, positions_memoire
     placer_objet_fixe("turbulence_sakura", collection=collection, position=loc_turbulence,echelle=(5,5,1))
 
     # 🛡️ LES ZONES INTERDITES
-    positions_memoire.append({"loc": Vector(loc_palais), "radius": 4.0})
-    positions_memoire.append({"loc": Vector(loc_pont), "radius": 6.0}) # Sécurité élargie pour le gros pont
-    positions_memoire.append({"loc": Vector(loc_tori_gauche), "radius": 3.0})
-    positions_memoire.append({"loc": Vector(loc_tori_droit), "radius": 3.0})
+    positions_memoire.ajouter(loc_palais[0], loc_palais[1], 4.0)
+    positions_memoire.ajouter(loc_pont[0], loc_pont[1], 6.0) # Sécurité élargie pour le gros pont
+    positions_memoire.ajouter(loc_tori_gauche[0], loc_tori_gauche[1], 3.0)
+    positions_memoire.ajouter(loc_tori_droit[0], loc_tori_droit[1], 3.0)
     
     return tapis
 # ==========================================
 #  L'ASSEMBLAGE FINAL
 # ==========================================
 
-def generer_capitale(nom_ile, centre_ile, rayon_plateau, nb_maisons=50, nb_arbres=40):
+def generer_capitale(nom_ile, centre_ile, rayon_plateau, nb_maisons=50, nb_arbres=40, mode_placement="rejet", resolution_masque=0.25,
+                     instancier=False, graine=None, frames_particules=None, suivre_sol=True, accrochage="grille"):
+    """
+    instancier=True : maisons, arbres et décor fixe deviennent des instances Geometry Nodes (un objet par famille)
+    suivre_sol=True : maisons et arbres sont posés sur le relief de l'île (voir sol.py), les arbres penchés selon la pente
+    accrochage : "grille" (champ de hauteur interpolé) ou "bvh" (lancer de rayons exact, pentes raides et eau rejetées)
+    graine : graine de construction ; maisons et arbres tirent dans leurs propres flux (voir graines.py)
+    frames_particules : (début, fin) pour cuire la pluie de sakura sur disque et la relire au lieu de la simuler
+    """
     nom_dossier = "VILLE_CAPITALE"
 
     if nom_dossier in bpy.data.collections:
@@ -556,28 +877,55 @@ def generer_capitale(nom_ile, centre_ile, rayon_plateau, nb_maisons=50, nb_arbre
         bpy.context.scene.collection.children.link(col)
 
     bprint("🚀 DÉMARRAGE DE L'ASSEMBLAGE DE LA CAPITALE...")
-    positions_memoire = []
+    nb_materiaux_avant = len(bpy.data.materials)
+    # Index spatial des emplacements pris : les zones réservées gardent leur rayon, le reste utilise la distance demandée
+    positions_memoire = spatial.GrilleOccupation(taille_cellule=2.5, regle="obstacle")
+    if instancier:
+        activer_instances()
 
     # 🌟 LES DEUX LIGNES MAGIQUES SONT ICI :
     sculpter_ile_capitale(nom_ile)
     appliquer_materiel_capitale(nom_ile)
 
+    # Sol de l'île sculptée, lu par maisons et arbres (suivre_sol=False : hauteur du tapis)
+    global _sol
+    ile = bpy.data.objects.get(nom_ile)
+    if not suivre_sol or ile is None:
+        _sol = None
+    elif accrochage == "bvh":
+        _sol = {"ile": ile, "arbre": sol.arbre_bvh(ile), "niveau_eau": centre_ile[2] + NIVEAU_EAU_CAPITALE}
+    else:
+        _sol = {"champ": sol.champ_hauteur(ile)}
+
     # ÉTAPE 1 : On place ton décor et on récupère le Tapis (manuel ou automatique) !
     tapis_spawn = placer_decor_custom(col, centre_ile, rayon_plateau, positions_memoire)
 
     if not tapis_spawn:
         bprint("❌ ERREUR : Aucun tapis de spawn n'a pu être généré !")
+        if instancier: finaliser_instances(col)
         return
 
+    if frames_particules:
+        champs_force = [o for o in col.objects if o.field and o.field.type != 'NONE']
+        for emetteur in [o for o in col.objects if o.particle_systems]:
+            cache_particules.cuire_et_relire(emetteur, champs_force, *frames_particules)
+
     # ÉTAPE 2 : La Génération Aléatoire
+    # Les zones interdites sont compilées une seule fois en masque (une lecture de tableau par candidat)
+    compiler_masque_placement(max(tapis_spawn.dimensions.x, tapis_spawn.dimensions.y) / 2.0, resolution_masque)
     noms_maisons = ["maison_pauvre", "maison_riche"] 
 
-    total_maisons = generer_maisons(nb_maisons, noms_maisons, tapis_spawn.name, col, positions_memoire)
+    total_maisons = generer_maisons(nb_maisons, noms_maisons, tapis_spawn.name, col, positions_memoire, mode_placement,
+                                    alea=graines.flux(graine, "capitale", nom_ile, "maisons"))
     bprint(f"🏠 Maisons posées : {total_maisons}/{nb_maisons}")
 
-    total_arbres = generer_arbres(nb_arbres, "arbre", tapis_spawn.name, col, positions_memoire)
+    total_arbres = generer_arbres(nb_arbres, "arbre", tapis_spawn.name, col, positions_memoire, mode_placement,
+                                  alea=graines.flux(graine, "capitale", nom_ile, "arbres"))
     bprint(f"🌳 Arbres posés : {total_arbres}/{nb_arbres}")
 
+    modeles_instancies = finaliser_instances(col) if instancier else ()
+    rapport_materiaux(col, nb_materiaux_avant, modeles_instancies)
+
     bprint("✅ Capitale des Fleurs complètement assemblée !")
 
 
@@ -0,0 +1,159 @@
+import json
+import time
+import hashlib
+
+import bpy
+
+from utils import bprint
+
+
+
+# ==========================================
+#  CYCLE DE VIE DES DATABLOCKS
+# ==========================================
+#
+# Chaque datablock créé pendant un build porte deux propriétés :
+#   PROP_CLE   : sa clé de contenu (famille + paramètres, posée par obtenir()) -> il est réutilisé au lieu d'être recréé
+#   PROP_BUILD : l'identifiant du dernier build qui l'a créé ou utilisé
+# obtenir() marque ce qu'il crée ou réutilise ; terminer_build() marque tout ce qui est apparu depuis
+# demarrer_build() (maillages des primitives, matériaux créés directement, ...).
+# demarrer_build() ne purge que les orphelins marqués par un build précédent : main.py ne supprime que
+# les objets, leurs matériaux, textures et maillages partent ici. Les datablocks de l'utilisateur
+# (images, groupes de nœuds, ... jamais créés par un build) ne sont pas touchés, même orphelins.
+
+PROP_CLE = "wano_cle"
+PROP_BUILD = "wano_build"
+
+# Types de datablocks surveillés (attributs de bpy.data)
+TYPES_SUIVIS = ("meshes", "materials", "textures", "node_groups", "particles", "images", "curves", "lights")
+
+_build = {"id": None, "crees": 0, "reutilises": 0, "existants": set()}
+
+
+
+def _cle_contenu(type_donnees, famille, params):
+    contenu = json.dumps({"type": type_donnees, "famille": famille, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()[:24]
+
+
+def _taille_estimee(db):
+    """Estimation grossière de la mémoire d'un datablock (octets), pour le rapport de purge"""
+    if isinstance(db, bpy.types.Mesh):
+        return len(db.vertices) * 32 + len(db.loops) * 24 + len(db.polygons) * 16 + len(db.edges) * 12
+    if isinstance(db, bpy.types.Image):
+        largeur, hauteur = db.size
+        return largeur * hauteur * db.channels * (4 if db.is_float else 1)
+    if isinstance(db, (bpy.types.Material, bpy.types.NodeTree)):
+        arbre = db if isinstance(db, bpy.types.NodeTree) else db.node_tree
+        return 1024 + (len(arbre.nodes) * 2048 if arbre else 0)
+    return 1024
+
+
+def _marque_par_un_build(db):
+    """Vrai si le datablock a été créé ou utilisé par un build précédent (pas par le build en cours)"""
+    return PROP_BUILD in db and db[PROP_BUILD] != _build["id"]
+
+
+def purger_orphelins():
+    """
+    Supprime les datablocks marqués par un build précédent et sans utilisateur (ni faux utilisateur),
+    jusqu'à ce qu'il n'en reste plus : supprimer un matériau peut rendre orphelines ses textures, et ainsi de suite.
+
+    Returns:
+        tuple: (dict type -> nombre supprimé, octets libérés estimés)
+    """
+    retires = {}
+    octets = 0
+    while True:
+        orphelins = []
+        for type_donnees in TYPES_SUIVIS:
+            for db in getattr(bpy.data, type_donnees):
+                if db.users == 0 and not db.use_fake_user and _marque_par_un_build(db):
+                    orphelins.append(db)
+                    retires[type_donnees] = retires.get(type_donnees, 0) + 1
+                    octets += _taille_estimee(db)
+        if not orphelins:
+            break
+        bpy.data.batch_remove(orphelins)
+    return retires, octets
+
+
+def demarrer_build():
+    """
+    Ouvre un nouveau build : purge les orphelins laissés par les précédents et affiche ce qui a été récupéré.
+
+    Returns:
+        str: L'identifiant du build.
+    """
+    avant = sum(len(getattr(bpy.data, t)) for t in TYPES_SUIVIS)
+    retires, octets = purger_orphelins()
+    _build.update({"id": time.strftime("%Y%m%d-%H%M%S"), "crees": 0, "reutilises": 0,
+                   "existants": {db.as_pointer() for t in TYPES_SUIVIS for db in getattr(bpy.data, t)}})
+
+    detail = ", ".join(f"{n} {t}" for t, n in sorted(retires.items())) or "rien"
+    bprint(f"🧹 Build {_build['id']} : {avant} datablocks avant purge, supprimés : {detail} "
+           f"(~{octets / (1024 * 1024):.1f} Mo récupérés)")
+    return _build["id"]
+
+
+def terminer_build():
+    """
+    Marque du build en cours tous les datablocks apparus depuis demarrer_build() : le prochain build
+    pourra les purger s'ils deviennent orphelins.
+
+    Returns:
+        int: Nombre de datablocks marqués.
+    """
+    if _build["id"] is None:
+        return 0
+    marques = 0
+    for type_donnees in TYPES_SUIVIS:
+        for db in getattr(bpy.data, type_donnees):
+            if db.library is None and db.as_pointer() not in _build["existants"]:
+                db[PROP_BUILD] = _build["id"]
+                marques += 1
+    return marques
+
+
+def obtenir(type_donnees, famille, params=None, creer=None):
+    """
+    Get-or-create par clé de contenu.
+
+    Args:
+        type_donnees (str): Attribut de bpy.data ("materials", "textures", ...).
+        famille (str): Nom du datablock et de sa "recette" (deux familles ne partagent jamais un datablock).
+        params (dict): Ce qui change le contenu (force, échelle, ...).
+        creer (callable): creer(nom) -> datablock ; par défaut bpy.data.<type>.new(nom).
+
+    Returns:
+        tuple: (datablock, cree) ; cree est False si un datablock de même clé existait déjà.
+    """
+    cle = _cle_contenu(type_donnees, famille, params)
+    for db in getattr(bpy.data, type_donnees):
+        if db.get(PROP_CLE) == cle:
+            db[PROP_BUILD] = _build["id"] or ""
+            _build["reutilises"] += 1
+            return db, False
+
+    db = creer(famille) if creer else getattr(bpy.data, type_donnees).new(famille)
+    db[PROP_CLE] = cle
+    db[PROP_BUILD] = _build["id"] or ""
+    _build["crees"] += 1
+    return db, True
+
+
+def materiau(famille, params=None):
+    """Matériau partagé par clé de contenu : (mat, cree), les nœuds ne sont à construire que si cree"""
+    return obtenir("materials", famille, params)
+
+
+def texture(famille, type_texture, params=None):
+    """Texture partagée par clé de contenu : (tex, cree)"""
+    return obtenir("textures", famille, dict(params or {}, type=type_texture),
+                   lambda nom: bpy.data.textures.new(nom, type=type_texture))
+
+
+def rapport_donnees():
+    """Affiche les datablocks créés / réutilisés par le build et le total par type"""
+    totaux = ", ".join(f"{len(getattr(bpy.data, t))} {t}" for t in TYPES_SUIVIS)
+    bprint(f"📦 Datablocks : {_build['crees']} créé(s), {_build['reutilises']} réutilisé(s) par clé | {totaux}")
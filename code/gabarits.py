@@ -0,0 +1,140 @@
+import os
+import re
+
+import bpy
+
+from utils import bprint
+import mesh_cache
+
+
+
+# Bibliothèque .blend des gabarits : un fichier par (gabarit, paramètres, code du constructeur)
+DOSSIER_GABARITS = os.path.join(mesh_cache.DOSSIER_CACHE, "gabarits")
+
+# Propriété posée sur chaque gabarit : sa clé (le gabarit est retrouvé par elle, pas par son nom)
+PROP_GABARIT = "gabarit_cle"
+
+NOM_COLLECTION = "GABARITS"
+
+_stats = {"session": 0, "bibliotheque": 0, "construits": 0}
+
+
+
+def cle_gabarit(nom, params, *fonctions):
+    """
+    Clé d'un gabarit : son nom, ses paramètres (épaisseur de neige, noms des matériaux, ...) et le code source
+    des fonctions qui le construisent (comme mesh_cache.cle_cache) : modifier le constructeur invalide la bibliothèque.
+    """
+    return mesh_cache.cle_cache(nom, params, *fonctions)
+
+
+def _collection_gabarits():
+    col = bpy.data.collections.get(NOM_COLLECTION)
+    if col is None:
+        col = bpy.data.collections.new(NOM_COLLECTION)
+        bpy.context.scene.collection.children.link(col)
+    return col
+
+
+def _ranger(obj):
+    """Déplace le gabarit dans la collection GABARITS (et seulement elle)"""
+    col = _collection_gabarits()
+    for autre in list(obj.users_collection):
+        if autre != col:
+            autre.objects.unlink(obj)
+    if obj.name not in col.objects:
+        col.objects.link(obj)
+
+
+def _rebrancher_materiaux(obj):
+    """Après un chargement, remplace les doublons "Mat.001" par les matériaux déjà présents dans la session"""
+    if not obj.data or not hasattr(obj.data, "materials"):
+        return
+    for i, mat in enumerate(obj.data.materials):
+        if mat is None:
+            continue
+        base = re.sub(r"\.\d{3}$", "", mat.name)
+        existant = bpy.data.materials.get(base)
+        if existant is not None and existant != mat:
+            obj.data.materials[i] = existant
+            if mat.users == 0:
+                bpy.data.materials.remove(mat)
+
+
+def _charger_bibliotheque(cle):
+    chemin = os.path.join(DOSSIER_GABARITS, cle + ".blend")
+    if not os.path.exists(chemin):
+        return None
+    with bpy.data.libraries.load(chemin, link=False) as (depuis, vers):
+        vers.objects = [nom for nom in depuis.objects if nom == cle]
+    if not vers.objects:
+        return None
+    obj = vers.objects[0]
+    _rebrancher_materiaux(obj)
+    return obj
+
+
+def get_or_build(nom, params, construire, *args, dependances=()):
+    """
+    Retourne le gabarit (objet maître) correspondant à (nom, params), en le construisant au plus une fois.
+
+    Ordre de recherche : objet déjà présent dans la session, puis bibliothèque .blend sur disque,
+    puis construction (le résultat est alors écrit dans la bibliothèque).
+
+    Args:
+        nom (str): Nom du gabarit ("Tombe_Master", ...).
+        params (dict): Tout ce qui change la géométrie ou les matériaux du gabarit.
+        construire (callable): Fonction qui crée l'objet, appelée avec *args ; son code source fait partie de la clé.
+        *args: Arguments de construire (matériaux, ...) ; ce qui change le résultat doit aussi figurer dans params.
+        dependances (tuple): Autres fonctions dont le code source fait partie de la clé (helpers du constructeur).
+
+    Returns:
+        bpy.types.Object: Le gabarit, rangé dans la collection GABARITS.
+    """
+    cle = cle_gabarit(nom, params, construire, *dependances)
+
+    # Seuls les objets de la collection GABARITS comptent : une copie posée dans la scène n'est jamais un gabarit
+    col = bpy.data.collections.get(NOM_COLLECTION)
+    for obj in (col.objects if col is not None else ()):
+        if obj.get(PROP_GABARIT) == cle:
+            _stats["session"] += 1
+            _ranger(obj)
+            return obj
+
+    obj = _charger_bibliotheque(cle)
+    if obj is not None:
+        _stats["bibliotheque"] += 1
+    else:
+        obj = construire(*args)
+        # Le nom du fichier de bibliothèque et celui de l'objet sont la clé : aucun conflit entre versions
+        obj.name = cle
+        obj[PROP_GABARIT] = cle
+        os.makedirs(DOSSIER_GABARITS, exist_ok=True)
+        bpy.data.libraries.write(os.path.join(DOSSIER_GABARITS, cle + ".blend"), {obj}, fake_user=True)
+        _stats["construits"] += 1
+
+    _ranger(obj)
+    return obj
+
+
+def est_gabarit(obj):
+    """Vrai pour un gabarit rangé dans GABARITS (pas pour une copie qui aurait gardé sa clé)"""
+    return PROP_GABARIT in obj and any(c.name == NOM_COLLECTION for c in obj.users_collection)
+
+
+def copier(gabarit):
+    """
+    Copie d'un gabarit à placer dans la scène (même maillage, partagé).
+
+    La clé du gabarit n'est pas recopiée : la copie est un objet ordinaire, supprimé au nettoyage
+    de la scène comme les autres et jamais repris pour un gabarit.
+    """
+    copie = gabarit.copy()
+    if PROP_GABARIT in copie:
+        del copie[PROP_GABARIT]
+    return copie
+
+
+def rapport_gabarits():
+    bprint(f"🧱 Gabarits : {_stats['session']} réutilisé(s) en session, {_stats['bibliotheque']} chargé(s) "
+           f"depuis la bibliothèque, {_stats['construits']} construit(s)")
@@ -0,0 +1,401 @@
+import sys
+import time
+import contextlib
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import bruit
+
+
+
+# ==========================================
+#  GÉOMÉTRIE DES ÎLES SANS BPY
+# ==========================================
+#
+# Tout le calcul d'une île (sphère de base, sculpture bol + plateau + pic, relief rocheux) sur des tableaux
+# NumPy, sans bpy : ce module peut être importé dans un processus de calcul (voir island.construire_iles).
+# Le résultat est un dictionnaire de tableaux au format de mesh_cache.construire_maillage().
+#
+# Le relief "cuit" remplace la pile Subdivision + Displace Voronoi + Displace Clouds de
+# create_massive_vertical_fortress : la sphère est directement créée à la résolution de la subdivision
+# (segments et anneaux x 2^niveau), puis déplacée le long des normales avec les mêmes forces, échelles
+# et mid_level que les modificateurs, pondérées par le masque de roche.
+#
+# Pour une île très dense, le relief lui-même est découpé en blocs de sommets évalués par plusieurs
+# processus sur des tableaux en mémoire partagée (voir relief_parallele).
+
+# Nombre de sommets par bloc du relief parallèle
+TAILLE_BLOC = 65536
+
+# Durée maximale (s) d'un calcul confié aux processus : au-delà, ils sont tués (un processus bloqué ne bloque pas Blender)
+DELAI_CALCUL = 600
+
+
+
+def sculpter_fortress(co, radius, rim_height, rim_thickness, spike_depth, stretch_z):
+    """
+    Calcule la forme bol + plateau + pic de l'île sur tout le tableau de sommets à la fois (NumPy).
+
+    Args:
+        co (np.ndarray): Coordonnées (N, 3) des sommets de la sphère d'origine.
+        radius (float): Le rayon total de l'île.
+        rim_height (float): La hauteur maximale des falaises.
+        rim_thickness (float): L'épaisseur des falaises extérieures.
+        spike_depth (float): La profondeur du pic rocheux sous l'île.
+        stretch_z (float): Le facteur d'étirement vertical appliqué ensuite à l'objet.
+
+    Returns:
+        tuple: (z (N,) les nouvelles hauteurs, roche (N,) booléen : True = poids 1 dans Rock_Mask)
+    """
+    co = np.asarray(co, dtype=np.float64)
+    x, y, z = co[:, 0], co[:, 1], co[:, 2]
+
+    # Distance 'r' de chaque point au centre sur le plan 2D (axes X et Y)
+    r = np.hypot(x, y)
+    plateau_radius = radius - rim_thickness
+
+    haut = z >= 0
+    plateau = haut & (r < plateau_radius)
+
+    # Moitié haute : falaise qui monte de 0 à rim_height depuis le bord du plateau
+    normalized_r = (r - plateau_radius) / rim_thickness
+    z_falaise = (normalized_r * rim_height) / stretch_z
+
+    # Moitié basse : on descend de la base de la falaise jusqu'au pic
+    normalized_z = (z + radius) / radius
+    z_pic = (-spike_depth + normalized_z * (rim_height + spike_depth)) / stretch_z
+
+    # Le plateau est écrasé à 0, le reste suit la falaise ou le pic
+    nouveau_z = np.where(haut, np.where(plateau, 0.0, z_falaise), z_pic)
+
+    return nouveau_z, ~plateau
+
+
+
+# ==========================================
+#  MAILLAGE DE BASE
+# ==========================================
+
+def sphere_uv(rayon, segments, anneaux):
+    """
+    Sphère UV de même topologie que primitive_uv_sphere_add : deux pôles, anneaux - 1 cercles de segments
+    sommets, des quads entre les cercles et un éventail de triangles à chaque pôle (normales vers l'extérieur).
+
+    Returns:
+        tuple: (co (N, 3) float64, boucles, debuts, tailles) en int32
+    """
+    theta = np.pi * np.arange(1, anneaux) / anneaux
+    phi = 2 * np.pi * np.arange(segments) / segments
+    st, ct = np.sin(theta)[:, None], np.cos(theta)[:, None]
+    cercles = np.stack(np.broadcast_arrays(st * np.cos(phi), st * np.sin(phi), ct), axis=-1).reshape(-1, 3)
+    co = rayon * np.concatenate(([[0.0, 0.0, 1.0]], cercles, [[0.0, 0.0, -1.0]]))
+
+    nord, sud = 0, len(co) - 1
+    j = np.arange(segments)
+    suivant = (j + 1) % segments
+    # indice du sommet j du cercle i (i = 0 : le plus proche du pôle nord)
+    def sommet(i, j):
+        return 1 + i * segments + j
+
+    haut = np.column_stack((np.full(segments, nord), sommet(0, j), sommet(0, suivant)))
+    i = np.repeat(np.arange(anneaux - 2), segments)
+    jj, ss = np.tile(j, anneaux - 2), np.tile(suivant, anneaux - 2)
+    quads = np.column_stack((sommet(i, jj), sommet(i + 1, jj), sommet(i + 1, ss), sommet(i, ss)))
+    bas = np.column_stack((sommet(anneaux - 2, j), np.full(segments, sud), sommet(anneaux - 2, suivant)))
+
+    boucles = np.concatenate((haut.ravel(), quads.ravel(), bas.ravel())).astype(np.int32)
+    tailles = np.concatenate((np.full(segments, 3), np.full(len(quads), 4), np.full(segments, 3))).astype(np.int32)
+    debuts = (np.cumsum(tailles) - tailles).astype(np.int32)
+    return co, boucles, debuts, tailles
+
+
+def normales_sommets(co, boucles, debuts, tailles):
+    """
+    Normales des sommets : somme des normales des faces voisines pondérées par leur aire, normalisée.
+    Les faces sont découpées en éventail de triangles depuis leur premier sommet.
+    """
+    face = np.repeat(np.arange(len(debuts)), tailles)
+    rang = np.arange(len(boucles)) - debuts[face]
+    milieu = (rang >= 1) & (rang <= tailles[face] - 2)
+    indices = np.nonzero(milieu)[0]
+    a, b, c = boucles[debuts[face[indices]]], boucles[indices], boucles[indices + 1]
+
+    n_tri = np.cross(co[b] - co[a], co[c] - co[a])
+    normales = np.zeros_like(co)
+    for sommets in (a, b, c):
+        for axe in range(3):
+            normales[:, axe] += np.bincount(sommets, weights=n_tri[:, axe], minlength=len(co))
+    longueur = np.linalg.norm(normales, axis=1)
+    return normales / np.maximum(longueur, 1e-12)[:, None]
+
+
+
+# ==========================================
+#  RELIEF ROCHEUX
+# ==========================================
+
+def relief_macro(co, normales, poids, rock_width, rock_protrusion, graine=0):
+    """Displace "Macro_Deform" : Voronoi de taille rock_width, force rock_protrusion, mid_level 0.5, masqué"""
+    valeur = bruit.voronoi_3d(co[:, 0], co[:, 1], co[:, 2], echelle=rock_width, graine=graine)
+    return co + normales * (rock_protrusion * poids * (valeur - 0.5))[:, None]
+
+
+def relief_micro(co, normales, poids, micro_detail, graine=0):
+    """Displace "Micro_Deform" : Clouds de taille 1 (noise_depth 2), force micro_detail, mid_level 0.5, masqué"""
+    valeur = bruit.fbm_3d(co[:, 0], co[:, 1], co[:, 2], echelle=1.0, octaves=3, graine=graine)
+    return co + normales * (micro_detail * poids * (valeur - 0.5))[:, None]
+
+
+
+# ==========================================
+#  RELIEF PARALLÈLE EN MÉMOIRE PARTAGÉE
+# ==========================================
+
+def contexte_processus():
+    """
+    'spawn' sur toutes les plateformes : chaque processus de calcul est un interpréteur neuf qui réimporte
+    ce module (il ne dépend pas de bpy). 'fork' dupliquerait Blender en cours d'exécution (fils d'exécution,
+    état bpy et GL), ce qui peut bloquer le processus fils.
+    """
+    return multiprocessing.get_context("spawn")
+
+
+@contextlib.contextmanager
+def ouvrir_pool(processus):
+    """
+    Pool de processus de calcul, tués à la sortie du bloc (multiprocessing.Pool.terminate, même s'ils sont bloqués).
+
+    Sous Blender, __main__ est le script main.py, qui importe bpy : 'spawn' le réexécuterait dans chaque
+    processus. Son chemin est masqué le temps de démarrer les processus, qui n'importent alors que ce module.
+    """
+    principal = sys.modules.get("__main__")
+    masques = {attr: getattr(principal, attr) for attr in ("__file__", "__spec__") if hasattr(principal, attr)}
+    try:
+        for attr in masques:
+            if attr == "__spec__":
+                principal.__spec__ = None
+            else:
+                delattr(principal, attr)
+        pool = contexte_processus().Pool(processus)
+    finally:
+        for attr, valeur in masques.items():
+            setattr(principal, attr, valeur)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def executer(pool, fonction, taches, delai=DELAI_CALCUL):
+    """
+    pool.map avec un délai : lève multiprocessing.TimeoutError si les processus n'ont pas fini à temps
+    (processus bloqué ou mort), au lieu d'attendre indéfiniment.
+    """
+    return pool.map_async(fonction, taches).get(delai)
+
+
+def _partager(tableau):
+    """Copie un tableau dans un segment de mémoire partagée ; renvoie (segment, vue NumPy sur le segment)"""
+    segment = shared_memory.SharedMemory(create=True, size=max(tableau.nbytes, 1))
+    vue = np.ndarray(tableau.shape, dtype=tableau.dtype, buffer=segment.buf)
+    vue[:] = tableau
+    return segment, vue
+
+
+def _attacher(nom):
+    """
+    Ouvre un segment créé par le processus principal. Depuis Python 3.13, track=False évite que le processus
+    de calcul l'enregistre aussi auprès du resource_tracker (seul le créateur le libère, par unlink).
+    """
+    try:
+        return shared_memory.SharedMemory(name=nom, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=nom)
+
+
+def _relief_bloc(tache):
+    """
+    Relief d'un bloc de sommets [debut, fin) (exécuté dans un processus de calcul).
+    Les coordonnées sont lues et réécrites sur place dans la mémoire partagée : rien n'est copié au retour.
+    """
+    etape, noms, nb_sommets, debut, fin, reglages = tache
+    segments = [_attacher(nom) for nom in noms]
+    try:
+        co, normales = (np.ndarray((nb_sommets, 3), dtype=np.float64, buffer=s.buf) for s in segments[:2])
+        poids = np.ndarray((nb_sommets,), dtype=np.float64, buffer=segments[2].buf)
+        bloc = slice(debut, fin)
+        if etape == "macro":
+            co[bloc] = relief_macro(co[bloc], normales[bloc], poids[bloc], **reglages)
+        else:
+            co[bloc] = relief_micro(co[bloc], normales[bloc], poids[bloc], **reglages)
+        del co, normales, poids
+    finally:
+        for s in segments:
+            s.close()
+    return fin - debut
+
+
+def relief_parallele(co, topologie, poids, params, processus=None, taille_bloc=TAILLE_BLOC, pool=None,
+                     delai=DELAI_CALCUL):
+    """
+    Relief Voronoi + Clouds de calculer_ile, évalué par blocs de sommets dans plusieurs processus.
+
+    Coordonnées, normales et poids sont placés en mémoire partagée ; chaque processus déplace sur place
+    les sommets de ses blocs (disjoints). Les normales, qui dépendent des faces voisines, sont recalculées
+    entre les deux étapes dans le processus principal. Le résultat est identique au calcul séquentiel.
+
+    Args:
+        co (np.ndarray): Coordonnées sculptées (N, 3).
+        topologie (tuple): (boucles, debuts, tailles) du maillage.
+        poids (np.ndarray): Masque de roche (N,).
+        params (dict): rock_width, rock_protrusion, micro_detail, graine.
+        processus (int): Nombre de processus (par défaut un par cœur).
+        taille_bloc (int): Nombre de sommets par bloc.
+        pool (multiprocessing.Pool): Pool existant à réutiliser (sinon un pool est créé pour l'appel, voir ouvrir_pool).
+        delai (float): Durée maximale de chaque étape avant d'abandonner (multiprocessing.TimeoutError).
+
+    Returns:
+        np.ndarray: Coordonnées déplacées (N, 3).
+    """
+    graine = params.get("graine", 0)
+    etapes = []
+    if params.get("rock_protrusion", 0.0):
+        etapes.append(("macro", {"rock_width": params["rock_width"], "rock_protrusion": params["rock_protrusion"],
+                                 "graine": graine}))
+    if params.get("micro_detail", 0.0):
+        etapes.append(("micro", {"micro_detail": params["micro_detail"], "graine": graine + 1}))
+    if not etapes:
+        return co
+
+    nb_sommets = len(co)
+    seg_co, co_partage = _partager(np.ascontiguousarray(co, dtype=np.float64))
+    seg_normales, normales_partagees = _partager(np.zeros((nb_sommets, 3)))
+    seg_poids, poids_partage = _partager(np.ascontiguousarray(poids, dtype=np.float64))
+    segments = (seg_co, seg_normales, seg_poids)
+    noms = [segment.name for segment in segments]
+    blocs = [(debut, min(debut + taille_bloc, nb_sommets)) for debut in range(0, nb_sommets, taille_bloc)]
+
+    try:
+        with contextlib.ExitStack() as pile:
+            if pool is None:
+                pool = pile.enter_context(ouvrir_pool(processus or multiprocessing.cpu_count()))
+            for etape, reglages in etapes:
+                normales_partagees[:] = normales_sommets(co_partage, *topologie)
+                taches = [(etape, noms, nb_sommets, debut, fin, reglages) for debut, fin in blocs]
+                executer(pool, _relief_bloc, taches, delai)
+        resultat = co_partage.copy()
+    finally:
+        # les vues NumPy doivent disparaître avant de fermer les segments
+        del co_partage, normales_partagees, poids_partage
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+    return resultat
+
+
+
+# ==========================================
+#  CALCUL COMPLET D'UNE ÎLE
+# ==========================================
+
+def calculer_ile(params, pool=None):
+    """
+    Calcule toute la géométrie d'une île (fonction exécutée dans un processus de calcul).
+
+    Args:
+        params (dict): Paramètres de create_massive_vertical_fortress (radius, rim_height, rim_thickness,
+            spike_depth, rock_protrusion, rock_width, stretch_z, micro_detail, segments, ring_count) plus
+            niveau (niveaux de subdivision cuits dans la sphère) et graine. processus_relief > 1 répartit
+            le relief sur plusieurs processus par blocs de taille_bloc sommets (voir relief_parallele).
+        pool (multiprocessing.Pool): Pool du relief réparti, réutilisé d'une île à l'autre (voir ouvrir_pool) ;
+            sans pool, relief_parallele en ouvre un pour l'île.
+
+    Returns:
+        dict: name, donnees (tableaux pour mesh_cache.construire_maillage), roche (uint8), temps (s).
+    """
+    debut = time.perf_counter()
+    facteur = 2 ** params.get("niveau", 0)
+    graine = params.get("graine", 0)
+
+    co, boucles, debuts, tailles = sphere_uv(params["radius"], params["segments"] * facteur, params["ring_count"] * facteur)
+
+    nouveau_z, roche = sculpter_fortress(co, params["radius"], params["rim_height"], params["rim_thickness"],
+                                         params["spike_depth"], params["stretch_z"])
+    co[:, 2] = nouveau_z
+    poids = roche.astype(np.float64)
+
+    if params.get("processus_relief", 1) > 1:
+        co = relief_parallele(co, (boucles, debuts, tailles), poids, params, params["processus_relief"],
+                              params.get("taille_bloc", TAILLE_BLOC), pool=pool)
+    else:
+        if params.get("rock_protrusion", 0.0):
+            normales = normales_sommets(co, boucles, debuts, tailles)
+            co = relief_macro(co, normales, poids, params["rock_width"], params["rock_protrusion"], graine)
+        if params.get("micro_detail", 0.0):
+            normales = normales_sommets(co, boucles, debuts, tailles)
+            co = relief_micro(co, normales, poids, params["micro_detail"], graine + 1)
+
+    nb_faces = len(debuts)
+    donnees = {
+        "co": co.astype(np.float32).ravel(),
+        "boucles": boucles,
+        "debuts": debuts,
+        "tailles": tailles,
+        "materiau": np.zeros(nb_faces, dtype=np.int32),
+        "lisse": np.ones(nb_faces, dtype=bool),
+    }
+    return {"name": params["name"], "donnees": donnees, "roche": roche.astype(np.uint8),
+            "temps": time.perf_counter() - debut}
+
+
+
+def benchmark_relief(segments=512, ring_count=256, niveau=1, processus=None, taille_bloc=TAILLE_BLOC, **params):
+    """
+    Mesure le relief d'une île dense de 1 à N processus et vérifie que le résultat ne dépend pas du découpage.
+
+    Args:
+        segments, ring_count, niveau: résolution de la sphère (512 x 256 au niveau 1 : ~520 000 sommets).
+        processus (list): Nombres de processus à mesurer (par défaut 1, 2, 4, ... jusqu'au nombre de cœurs).
+        taille_bloc (int): Nombre de sommets par bloc.
+        **params: Forme de l'île (par défaut celle de Wano_Base).
+
+    Returns:
+        list: (processus, temps en s) pour chaque mesure.
+    """
+    forme = {"radius": 150.0, "rim_height": 30.0, "rim_thickness": 18.0, "spike_depth": 155.0,
+             "rock_protrusion": 20.0, "rock_width": 20.0, "stretch_z": 1.5, "micro_detail": 0.5, "graine": 0}
+    forme.update(params)
+    facteur = 2 ** niveau
+    co, boucles, debuts, tailles = sphere_uv(forme["radius"], segments * facteur, ring_count * facteur)
+    nouveau_z, roche = sculpter_fortress(co, forme["radius"], forme["rim_height"], forme["rim_thickness"],
+                                         forme["spike_depth"], forme["stretch_z"])
+    co[:, 2] = nouveau_z
+    poids = roche.astype(np.float64)
+
+    coeurs = multiprocessing.cpu_count()
+    if processus is None:
+        processus = sorted({min(2 ** k, coeurs) for k in range(coeurs.bit_length() + 1)})
+
+    resultats, reference = [], None
+    for nb in processus:
+        debut = time.perf_counter()
+        if nb == 1:
+            resultat = co
+            for fonction, reglages in (
+                    (relief_macro, {"rock_width": forme["rock_width"], "rock_protrusion": forme["rock_protrusion"],
+                                    "graine": forme["graine"]}),
+                    (relief_micro, {"micro_detail": forme["micro_detail"], "graine": forme["graine"] + 1})):
+                resultat = fonction(resultat, normales_sommets(resultat, boucles, debuts, tailles), poids, **reglages)
+        else:
+            resultat = relief_parallele(co, (boucles, debuts, tailles), poids, forme, nb, taille_bloc)
+        duree = time.perf_counter() - debut
+
+        reference = resultat if reference is None else reference
+        identique = np.array_equal(resultat, reference)
+        print(f"Relief {len(co)} sommets, {nb} processus, blocs de {taille_bloc} : {duree:.2f} s "
+              f"(x{resultats[0][1] / duree if resultats else 1.0:.2f}), identique : {identique}")
+        resultats.append((nb, duree))
+    return resultats
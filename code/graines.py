@@ -0,0 +1,51 @@
+import random
+import hashlib
+
+import numpy as np
+
+
+
+# ==========================================
+#  FLUX ALÉATOIRES DÉTERMINISTES
+# ==========================================
+#
+# Une seule graine de construction (GRAINE dans main.py) ; chaque étape et chaque région en dérive
+# son propre flux : ("capitale", "maisons"), ("ringo", "tombes"), ...
+# La dérivation ne dépend que de (graine, chemin) : une région reconstruite seule, dans un autre
+# processus ou au milieu de l'archipel complet tire exactement les mêmes nombres.
+#
+# Avec graine=None, chaque flux est tiré au hasard (comportement historique, deux builds diffèrent).
+
+
+
+def graine_derivee(graine, *chemin):
+    """
+    Calcule la graine entière (63 bits) d'un flux.
+
+    Args:
+        graine (int): La graine de construction, ou None pour une graine aléatoire.
+        *chemin (str): Le nom de l'étape puis de la région, ex : "capitale", "maisons".
+
+    Returns:
+        int: La graine du flux.
+    """
+    if graine is None:
+        return random.SystemRandom().getrandbits(63)
+    # hashlib plutôt que hash() : hash() des chaînes change à chaque lancement de Python
+    texte = "/".join([str(graine)] + [str(c) for c in chemin])
+    return int.from_bytes(hashlib.sha256(texte.encode("utf-8")).digest()[:8], "little") >> 1
+
+
+def flux(graine, *chemin):
+    """Flux random.Random indépendant pour une étape (mêmes méthodes que le module random)"""
+    return random.Random(graine_derivee(graine, *chemin))
+
+
+def flux_numpy(graine, *chemin):
+    """Flux np.random.Generator indépendant pour une étape (tirages par tableaux)"""
+    return np.random.default_rng(graine_derivee(graine, *chemin))
+
+
+def graine_blender(graine, *chemin):
+    """Graine entière positive pour les propriétés "seed" de Blender (particules, bruits), limitées à 2^31"""
+    return graine_derivee(graine, *chemin) % (2 ** 31 - 1)
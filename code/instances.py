@@ -0,0 +1,178 @@
+import numpy as np
+import bpy
+
+
+
+# ==========================================
+#  OUTILS GEOMETRY NODES
+# ==========================================
+
+def nouvel_arbre_geonodes(nom):
+    """
+    Crée (ou recrée) un arbre Geometry Nodes avec une entrée et une sortie "Geometry".
+
+    Returns:
+        tuple: (arbre, noeud_entree, noeud_sortie)
+    """
+    ancien = bpy.data.node_groups.get(nom)
+    if ancien:
+        bpy.data.node_groups.remove(ancien)
+
+    arbre = bpy.data.node_groups.new(nom, 'GeometryNodeTree')
+    # L'API des sockets d'interface a changé en Blender 4.0
+    if hasattr(arbre, "interface"):
+        arbre.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+        arbre.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    else:
+        arbre.inputs.new('NodeSocketGeometry', "Geometry")
+        arbre.outputs.new('NodeSocketGeometry', "Geometry")
+
+    entree = arbre.nodes.new('NodeGroupInput')
+    entree.location = (-800, 0)
+    sortie = arbre.nodes.new('NodeGroupOutput')
+    sortie.location = (800, 0)
+    return arbre, entree, sortie
+
+
+def sortie_active(noeud):
+    """Premier socket de sortie actif (les nœuds à type variable cachent les autres selon les versions)"""
+    return next(s for s in noeud.outputs if s.enabled)
+
+
+def lire_attribut(arbre, nom, data_type='FLOAT', location=(0, 0)):
+    """Ajoute un nœud Named Attribute et retourne sa sortie"""
+    noeud = arbre.nodes.new('GeometryNodeInputNamedAttribute')
+    noeud.data_type = data_type
+    noeud.inputs["Name"].default_value = nom
+    noeud.location = location
+    return sortie_active(noeud)
+
+
+def noeud_math(arbre, operation, a, b=None, location=(0, 0)):
+    """
+    Ajoute un nœud Math et retourne sa sortie.
+
+    Args:
+        a, b: Un socket de sortie à brancher, ou un nombre (valeur par défaut de l'entrée).
+    """
+    noeud = arbre.nodes.new('ShaderNodeMath')
+    noeud.operation = operation
+    noeud.location = location
+    for entree, valeur in zip(noeud.inputs, (a, b)):
+        if valeur is None:
+            continue
+        if isinstance(valeur, bpy.types.NodeSocket):
+            arbre.links.new(valeur, entree)
+        else:
+            entree.default_value = valeur
+    return noeud.outputs[0]
+
+
+
+# ==========================================
+#  PORTEURS D'INSTANCES
+# ==========================================
+
+def arbre_instanciation(nom, sources):
+    """
+    Construit l'arbre qui instancie sources[asset_index] sur chaque point du porteur,
+    avec la rotation (euler) et l'échelle lues dans les attributs des points.
+    """
+    arbre, entree, sortie = nouvel_arbre_geonodes(nom)
+    noeuds, liens = arbre.nodes, arbre.links
+
+    asset = lire_attribut(arbre, "asset_index", 'FLOAT', (-600, 300))
+    rotation = lire_attribut(arbre, "rot_instance", 'FLOAT_VECTOR', (-600, 100))
+    echelle = lire_attribut(arbre, "echelle_instance", 'FLOAT_VECTOR', (-600, -100))
+
+    joindre = noeuds.new('GeometryNodeJoinGeometry')
+    joindre.location = (600, 0)
+    liens.new(joindre.outputs["Geometry"], sortie.inputs[0])
+
+    for i, source in enumerate(sources):
+        y = -300 * i
+
+        info = noeuds.new('GeometryNodeObjectInfo')
+        info.location = (-200, y)
+        info.transform_space = 'ORIGINAL'
+        info.inputs["Object"].default_value = source
+        info.inputs["As Instance"].default_value = True
+
+        # Sélection des points dont asset_index == i
+        selection = noeuds.new('ShaderNodeMath')
+        selection.location = (-200, y - 150)
+        selection.operation = 'COMPARE'
+        liens.new(asset, selection.inputs[0])
+        selection.inputs[1].default_value = float(i)
+        selection.inputs[2].default_value = 0.5
+
+        instancier = noeuds.new('GeometryNodeInstanceOnPoints')
+        instancier.location = (200, y)
+        liens.new(entree.outputs[0], instancier.inputs["Points"])
+        liens.new(selection.outputs[0], instancier.inputs["Selection"])
+        liens.new(info.outputs["Geometry"], instancier.inputs["Instance"])
+        liens.new(rotation, instancier.inputs["Rotation"])
+        liens.new(echelle, instancier.inputs["Scale"])
+        liens.new(instancier.outputs["Instances"], joindre.inputs["Geometry"])
+
+    return arbre
+
+
+def nuage_de_points(nom, positions, attributs=None):
+    """
+    Crée un maillage fait uniquement de sommets, avec des attributs par point.
+
+    Args:
+        nom (str): Nom du maillage.
+        positions (array): (N, 3) positions des points.
+        attributs (dict): nom -> (valeurs, 'FLOAT' | 'INT' | 'FLOAT_VECTOR' | 'FLOAT_COLOR').
+
+    Returns:
+        bpy.types.Mesh: Le maillage.
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    mesh = bpy.data.meshes.new(nom)
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set("co", positions.ravel())
+
+    champs = {'FLOAT': "value", 'INT': "value", 'FLOAT_VECTOR': "vector", 'FLOAT_COLOR': "color"}
+    for nom_attr, (valeurs, type_attr) in (attributs or {}).items():
+        dtype = np.int32 if type_attr == 'INT' else np.float32
+        attr = mesh.attributes.new(nom_attr, type_attr, 'POINT')
+        attr.data.foreach_set(champs[type_attr], np.asarray(valeurs, dtype=dtype).ravel())
+    mesh.update()
+    return mesh
+
+
+def creer_porteur_instances(nom, sources, positions, rotations, echelles, indices, attributs=None, collection=None):
+    """
+    Crée un seul objet "porteur" : un nuage de sommets (un par placement) instancié par Geometry Nodes.
+
+    Args:
+        nom (str): Nom de l'objet porteur.
+        sources (list): Objets modèles ; le placement d'indice i utilise sources[indices[i]].
+        positions (array): (N, 3) positions monde.
+        rotations (array): (N, 3) rotations euler XYZ en radians.
+        echelles (array): (N, 3) échelles.
+        indices (array): (N,) indice du modèle de chaque placement.
+        attributs (dict): Attributs supplémentaires par point : nom -> (valeurs, 'FLOAT' | 'FLOAT_COLOR' | 'FLOAT_VECTOR').
+            Ils sont propagés aux instances et lisibles par les shaders (nœud Attribute en mode Instancer).
+        collection (bpy.types.Collection): Collection où lier le porteur (collection active par défaut).
+
+    Returns:
+        bpy.types.Object: Le porteur.
+    """
+    tous = {
+        "rot_instance": (rotations, 'FLOAT_VECTOR'),
+        "echelle_instance": (echelles, 'FLOAT_VECTOR'),
+        "asset_index": (indices, 'INT'),
+    }
+    tous.update(attributs or {})
+    mesh = nuage_de_points(nom, positions, tous)
+
+    porteur = bpy.data.objects.new(nom, mesh)
+    (collection or bpy.context.collection).objects.link(porteur)
+
+    mod = porteur.modifiers.new(name="Instances", type='NODES')
+    mod.node_group = arbre_instanciation(f"GN_{nom}", sources)
+    return porteur
@@ -1,13 +1,124 @@
 import numpy as np
 import math
+import time
+import inspect
+import multiprocessing
 
 import bpy
 
-from utils import bprint
+from utils import bprint, lire_sommets, ecrire_sommets
+import mesh_cache
+import donnees
+import budget
+import primitives
+import bruit
+import geometrie_ile
+from geometrie_ile import sculpter_fortress
 
 
 
 
+def _sculpter_par_sommet(island, vg, radius, rim_height, rim_thickness, spike_depth, stretch_z):
+    """
+    Ancienne sculpture sommet par sommet (boucle Python). Conservée comme référence pour comparer_sculpture().
+    """
+    plateau_radius = radius - rim_thickness
+    for v in island.data.vertices:
+        r = math.hypot(v.co.x, v.co.y)
+        if v.co.z >= 0:
+            if r < plateau_radius:
+                v.co.z = 0
+                vg.add([v.index], 0.0, 'REPLACE')
+            else:
+                normalized_r = (r - plateau_radius) / rim_thickness
+                z_target = normalized_r * rim_height
+                v.co.z = z_target / stretch_z
+                vg.add([v.index], 1.0, 'REPLACE')
+        else:
+            normalized_z = (v.co.z + radius) / radius
+            z_target = -spike_depth + normalized_z * (rim_height + spike_depth)
+            v.co.z = z_target / stretch_z
+            vg.add([v.index], 1.0, 'REPLACE')
+    island.data.update()
+
+
+
+def _sculpter_vectorise(island, vg, radius, rim_height, rim_thickness, spike_depth, stretch_z):
+    """
+    Sculpte l'île avec sculpter_fortress() : une lecture foreach_get, une écriture foreach_set
+    et deux appels groupés à vg.add pour le masque.
+    """
+    co = lire_sommets(island.data)
+    nouveau_z, roche = sculpter_fortress(co, radius, rim_height, rim_thickness, spike_depth, stretch_z)
+    co[:, 2] = nouveau_z
+    ecrire_sommets(island.data, co)
+
+    # Poids 0 : le plateau est protégé des rochers / Poids 1 : falaise et dessous 100% rocheux
+    indices = np.arange(len(co))
+    vg.add(indices[~roche].tolist(), 0.0, 'REPLACE')
+    vg.add(indices[roche].tolist(), 1.0, 'REPLACE')
+
+    return roche
+
+
+
+def _materiau_roche():
+    """Matériau de roche commun à toutes les îles (créé une seule fois dans le fichier)"""
+    mat_name = "Wano_Manga_Rock"
+    # Vérifie si le matériau existe déjà dans le fichier pour ne pas le créer 50 fois
+    if mat_name not in bpy.data.materials:
+        # Crée le matériau
+        mat = bpy.data.materials.new(name=mat_name)
+        mat.use_nodes = True # Active l'éditeur nodal
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+    
+        # Supprime les noeuds par défaut (sauf la sortie) pour faire table rase
+        for node in nodes:
+            if node.type != 'OUTPUT_MATERIAL':
+                nodes.remove(node)
+
+        # Récupère le noeud de sortie (Material Output)
+        output_node = nodes.get("Material Output")
+        
+        # Crée le shader principal (Principled BSDF)
+        bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+        bsdf.location = (0, 0)
+        bsdf.inputs["Roughness"].default_value = 0.9 # Pierre très mate (pas de brillance)
+    
+        # Crée un nœud de Bruit (Noise Texture) pour mélanger les couleurs aléatoirement
+        noise = nodes.new(type='ShaderNodeTexNoise')
+        noise.location = (-600, 0)
+        noise.inputs["Scale"].default_value = 5.0 # Taille des taches de couleur
+
+        # Crée un dégradé (ColorRamp) pour choisir les couleurs exactes
+        ramp = nodes.new(type='ShaderNodeValToRGB')
+        ramp.location = (-300, 0)
+
+        # Ajoute la première couleur : Un Saumon / Ocre
+        ramp.color_ramp.elements[0].position = 0.3
+        ramp.color_ramp.elements[0].color = (0.85, 0.55, 0.40, 1.0) 
+
+        # Ajoute la deuxième couleur : Un Beige clair
+        ramp.color_ramp.elements[1].position = 0.7
+        ramp.color_ramp.elements[1].color = (0.95, 0.85, 0.65, 1.0) 
+
+        # Connecte la sortie du bruit à l'entrée du dégradé
+        links.new(noise.outputs["Fac"], ramp.inputs["Fac"])
+
+        # Connecte les couleurs générées au Shader
+        links.new(ramp.outputs["Color"], bsdf.inputs["Base Color"])
+
+        # Connecte le Shader à la surface de l'objet final
+        links.new(bsdf.outputs["BSDF"], output_node.inputs["Surface"])
+    else:
+        # Si le matériau existait déjà, on le récupère simplement
+        mat = bpy.data.materials[mat_name]
+
+    return mat
+
+
+
 def create_massive_vertical_fortress(
     name="Onigashima_Base", 
     radius=50.0, 
@@ -18,7 +129,12 @@ def create_massive_vertical_fortress(
     rock_width=10.0, 
     stretch_z=3.5,
     micro_detail=0.5,
-    location=(0, 0, 0)
+    location=(0, 0, 0),
+    segments=128,
+    ring_count=64,
+    subdiv_rendu=3,
+    subdiv_vue=2,
+    utiliser_cache=True
 ):
     """
     Génère la base rocheuse d'Onigashima (ou une îles de Wano) avec de larges piliers rocheux verticaux.
@@ -35,88 +151,67 @@ def create_massive_vertical_fortress(
         stretch_z (float): Le facteur d'étirement vertical de l'île (crée l'effet de colonnes de basalte).
         micro_detail (float): L'intensité des petites aspérités de surface sur les gros blocs.
         location (tuple): Les coordonnées (X, Y, Z) où placer le centre du plateau de l'île.
+        segments (int): Nombre de découpes verticales de la sphère de base.
+        ring_count (int): Nombre de découpes horizontales de la sphère de base.
+        subdiv_rendu (int): Niveaux de subdivision au rendu (voir cout_triangles pour le budget).
+        subdiv_vue (int): Niveaux de subdivision dans le viewport (jamais plus qu'au rendu).
+        utiliser_cache (bool): Réutilise la forme sculptée depuis le cache disque si les paramètres n'ont pas changé.
 
     Returns:
         bpy.types.Object: L'objet Blender généré.
     """
-    # =========================================================================
-    # 1. CRÉATION DE LA GÉOMÉTRIE DE BASE
-    # =========================================================================
-
-    # Ajoute une sphère UV qui servira de "pâte à modeler" de base
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        segments=128,  # Nombre de découpes verticales (haute résolution requise pour les détails)
-        ring_count=64, # Nombre de découpes horizontales
-        radius=radius, # Applique le rayon total demandé
-        location=location # Place l'objet aux coordonnées demandées
-    )
-
-    # Récupère l'objet fraîchement créé pour le manipuler
-    island = bpy.context.active_object
-
-    # Renomme l'objet pour garder la scène propre
-    island.name = name
-
-    # =========================================================================
-    # 2. PRÉPARATION DU MASQUE (POUR PROTÉGER LE PLATEAU PLAT)
-    # =========================================================================
-
-    # Crée un groupe de sommets (Vertex Group) qui agira comme un masque de peinture
-    vg = island.vertex_groups.new(name="Rock_Mask")
-
-    # Calcule à partir de quel rayon (en partant du centre) la falaise doit commencer à monter
-    plateau_radius = radius - rim_thickness
-
-    # =========================================================================
-    # 3. SCULPTURE MATHÉMATIQUE DE LA FORME (BOL + PIC)
-    # =========================================================================
-
-    # Parcourt chaque sommet (point 3D) de la sphère pour modifier sa position
-    for v in island.data.vertices:
-
-        # Calcule la distance 'r' du point par rapport au centre sur le plan 2D (axes X et Y)
-        r = math.hypot(v.co.x, v.co.y)
-
-        # Si le point est sur la moitié haute de la sphère d'origine (Z positif)
-        if v.co.z >= 0:
-
-            # Si le point est à l'intérieur de la zone du plateau
-            if r < plateau_radius:
-                # On écrase sa hauteur à 0 pour créer un sol parfaitement plat
-                v.co.z = 0
-                # On lui assigne un poids de 0 dans le masque : les rochers ne l'affecteront pas
-                vg.add([v.index], 0.0, 'REPLACE')
-
-            # Si le point est sur les bords extérieurs (la future muraille)
-            else:
-                # On calcule une progression de 0 à 1 depuis le bord du plateau jusqu'au bord de l'île
-                normalized_r = (r - plateau_radius) / rim_thickness
-
-                # On calcule la hauteur cible (plus on s'éloigne, plus ça monte vers rim_height)
-                z_target = normalized_r * rim_height
+    # Seuls les paramètres qui changent la forme sculptée entrent dans la clé du cache
+    cle = mesh_cache.cle_cache("ile", {
+        "radius": radius, "rim_height": rim_height, "rim_thickness": rim_thickness,
+        "spike_depth": spike_depth, "stretch_z": stretch_z,
+        "segments": segments, "ring_count": ring_count,
+    }, sculpter_fortress)
+    en_cache = mesh_cache.charger(cle, name) if utiliser_cache else None
+
+    if en_cache:
+        # =====================================================================
+        # 1-3. GÉOMÉTRIE DÉJÀ SCULPTÉE, RELUE DEPUIS LE CACHE
+        # =====================================================================
+        mesh, extras = en_cache
+        island = bpy.data.objects.new(name, mesh)
+        bpy.context.collection.objects.link(island)
+        island.location = location
+
+        roche = extras["Rock_Mask"].astype(bool)
+        vg = island.vertex_groups.new(name="Rock_Mask")
+        indices = np.arange(len(roche))
+        vg.add(indices[~roche].tolist(), 0.0, 'REPLACE')
+        vg.add(indices[roche].tolist(), 1.0, 'REPLACE')
+    else:
+        # =========================================================================
+        # 1. CRÉATION DE LA GÉOMÉTRIE DE BASE
+        # =========================================================================
 
-                # On applique la hauteur tout en divisant par stretch_z (pour compenser l'étirement final)
-                v.co.z = z_target / stretch_z 
+        # Ajoute une sphère UV qui servira de "pâte à modeler" de base (directement via bmesh, sans opérateur)
+        island = primitives.sphere_uv(
+            name, # Nom de l'objet, pour garder la scène propre
+            segments=segments,  # Nombre de découpes verticales (haute résolution requise pour les détails)
+            anneaux=ring_count, # Nombre de découpes horizontales
+            rayon=radius, # Applique le rayon total demandé
+            location=location # Place l'objet aux coordonnées demandées
+        )
 
-                # On assigne un poids de 1 : cette zone sera complètement déformée par la roche
-                vg.add([v.index], 1.0, 'REPLACE')
-   
-        # Si le point est sur la moitié basse de la sphère d'origine (Z négatif, le fond de l'île)
-        else:
-            # On calcule à quel point on est bas sur la sphère d'origine (de 0 à 1)
-            normalized_z = (v.co.z + radius) / radius
+        # =========================================================================
+        # 2. PRÉPARATION DU MASQUE (POUR PROTÉGER LE PLATEAU PLAT)
+        # =========================================================================
 
-            # On calcule la profondeur cible (ça descend de la base de la falaise jusqu'au pic)
-            z_target = -spike_depth + normalized_z * (rim_height + spike_depth)
+        # Crée un groupe de sommets (Vertex Group) qui agira comme un masque de peinture
+        vg = island.vertex_groups.new(name="Rock_Mask")
 
-            # On applique la position Z avec la même compensation d'étirement
-            v.co.z = z_target / stretch_z 
+        # =========================================================================
+        # 3. SCULPTURE MATHÉMATIQUE DE LA FORME (BOL + PIC)
+        # =========================================================================
 
-            # Poids 1 : le dessous de l'île sera 100% rocheux
-            vg.add([v.index], 1.0, 'REPLACE')
+        # Tous les sommets sont traités d'un coup sous forme de tableaux NumPy
+        roche = _sculpter_vectorise(island, vg, radius, rim_height, rim_thickness, spike_depth, stretch_z)
 
-    # Force Blender à actualiser le maillage pour prendre en compte nos modifications mathématiques
-    island.data.update()
+        if utiliser_cache:
+            mesh_cache.sauver(cle, island, extras={"Rock_Mask": roche.astype(np.uint8)})
 
     # =========================================================================
     # ÉTIREMENT VERTICAL (SCALE Z)
@@ -131,15 +226,16 @@ def create_massive_vertical_fortress(
 
     # Ajoute un modificateur Subdivision Surface pour avoir assez de polygones à déformer
     subsurf = island.modifiers.new(name="Subdiv", type='SUBSURF')
-    subsurf.levels = 2 # Niveau de détail dans la vue 3D
-    subsurf.render_levels = 3 # Niveau de détail au moment du calcul de l'image (Rendu final)
+    subsurf.levels = min(subdiv_vue, subdiv_rendu) # Niveau de détail dans la vue 3D
+    subsurf.render_levels = subdiv_rendu # Niveau de détail au moment du calcul de l'image (Rendu final)
 
     # =========================================================================
     # 5. MACRO-RELIEF : LES LARGES PILIERS ROCHEUX (VORONOI)
     # =========================================================================
 
     # Crée une texture procédurale Voronoi (pour la roche taillée)
-    tex_macro = bpy.data.textures.new("Macro_Rock_Thick", type='VORONOI')
+    # Partagée entre les îles de même largeur de roche (voir donnees.py)
+    tex_macro, _ = donnees.texture("Macro_Rock_Thick", 'VORONOI', {"noise_scale": rock_width, "distance_metric": 'DISTANCE'})
     tex_macro.distance_metric = 'DISTANCE' # Utilise le mode 'Distance' pour avoir des pics/cratères
 
     # Règle la taille du motif : une grande valeur fait de très larges blocs de pierre
@@ -160,7 +256,7 @@ def create_massive_vertical_fortress(
     # =========================================================================
 
     # Crée une texture de type "Nuages" pour ajouter du grain à la pierre
-    tex_micro = bpy.data.textures.new("Micro_Rock", type='CLOUDS')
+    tex_micro, _ = donnees.texture("Micro_Rock", 'CLOUDS', {"noise_scale": 1.0})
     tex_micro.noise_scale = 1.0 # Petits détails
 
     # Ajoute un second modificateur Displace par-dessus les gros blocs
@@ -169,71 +265,234 @@ def create_massive_vertical_fortress(
     mod_micro.strength = micro_detail # Force très faible pour ne pas détruire les gros piliers
     mod_micro.vertex_group = "Rock_Mask" # Protège encore le plateau
 
-    # Ordonne à Blender de lisser les ombres des polygones (retire l'effet "facettes")
-    bpy.ops.object.shade_smooth()
+    # Lisse les ombres des polygones (retire l'effet "facettes")
+    primitives.lisser(island)
 
     # =========================================================================
     # 7. MATÉRIAU
     # =========================================================================
 
-    mat_name = "Wano_Manga_Rock"
-    # Vérifie si le matériau existe déjà dans le fichier pour ne pas le créer 50 fois
-    if mat_name not in bpy.data.materials:
-        # Crée le matériau
-        mat = bpy.data.materials.new(name=mat_name)
-        mat.use_nodes = True # Active l'éditeur nodal
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-    
-        # Supprime les noeuds par défaut (sauf la sortie) pour faire table rase
-        for node in nodes:
-            if node.type != 'OUTPUT_MATERIAL':
-                nodes.remove(node)
+    mat = _materiau_roche()
 
-        # Récupère le noeud de sortie (Material Output)
-        output_node = nodes.get("Material Output")
-        
-        # Crée le shader principal (Principled BSDF)
-        bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-        bsdf.location = (0, 0)
-        bsdf.inputs["Roughness"].default_value = 0.9 # Pierre très mate (pas de brillance)
-    
-        # Crée un nœud de Bruit (Noise Texture) pour mélanger les couleurs aléatoirement
-        noise = nodes.new(type='ShaderNodeTexNoise')
-        noise.location = (-600, 0)
-        noise.inputs["Scale"].default_value = 5.0 # Taille des taches de couleur
+    # Applique le matériau à l'île
+    island.data.materials.append(mat)
 
-        # Crée un dégradé (ColorRamp) pour choisir les couleurs exactes
-        ramp = nodes.new(type='ShaderNodeValToRGB')
-        ramp.location = (-300, 0)
+    # Retourne l'objet 3D prêt à l'emploi ^^
+    return island
 
-        # Ajoute la première couleur : Un Saumon / Ocre
-        ramp.color_ramp.elements[0].position = 0.3
-        ramp.color_ramp.elements[0].color = (0.85, 0.55, 0.40, 1.0) 
 
-        # Ajoute la deuxième couleur : Un Beige clair
-        ramp.color_ramp.elements[1].position = 0.7
-        ramp.color_ramp.elements[1].color = (0.95, 0.85, 0.65, 1.0) 
 
-        # Connecte la sortie du bruit à l'entrée du dégradé
-        links.new(noise.outputs["Fac"], ramp.inputs["Fac"])
+# ==========================================
+#  CONSTRUCTION PARALLÈLE DE L'ARCHIPEL
+# ==========================================
+#
+# Les îles sont indépendantes jusqu'à leur création dans bpy : leur géométrie (sphère, sculpture, relief
+# Voronoi + Clouds cuit, masque de roche) est calculée en NumPy par geometrie_ile.calculer_ile dans un
+# pool de processus 'spawn' (geometrie_ile.ouvrir_pool), puis les maillages sont créés d'un bloc dans le processus principal (bpy n'est pas
+# utilisable ailleurs). Le temps de l'étape suit alors l'île la plus lente et non la somme des îles.
 
-        # Connecte les couleurs générées au Shader
-        links.new(ramp.outputs["Color"], bsdf.inputs["Base Color"])
+def _parametres_ile(config):
+    """Paramètres complets d'une île : valeurs par défaut de create_massive_vertical_fortress complétées par config"""
+    defauts = {nom: p.default for nom, p in inspect.signature(create_massive_vertical_fortress).parameters.items()}
+    return dict(defauts, **config)
 
-        # Connecte le Shader à la surface de l'objet final
-        links.new(bsdf.outputs["BSDF"], output_node.inputs["Surface"])
-    else:
-        # Si le matériau existait déjà, on le récupère simplement
-        mat = bpy.data.materials[mat_name]
 
-    # Applique le matériau à l'île
-    island.data.materials.append(mat)
+def _objet_ile(params, mesh, roche):
+    """Crée l'objet d'une île à partir de son maillage calculé (masque, étirement, subdivision restante, matériau)"""
+    island = bpy.data.objects.new(params["name"], mesh)
+    bpy.context.collection.objects.link(island)
+    island.location = params["location"]
 
-    # Retourne l'objet 3D prêt à l'emploi ^^
+    vg = island.vertex_groups.new(name="Rock_Mask")
+    roche = roche.astype(bool)
+    indices = np.arange(len(roche))
+    vg.add(indices[~roche].tolist(), 0.0, 'REPLACE')
+    vg.add(indices[roche].tolist(), 1.0, 'REPLACE')
+
+    island.scale[2] = params["stretch_z"]
+
+    # Les niveaux du viewport sont cuits dans le maillage : le Subdivision ne garde que l'écart avec le rendu
+    reste = params["subdiv_rendu"] - params["niveau"]
+    if reste > 0:
+        subsurf = island.modifiers.new(name="Subdiv", type='SUBSURF')
+        subsurf.levels = 0
+        subsurf.render_levels = reste
+
+    island.data.materials.append(_materiau_roche())
     return island
 
 
+def construire_iles(configs, processus=None, graine=0, utiliser_cache=True, sommets_decoupage=1_000_000,
+                    taille_bloc=geometrie_ile.TAILLE_BLOC, delai=geometrie_ile.DELAI_CALCUL):
+    """
+    Construit plusieurs îles en calculant leur géométrie en parallèle.
+
+    Le relief est cuit (voir geometrie_ile) au niveau de subdivision du viewport : l'île a alors autant de
+    polygones dans la vue que create_massive_vertical_fortress, sans modificateur Displace.
+
+    Args:
+        configs (list): Paramètres de create_massive_vertical_fortress, un dictionnaire par île.
+        processus (int): Nombre de processus de calcul (par défaut un par cœur, au plus un par île).
+        graine (int): Graine du relief rocheux.
+        utiliser_cache (bool): Relit depuis le cache disque les îles déjà calculées.
+        sommets_decoupage (int): Au-delà de ce nombre de sommets, une île n'occupe pas un seul processus :
+            elle est calculée ensuite, son relief découpé en blocs répartis sur tous les processus
+            (geometrie_ile.relief_parallele, mémoire partagée).
+        taille_bloc (int): Nombre de sommets par bloc du relief découpé.
+        delai (float): Durée maximale du calcul parallèle ; au-delà, les processus sont tués et les îles
+            restantes calculées sur place.
+
+    Returns:
+        dict: nom -> objet de l'île, dans l'ordre de configs.
+    """
+    debut = time.perf_counter()
+    parametres = []
+    for config in configs:
+        params = _parametres_ile(config)
+        params["niveau"] = min(params["subdiv_vue"], params["subdiv_rendu"])
+        params["graine"] = graine
+        parametres.append(params)
+
+    # Les îles déjà en cache sont relues tout de suite, les autres partent au calcul
+    maillages, a_calculer, cles = {}, [], {}
+    for params in parametres:
+        geometrie = {k: v for k, v in params.items()
+                     if k not in ("name", "location", "utiliser_cache", "subdiv_rendu", "subdiv_vue")}
+        cle = mesh_cache.cle_cache("ile_cuite", geometrie,
+                                   geometrie_ile.calculer_ile, geometrie_ile.sculpter_fortress, geometrie_ile.sphere_uv,
+                                   geometrie_ile.normales_sommets, geometrie_ile.relief_macro, geometrie_ile.relief_micro,
+                                   bruit.voronoi_3d, bruit.fbm_3d)
+        cles[params["name"]] = cle
+        en_cache = mesh_cache.charger(cle, params["name"], materiaux=[]) if utiliser_cache else None
+        if en_cache:
+            maillages[params["name"]] = (en_cache[0], en_cache[1]["roche"])
+        else:
+            a_calculer.append({k: v for k, v in params.items() if k not in ("location", "utiliser_cache")})
+
+    def nb_sommets(p):
+        facteur = 2 ** p["niveau"]
+        return 2 + (p["ring_count"] * facteur - 1) * p["segments"] * facteur
+
+    denses = [p for p in a_calculer if nb_sommets(p) > sommets_decoupage]
+    legeres = [p for p in a_calculer if p not in denses]
+
+    resultats, nb = [], 0
+    coeurs = processus or multiprocessing.cpu_count()
+    if a_calculer:
+        nb = coeurs if denses else min(coeurs, len(legeres))
+        try:
+            # Un seul pool pour tout l'archipel : les îles légères d'abord, puis le relief des îles denses
+            with geometrie_ile.ouvrir_pool(nb) as pool:
+                if legeres:
+                    resultats = geometrie_ile.executer(pool, geometrie_ile.calculer_ile, legeres, delai)
+                # Îles denses : une à une, mais chacune répartie sur tous les processus du pool
+                for p in denses:
+                    resultats.append(geometrie_ile.calculer_ile(
+                        dict(p, processus_relief=nb, taille_bloc=taille_bloc), pool=pool))
+        except Exception as erreur:
+            # Pas de processus de calcul possible (environnement restreint) ou délai dépassé (processus bloqué
+            # ou mort, tués à la sortie de ouvrir_pool) : calcul sur place
+            bprint(f"⚠️ Calcul parallèle des îles impossible ({erreur}), calcul séquentiel")
+            nb = 1
+            resultats = [geometrie_ile.calculer_ile(p) for p in a_calculer]
+    t_calcul = time.perf_counter()
+
+    # Création des maillages dans bpy, d'un bloc (processus principal uniquement)
+    temps_commit = {}
+    for resultat in resultats:
+        t0 = time.perf_counter()
+        maillages[resultat["name"]] = (mesh_cache.construire_maillage(resultat["name"], resultat["donnees"], materiaux=[]),
+                                       resultat["roche"])
+        temps_commit[resultat["name"]] = time.perf_counter() - t0
+
+    iles = {}
+    for params in parametres:
+        t0 = time.perf_counter()
+        mesh, roche = maillages[params["name"]]
+        iles[params["name"]] = _objet_ile(params, mesh, roche)
+        if utiliser_cache and params["name"] in temps_commit:
+            mesh_cache.sauver(cles[params["name"]], iles[params["name"]], extras={"roche": roche})
+        temps_commit[params["name"]] = temps_commit.get(params["name"], 0.0) + time.perf_counter() - t0
+    fin = time.perf_counter()
+
+    temps_calcul = {r["name"]: r["temps"] for r in resultats}
+    for params in parametres:
+        nom = params["name"]
+        calcul = f"calcul {temps_calcul[nom]:.2f} s" if nom in temps_calcul else "cache"
+        bprint(f"   Île {nom} : {len(maillages[nom][0].vertices)} sommets, {calcul}, création {temps_commit[nom]:.2f} s")
+    bprint(f"Îles : {len(parametres)} en {fin - debut:.2f} s ({len(resultats)} calculées sur {nb} processus : "
+           f"{t_calcul - debut:.2f} s pour {sum(temps_calcul.values()):.2f} s de calcul cumulé ; création {fin - t_calcul:.2f} s)")
+    return iles
+
+
+
+# ==========================================
+#  BUDGET DE POLYGONES
+# ==========================================
+
+def cout_triangles(segments=128, ring_count=64, subdiv_rendu=3):
+    """Triangles d'une île au rendu : sphère UV de base puis Subdivision (les Displace n'en ajoutent pas)"""
+    return budget.cout_sphere_uv(segments, ring_count, subdiv_rendu)
+
+
+def reglages_pour(triangles):
+    """Résolution d'île la plus fine qui tient dans le budget (sphère deux fois plus large que haute)"""
+    candidats = [{"segments": s, "ring_count": s // 2, "subdiv_rendu": n}
+                 for n in (3, 2, 1, 0) for s in range(16, 1025, 8)]
+    return budget.choisir(candidats, cout_triangles, triangles)
+
+
+def declarer_budget(name="Onigashima_Base", segments=128, ring_count=64, subdiv_rendu=3, **_):
+    """Déclare l'île au budget de polygones (accepte directement une entrée de wano_islands_data)"""
+    budget.declarer(f"ile:{name}", name, {"segments": segments, "ring_count": ring_count, "subdiv_rendu": subdiv_rendu},
+                    cout_triangles, reglages_pour, objets=(name,))
+
+
+
+def comparer_sculpture(resolutions=((128, 64), (512, 256), (1024, 512)), radius=50.0, rim_height=20.0,
+                       rim_thickness=15.0, spike_depth=40.0, stretch_z=3.5):
+    """
+    Compare le temps de sculpture sommet par sommet et vectorisé, et vérifie que le résultat est identique.
+
+    Args:
+        resolutions (tuple): Liste de couples (segments, ring_count) à mesurer.
+        Les autres paramètres sont ceux de create_massive_vertical_fortress().
+
+    Returns:
+        list: Un tuple (segments, ring_count, nb_sommets, temps_boucle, temps_numpy) par résolution.
+    """
+    params = (radius, rim_height, rim_thickness, spike_depth, stretch_z)
+    resultats = []
+
+    for segments, ring_count in resolutions:
+        sculptures = {}
+        for mode, fonction in (("boucle", _sculpter_par_sommet), ("numpy", _sculpter_vectorise)):
+            sphere = primitives.sphere_uv("Sphere", segments=segments, anneaux=ring_count, rayon=radius)
+            vg = sphere.vertex_groups.new(name="Rock_Mask")
+
+            debut = time.perf_counter()
+            fonction(sphere, vg, *params)
+            duree = time.perf_counter() - debut
+
+            poids = np.zeros(len(sphere.data.vertices), dtype=np.float32)
+            for v in sphere.data.vertices:
+                poids[v.index] = v.groups[0].weight
+            sculptures[mode] = (duree, lire_sommets(sphere.data), poids)
+
+            mesh = sphere.data
+            bpy.data.objects.remove(sphere, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+
+        (t_boucle, co_boucle, p_boucle), (t_numpy, co_numpy, p_numpy) = sculptures["boucle"], sculptures["numpy"]
+        identique = np.array_equal(co_boucle, co_numpy) and np.array_equal(p_boucle, p_numpy)
+        bprint(f"Sculpture {segments}x{ring_count} ({len(co_numpy)} sommets) : "
+               f"boucle {t_boucle*1000:.1f} ms | numpy {t_numpy*1000:.1f} ms | "
+               f"x{t_boucle / max(t_numpy, 1e-9):.0f} | identique : {identique}")
+        resultats.append((segments, ring_count, len(co_numpy), t_boucle, t_numpy))
+
+    return resultats
+
+
 
 # =============================================================================
 # --- ZONE DE TEST POUR BLENDER ---
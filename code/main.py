@@ -29,6 +29,45 @@ if chemin_dossier not in sys.path:
 from utils import bprint
 #importlib.reload(utils)
 
+import mesh_cache
+importlib.reload(mesh_cache)
+
+import terrain
+importlib.reload(terrain)
+
+import spatial
+importlib.reload(spatial)
+
+import instances
+importlib.reload(instances)
+
+import graines
+importlib.reload(graines)
+
+import cache_particules
+importlib.reload(cache_particules)
+
+import gabarits
+importlib.reload(gabarits)
+
+import donnees
+importlib.reload(donnees)
+
+import budget
+importlib.reload(budget)
+
+import bruit
+importlib.reload(bruit)
+
+import geometrie_ile
+importlib.reload(geometrie_ile)
+
+import primitives
+importlib.reload(primitives)
+
+import sol
+importlib.reload(sol)
+
 import island
 importlib.reload(island)
 
@@ -62,11 +101,32 @@ if __name__ == "__main__":
         if obj.type not in ['CAMERA', 'LIGHT']:
             # On vérifie si le nom de l'objet fait partie de tes assets
             nom_base = obj.name.split('.')[0] # Permet d'ignorer les .001 si tu as fait des copies
-            if nom_base not in objets_proteges and obj.name in bpy.context.view_layer.objects:
+            # Les gabarits (tombe, rocher, sapin, flocon) sont gardés : la reconstruction les réutilise
+            if nom_base not in objets_proteges and not gabarits.est_gabarit(obj) and obj.name in bpy.context.view_layer.objects:
                     obj.select_set(True) # Sélectionne pour suppression uniquement ce qui n'est pas protégé
                 
     bpy.ops.object.delete()
 
+    # Les matériaux, textures et maillages des objets supprimés sont purgés ici (voir donnees.py)
+    donnees.demarrer_build()
+
+    # Graine de construction : même graine = même archipel (None : un archipel différent à chaque lancement)
+    GRAINE = 1868
+    # Plage de frames des particules cuites sur disque (sakura) ; None : simulation en direct
+    FRAMES_PARTICULES = (1, 250)
+    # Budget de polygones ("apercu", "final", voir budget.PROFILS) ; None : résolutions nominales des générateurs
+    PROFIL_BUDGET = None
+    # Budgets propres à certaines régions, ex : {"Onigashima": 1_000_000}
+    BUDGETS_REGIONS = {}
+    # Îles calculées en parallèle (relief cuit, voir island.construire_iles) ; False : une par une, relief en modificateurs.
+    # Désactivé par défaut : aucun gain n'a encore été mesuré sur plusieurs cœurs (sur un seul cœur, le pool est plus lent)
+    ILES_EN_PARALLELE = False
+    # Sommets par bloc du relief des îles trop denses pour un seul processus (voir geometrie_ile.relief_parallele)
+    TAILLE_BLOC_RELIEF = 65536
+    # Pose du décor sur le sol des îles (voir sol.py) : "grille" (champ de hauteur) ou "bvh" (lancer de rayons exact,
+    # pentes raides et eau rejetées)
+    ACCROCHAGE = "grille"
+
     # On définit d'abord la base (l'île principale)
     # Elle servira de point de référence pour le Z
     wano_base_config = {
@@ -180,18 +240,40 @@ if __name__ == "__main__":
     ]
 
 
+    # --- Budget de polygones : chaque générateur déclare ses réglages, puis le budget est réparti ---
+    budget.reinitialiser()
+    for wano_island in wano_islands_data:
+        island.declarer_budget(**wano_island)
+    Onigashima.declarer_budget()
+    Ringo.declarer_budget()
+    water.declarer_budget()
+    if PROFIL_BUDGET:
+        budget.repartir(PROFIL_BUDGET, regions=BUDGETS_REGIONS)
+
     # --- Boucle de génération ---
     toutes_les_iles = {}
 
-    for wano_island in wano_islands_data:
+    if ILES_EN_PARALLELE:
+        bprint(f"Création des régions : {', '.join(i['name'] for i in wano_islands_data)}...")
+        toutes_les_iles = island.construire_iles(
+            [dict(wano_island, **budget.reglages(f"ile:{wano_island['name']}")) for wano_island in wano_islands_data],
+            graine=GRAINE or 0, taille_bloc=TAILLE_BLOC_RELIEF)
+    else:
+        for wano_island in wano_islands_data:
 
-        bprint(f"Création de la région : {wano_island['name']}...")
+            bprint(f"Création de la région : {wano_island['name']}...")
 
-        toutes_les_iles[wano_island['name']] = island.create_massive_vertical_fortress(**wano_island)
+            toutes_les_iles[wano_island['name']] = island.create_massive_vertical_fortress(
+                **wano_island, **budget.reglages(f"ile:{wano_island['name']}"))
 
+    # Les îles sont créées sans opérateur : une seule évaluation de la scène pour mettre à jour
+    # leurs dimensions et matrix_world, lues par les générateurs suivants
+    bpy.context.view_layer.update()
 
-    Onigashima.construire(toutes_les_iles["Onigashima"])
-    Ringo.construire(toutes_les_iles["Ringo"])
+    Onigashima.construire(toutes_les_iles["Onigashima"],
+                          reglages_crane=budget.reglages("crane"), reglages_cornes=budget.reglages("cornes"))
+    Ringo.construire(toutes_les_iles["Ringo"], graine=GRAINE, reglages_manteau=budget.reglages("manteau"),
+                     accrochage=ACCROCHAGE)
 
 
     # ... (Création de l'eau) ...
@@ -203,7 +285,8 @@ if __name__ == "__main__":
     water.create_water(
         name="Eau_Wano", 
         radius=rayon_eau, 
-        location=(0, 0, hauteur_eau)
+        location=(0, 0, hauteur_eau),
+        **budget.reglages("eau")
     )
 
     bprint("Création de la Grande Cascade...")
@@ -214,17 +297,17 @@ if __name__ == "__main__":
         name="Grande_Cascade",
         width=42.0,
         height=hauteur_cascade,
-        location=(0, y_bord_ile, hauteur_eau) 
+        location=(0, y_bord_ile, hauteur_eau),
+        **budget.reglages("cascade")
     )
 
     bprint("Percement de la muraille pour la cascade...")
 
-    bpy.ops.mesh.primitive_cube_add(
-        size=1.0, 
-        location=(0, y_bord_ile, 0.0) 
+    cutter = primitives.cube(
+        "Decoupe_Cascade",
+        taille=1.0,
+        location=(0, y_bord_ile, 0.0)
     )
-    cutter = bpy.context.active_object
-    cutter.name = "Decoupe_Cascade"
 
     # Et on le rend GIGANTESQUE en hauteur (200m de Z) pour qu'il tranche la roche jusqu'en bas !
     cutter.scale = (38.0, 25, 200.0)
@@ -255,7 +338,12 @@ if __name__ == "__main__":
         centre_ile=loc_capitale, 
         rayon_plateau=rayon_plateau_capitale, 
         nb_maisons=110, 
-       nb_arbres=140
+       nb_arbres=140,
+        mode_placement="poisson",
+        instancier=True,
+        graine=GRAINE,
+        frames_particules=FRAMES_PARTICULES,
+        accrochage=ACCROCHAGE
     )
     
 
@@ -274,5 +362,12 @@ if __name__ == "__main__":
         rayon_plateau=rayon_plateau_udon
     )
 
+    # Tout ce que ce build a créé pourra être purgé au prochain s'il devient orphelin (voir donnees.py)
+    donnees.terminer_build()
+
+    mesh_cache.rapport_cache()
+    gabarits.rapport_gabarits()
+    donnees.rapport_donnees()
+    budget.rapport_budget()
     bprint("--- L'archipel de Wano est complètement généré ! ---")
 
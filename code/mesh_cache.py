@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+
+import numpy as np
+import bpy
+
+from utils import bprint
+
+
+
+# Incrémenter pour invalider tout le cache d'un coup (changement de format des fichiers .npz)
+VERSION_CACHE = 1
+
+# Taille maximale du dossier de cache avant éviction des entrées les moins récemment utilisées
+TAILLE_MAX_OCTETS = 512 * 1024 * 1024
+
+# Dossier "cache_maillages" à la racine du projet (à côté du dossier "code")
+DOSSIER_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache_maillages")
+
+_stats = {"hits": 0, "misses": 0, "ecritures": 0, "evictions": 0}
+
+
+
+# ==========================================
+#  CLÉS ET INDEX
+# ==========================================
+
+def _empreinte_code(fonctions):
+    """Hash du code source des générateurs : modifier le code invalide automatiquement leurs entrées"""
+    morceaux = []
+    for fonction in fonctions:
+        try:
+            morceaux.append(inspect.getsource(fonction))
+        except (OSError, TypeError):
+            morceaux.append(getattr(fonction, "__qualname__", str(fonction)))
+    return hashlib.sha256("\n".join(morceaux).encode("utf-8")).hexdigest()
+
+
+def cle_cache(nom_generateur, params, *fonctions):
+    """
+    Calcule la clé de cache d'un générateur.
+
+    Args:
+        nom_generateur (str): Nom court du générateur ("ile", "crane", ...), sert de préfixe au fichier.
+        params (dict): Les arguments qui influencent la géométrie.
+        *fonctions: Les fonctions dont le code source fait partie de la clé.
+
+    Returns:
+        str: La clé, utilisable comme nom de fichier.
+    """
+    contenu = json.dumps({
+        "generateur": nom_generateur,
+        "params": params,
+        "version": VERSION_CACHE,
+        "code": _empreinte_code(fonctions),
+    }, sort_keys=True, default=str)
+    return f"{nom_generateur}_{hashlib.sha256(contenu.encode('utf-8')).hexdigest()[:24]}"
+
+
+def _chemin(cle):
+    return os.path.join(DOSSIER_CACHE, cle + ".npz")
+
+
+def _lire_index():
+    chemin = os.path.join(DOSSIER_CACHE, "index.json")
+    if not os.path.exists(chemin):
+        return {}
+    try:
+        with open(chemin, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ecrire_index(index):
+    os.makedirs(DOSSIER_CACHE, exist_ok=True)
+    with open(os.path.join(DOSSIER_CACHE, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+
+
+
+# ==========================================
+#  EXTRACTION / RECONSTRUCTION DES MAILLAGES
+# ==========================================
+
+def extraire_maillage(obj, evalue=False):
+    """
+    Lit la géométrie d'un objet sous forme de tableaux NumPy.
+
+    Args:
+        obj (bpy.types.Object): L'objet à lire.
+        evalue (bool): Si True, lit le maillage final (modificateurs appliqués) au lieu du maillage de base.
+
+    Returns:
+        dict: Tableaux "co", "boucles", "debuts", "tailles", "materiau", "lisse", "uv" (si présent) et "materiaux".
+    """
+    obj_eval = None
+    if evalue:
+        obj_eval = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+        mesh = obj_eval.to_mesh()
+    else:
+        mesh = obj.data
+
+    nb_sommets, nb_boucles, nb_faces = len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+    donnees = {
+        "co": np.empty(nb_sommets * 3, dtype=np.float32),
+        "boucles": np.empty(nb_boucles, dtype=np.int32),
+        "debuts": np.empty(nb_faces, dtype=np.int32),
+        "tailles": np.empty(nb_faces, dtype=np.int32),
+        "materiau": np.empty(nb_faces, dtype=np.int32),
+        "lisse": np.empty(nb_faces, dtype=bool),
+    }
+    mesh.vertices.foreach_get("co", donnees["co"])
+    mesh.loops.foreach_get("vertex_index", donnees["boucles"])
+    mesh.polygons.foreach_get("loop_start", donnees["debuts"])
+    mesh.polygons.foreach_get("loop_total", donnees["tailles"])
+    mesh.polygons.foreach_get("material_index", donnees["materiau"])
+    mesh.polygons.foreach_get("use_smooth", donnees["lisse"])
+
+    if mesh.uv_layers.active:
+        donnees["uv"] = np.empty(nb_boucles * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", donnees["uv"])
+
+    donnees["materiaux"] = np.array([m.name if m else "" for m in mesh.materials], dtype=str)
+
+    if obj_eval is not None:
+        obj_eval.to_mesh_clear()
+    return donnees
+
+
+def construire_maillage(nom, donnees, materiaux=None):
+    """
+    Recrée un datablock Mesh à partir des tableaux de extraire_maillage().
+
+    Args:
+        nom (str): Nom du nouveau maillage.
+        donnees (dict): Les tableaux de géométrie.
+        materiaux (list): Matériaux à assigner aux slots. Par défaut, on les retrouve par leur nom.
+
+    Returns:
+        bpy.types.Mesh: Le maillage créé.
+    """
+    mesh = bpy.data.meshes.new(nom)
+    mesh.vertices.add(len(donnees["co"]) // 3)
+    mesh.loops.add(len(donnees["boucles"]))
+    mesh.polygons.add(len(donnees["debuts"]))
+
+    mesh.vertices.foreach_set("co", donnees["co"])
+    mesh.loops.foreach_set("vertex_index", donnees["boucles"])
+    mesh.polygons.foreach_set("loop_start", donnees["debuts"])
+    # Depuis Blender 3.6, loop_total est en lecture seule (déduit de loop_start)
+    if bpy.app.version < (3, 6, 0):
+        mesh.polygons.foreach_set("loop_total", donnees["tailles"])
+    mesh.polygons.foreach_set("material_index", donnees["materiau"])
+    mesh.polygons.foreach_set("use_smooth", donnees["lisse"])
+
+    if "uv" in donnees:
+        mesh.uv_layers.new(name="UVMap").data.foreach_set("uv", donnees["uv"])
+
+    if materiaux is None:
+        materiaux = [bpy.data.materials.get(n) if n else None for n in donnees["materiaux"]]
+    for mat in materiaux:
+        mesh.materials.append(mat)
+
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+
+# ==========================================
+#  LECTURE / ÉCRITURE DU CACHE
+# ==========================================
+
+def charger(cle, nom, materiaux=None):
+    """
+    Cherche une entrée du cache et reconstruit son maillage.
+
+    Args:
+        cle (str): Clé calculée par cle_cache().
+        nom (str): Nom du maillage à créer.
+        materiaux (list): Matériaux à assigner (voir construire_maillage()).
+
+    Returns:
+        tuple: (bpy.types.Mesh, dict des tableaux supplémentaires) ou None si absent du cache.
+    """
+    chemin = _chemin(cle)
+    if not os.path.exists(chemin):
+        _stats["misses"] += 1
+        return None
+
+    with np.load(chemin) as fichier:
+        donnees = {k: fichier[k] for k in fichier.files}
+
+    extras = {k[len("extra_"):]: v for k, v in donnees.items() if k.startswith("extra_")}
+    mesh = construire_maillage(nom, donnees, materiaux)
+
+    index = _lire_index()
+    if cle in index:
+        index[cle]["acces"] = time.time()
+        _ecrire_index(index)
+
+    _stats["hits"] += 1
+    return mesh, extras
+
+
+def sauver(cle, obj, evalue=False, extras=None):
+    """
+    Enregistre la géométrie d'un objet dans le cache, puis applique la politique d'éviction.
+
+    Args:
+        cle (str): Clé calculée par cle_cache().
+        obj (bpy.types.Object): L'objet dont on enregistre le maillage.
+        evalue (bool): Enregistre le maillage final (modificateurs appliqués).
+        extras (dict): Tableaux supplémentaires à conserver (ex : poids d'un groupe de sommets).
+    """
+    donnees = extraire_maillage(obj, evalue)
+    for nom, tableau in (extras or {}).items():
+        donnees["extra_" + nom] = np.asarray(tableau)
+
+    os.makedirs(DOSSIER_CACHE, exist_ok=True)
+    np.savez_compressed(_chemin(cle), **donnees)
+
+    index = _lire_index()
+    index[cle] = {"taille": os.path.getsize(_chemin(cle)), "acces": time.time()}
+    _ecrire_index(index)
+    _stats["ecritures"] += 1
+
+    evincer(TAILLE_MAX_OCTETS)
+
+
+def evincer(taille_max):
+    """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous taille_max octets"""
+    index = _lire_index()
+    total = sum(e["taille"] for e in index.values())
+    for cle in sorted(index, key=lambda c: index[c]["acces"]):
+        if total <= taille_max:
+            break
+        total -= index[cle]["taille"]
+        if os.path.exists(_chemin(cle)):
+            os.remove(_chemin(cle))
+        del index[cle]
+        _stats["evictions"] += 1
+    _ecrire_index(index)
+
+
+def invalider(generateur=None, cle=None):
+    """
+    Supprime des entrées du cache.
+
+    Args:
+        generateur (str): Supprime toutes les entrées de ce générateur ("ile", "crane", ...).
+        cle (str): Supprime une seule entrée.
+        Sans argument, vide tout le cache.
+
+    Returns:
+        int: Le nombre d'entrées supprimées.
+    """
+    index = _lire_index()
+    a_supprimer = [c for c in index
+                   if (cle is None or c == cle) and (generateur is None or c.startswith(generateur + "_"))]
+    for c in a_supprimer:
+        if os.path.exists(_chemin(c)):
+            os.remove(_chemin(c))
+        del index[c]
+    _ecrire_index(index)
+    return len(a_supprimer)
+
+
+def rapport_cache():
+    """Affiche les statistiques du cache dans Wano_Console"""
+    index = _lire_index()
+    taille = sum(e["taille"] for e in index.values()) / (1024 * 1024)
+    bprint(f"💾 Cache maillages : {_stats['hits']} hit(s), {_stats['misses']} miss(es), "
+           f"{_stats['ecritures']} écriture(s), {_stats['evictions']} éviction(s) "
+           f"| {len(index)} entrée(s), {taille:.1f} Mo")
@@ -0,0 +1,327 @@
+import time
+
+import numpy as np
+import bpy
+import bmesh
+from mathutils import Matrix, Vector
+
+from utils import bprint
+import mesh_cache
+
+
+
+# ==========================================
+#  PRIMITIVES SANS OPÉRATEUR
+# ==========================================
+#
+# Équivalents de bpy.ops.mesh.primitive_*_add, object.join, transform_apply, origin_set, shade_smooth
+# et modifier_apply écrits avec bpy.data, bmesh et foreach_get/foreach_set :
+#   - pas besoin d'objet actif ni de sélection (utilisables depuis un timer ou un script en arrière-plan)
+#   - pas de mise à jour du view layer à chaque appel
+#
+# Les primitives gardent les conventions des opérateurs : mêmes dimensions par défaut, objet lié à la
+# collection courante, location / rotation / échelle posées sur l'objet (pas dans le maillage), UV calculées.
+# Attention : echelle n'est pas le scale= des opérateurs primitive_*_add, qui l'intègre au maillage (objet
+# d'échelle 1). Pour retrouver ce comportement, appeler appliquer_transformations(obj, rotation=False) ensuite.
+# Rien n'est sélectionné ni rendu actif : le code appelant utilise l'objet retourné.
+
+# Blender 3.0 a renommé les paramètres "diameter" des opérateurs bmesh en "radius" (même valeur)
+_AVANT_3_0 = bpy.app.version < (3, 0, 0)
+
+
+
+def _nouveau_bmesh():
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    return bm
+
+
+def _objet(nom, bm, location, rotation, echelle, collection):
+    """Écrit le bmesh dans un nouveau maillage et crée l'objet (lié à la collection courante par défaut)"""
+    mesh = bpy.data.meshes.new(nom)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(nom, mesh)
+    (collection or bpy.context.collection).objects.link(obj)
+    obj.location = location
+    if rotation is not None:
+        obj.rotation_euler = rotation
+    if echelle is not None:
+        obj.scale = echelle
+    return obj
+
+
+def _rayon(nom, valeur):
+    return {(nom.replace("radius", "diameter") if _AVANT_3_0 else nom): valeur}
+
+
+def sphere_uv(nom="Sphere", rayon=1.0, segments=32, anneaux=16, location=(0, 0, 0), rotation=None, echelle=None,
+              collection=None):
+    """primitive_uv_sphere_add (segments, ring_count, radius)"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=anneaux, calc_uvs=True, **_rayon("radius", rayon))
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+def ico_sphere(nom="Icosphere", rayon=1.0, subdivisions=2, location=(0, 0, 0), rotation=None, echelle=None,
+               collection=None):
+    """primitive_ico_sphere_add (subdivisions, radius)"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, calc_uvs=True, **_rayon("radius", rayon))
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+def cone(nom="Cone", rayon1=1.0, rayon2=0.0, profondeur=2.0, sommets=32, remplissage='NGON',
+         location=(0, 0, 0), rotation=None, echelle=None, collection=None):
+    """primitive_cone_add (vertices, radius1, radius2, depth, end_fill_type 'NGON' / 'TRIFAN' / 'NOTHING')"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_cone(bm, cap_ends=remplissage != 'NOTHING', cap_tris=remplissage == 'TRIFAN',
+                          segments=sommets, depth=profondeur, calc_uvs=True,
+                          **_rayon("radius1", rayon1), **_rayon("radius2", rayon2))
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+def cylindre(nom="Cylinder", rayon=1.0, profondeur=2.0, sommets=32, remplissage='NGON',
+             location=(0, 0, 0), rotation=None, echelle=None, collection=None):
+    """primitive_cylinder_add (un cône à deux rayons égaux, comme dans Blender)"""
+    return cone(nom, rayon, rayon, profondeur, sommets, remplissage, location, rotation, echelle, collection)
+
+
+def cercle(nom="Circle", rayon=1.0, sommets=32, remplissage='NOTHING', location=(0, 0, 0), rotation=None,
+           echelle=None, collection=None):
+    """primitive_circle_add (vertices, radius, fill_type)"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_circle(bm, cap_ends=remplissage != 'NOTHING', cap_tris=remplissage == 'TRIFAN',
+                            segments=sommets, calc_uvs=True, **_rayon("radius", rayon))
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+def grille(nom="Grid", subdivisions_x=10, subdivisions_y=10, taille=2.0, location=(0, 0, 0), rotation=None,
+           echelle=None, collection=None):
+    """primitive_grid_add (x_subdivisions, y_subdivisions, size = largeur totale)"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_grid(bm, x_segments=subdivisions_x, y_segments=subdivisions_y, size=taille / 2.0, calc_uvs=True)
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+def cube(nom="Cube", taille=2.0, location=(0, 0, 0), rotation=None, echelle=None, collection=None):
+    """primitive_cube_add (size = côté)"""
+    bm = _nouveau_bmesh()
+    bmesh.ops.create_cube(bm, size=taille, calc_uvs=True)
+    return _objet(nom, bm, location, rotation, echelle, collection)
+
+
+
+# ==========================================
+#  TRANSFORMATIONS
+# ==========================================
+
+def matrice_monde(obj):
+    """
+    matrix_world recalculée depuis location / rotation / échelle et les parents.
+    obj.matrix_world n'est à jour qu'après une mise à jour du view layer, que ce module ne déclenche jamais.
+    """
+    if obj.parent is None:
+        return obj.matrix_basis.copy()
+    return matrice_monde(obj.parent) @ obj.matrix_parent_inverse @ obj.matrix_basis
+
+
+def lisser(obj, lisse=True):
+    """shade_smooth / shade_flat : une seule écriture de use_smooth pour toutes les faces"""
+    mesh = obj.data
+    mesh.polygons.foreach_set("use_smooth", np.full(len(mesh.polygons), lisse, dtype=bool))
+    mesh.update()
+
+
+def appliquer_transformations(obj, location=False, rotation=True, echelle=True):
+    """
+    transform_apply : intègre au maillage les parties demandées de la transformation de l'objet.
+
+    La position monde des sommets ne change pas. Comme pour l'opérateur, un maillage partagé par
+    plusieurs objets est modifié pour tous.
+    """
+    loc, rot, sca = obj.matrix_basis.decompose()
+    reste = (Matrix.Translation(loc) if not location else Matrix.Identity(4)) \
+        @ (rot.to_matrix().to_4x4() if not rotation else Matrix.Identity(4)) \
+        @ (Matrix.Diagonal(sca).to_4x4() if not echelle else Matrix.Identity(4))
+    applique = reste.inverted() @ obj.matrix_basis
+    obj.data.transform(applique)
+    if applique.determinant() < 0:
+        # échelle négative intégrée : Mesh.transform laisse les normales retournées
+        obj.data.flip_normals()
+    obj.matrix_basis = reste
+    obj.data.update()
+
+
+def definir_origine(obj, point=None):
+    """origin_set(type='ORIGIN_CURSOR') : déplace l'origine sur un point monde (le curseur 3D par défaut)"""
+    point = Vector(bpy.context.scene.cursor.location if point is None else point)
+    local = matrice_monde(obj).inverted() @ point
+    obj.data.transform(Matrix.Translation(-local))
+    obj.matrix_basis = obj.matrix_basis @ Matrix.Translation(local)
+    obj.data.update()
+
+
+def joindre(objets):
+    """
+    object.join : fusionne les maillages dans le premier objet (qui garde sa transformation), supprime les autres.
+
+    Les sommets sont ramenés dans le repère du premier objet, les emplacements de matériaux fusionnés
+    (un matériau présent dans plusieurs objets n'a qu'un emplacement), les faces retournées si une
+    transformation est en miroir. Les UV sont gardées si au moins un des maillages en a.
+
+    Returns:
+        bpy.types.Object: Le premier objet.
+    """
+    cible = objets[0]
+    vers_cible = np.array(matrice_monde(cible).inverted())
+    materiaux = []
+    morceaux = []
+    decalage = 0
+    avec_uv = any(o.data.uv_layers.active for o in objets)
+
+    for obj in objets:
+        d = mesh_cache.extraire_maillage(obj)
+        m = vers_cible @ np.array(matrice_monde(obj))
+        co = d["co"].reshape(-1, 3) @ m[:3, :3].T + m[:3, 3]
+
+        # matériaux : index local -> index dans la liste fusionnée
+        correspondance = []
+        for mat in obj.data.materials:
+            if mat not in materiaux:
+                materiaux.append(mat)
+            correspondance.append(materiaux.index(mat))
+        materiau = np.array(correspondance, dtype=np.int32)[d["materiau"]] if correspondance else d["materiau"]
+
+        boucles = d["boucles"]
+        uv = d.get("uv", np.zeros(len(boucles) * 2, dtype=np.float32)) if avec_uv else None
+        if np.linalg.det(m[:3, :3]) < 0:
+            # même premier sommet, ordre inversé dans chaque face
+            debut_face = np.repeat(d["debuts"], d["tailles"])
+            rang = np.arange(len(boucles)) - debut_face
+            ordre = debut_face + np.where(rang == 0, 0, np.repeat(d["tailles"], d["tailles"]) - rang)
+            boucles = boucles[ordre]
+            if uv is not None:
+                uv = uv.reshape(-1, 2)[ordre].ravel()
+
+        morceaux.append({"co": co, "boucles": boucles + decalage, "debuts": d["debuts"], "tailles": d["tailles"],
+                         "materiau": materiau, "lisse": d["lisse"], "uv": uv})
+        decalage += len(co)
+
+    debuts, total_boucles = [], 0
+    for morceau in morceaux:
+        debuts.append(morceau["debuts"] + total_boucles)
+        total_boucles += len(morceau["boucles"])
+
+    donnees = {
+        "co": np.concatenate([m["co"] for m in morceaux]).astype(np.float32).ravel(),
+        "boucles": np.concatenate([m["boucles"] for m in morceaux]).astype(np.int32),
+        "debuts": np.concatenate(debuts).astype(np.int32),
+        "tailles": np.concatenate([m["tailles"] for m in morceaux]).astype(np.int32),
+        "materiau": np.concatenate([m["materiau"] for m in morceaux]).astype(np.int32),
+        "lisse": np.concatenate([m["lisse"] for m in morceaux]),
+    }
+    if avec_uv:
+        donnees["uv"] = np.concatenate([m["uv"] for m in morceaux]).astype(np.float32)
+
+    ancien = cible.data
+    cible.data = mesh_cache.construire_maillage(ancien.name, donnees, materiaux=materiaux)
+    for obj in objets[1:]:
+        maillage = obj.data
+        bpy.data.objects.remove(obj, do_unlink=True)
+        if maillage.users == 0:
+            bpy.data.meshes.remove(maillage)
+    if ancien.users == 0:
+        bpy.data.meshes.remove(ancien)
+    return cible
+
+
+def appliquer_modificateurs(obj, modificateurs=None):
+    """
+    modifier_apply : remplace le maillage par le résultat des premiers modificateurs de la pile.
+
+    Args:
+        obj: L'objet.
+        modificateurs: Les modificateurs à appliquer (par défaut toute la pile). Comme avec l'opérateur
+            appliqué en boucle, ce doivent être les premiers de la pile ; les suivants sont désactivés
+            le temps de l'évaluation puis gardés.
+    """
+    modificateurs = list(obj.modifiers) if modificateurs is None else list(modificateurs)
+    suivants = [m for m in obj.modifiers if m not in modificateurs]
+    etats = [m.show_viewport for m in suivants]
+    for m in suivants:
+        m.show_viewport = False
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = bpy.data.meshes.new_from_object(obj_eval, preserve_all_data_layers=True, depsgraph=depsgraph)
+
+    for m, etat in zip(suivants, etats):
+        m.show_viewport = etat
+    for m in modificateurs:
+        obj.modifiers.remove(m)
+
+    ancien = obj.data
+    nom = ancien.name
+    obj.data = mesh
+    if ancien.users == 0:
+        bpy.data.meshes.remove(ancien)
+    mesh.name = nom
+    return obj
+
+
+
+# ==========================================
+#  BENCHMARK
+# ==========================================
+
+def benchmark_primitives(nombre=100):
+    """
+    Compare le coût par appel des opérateurs et de ce module sur la même séquence :
+    sphère UV + cône + cube, échelle appliquée, lissage, fusion des trois.
+
+    Returns:
+        tuple: (ms par séquence avec bpy.ops, ms par séquence sans opérateur)
+    """
+    def avec_operateurs():
+        bpy.ops.object.select_all(action='DESELECT')
+        bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16, radius=1.0, location=(0, 0, 0))
+        a = bpy.context.active_object
+        a.scale = (1.5, 1.0, 1.0)
+        bpy.ops.object.transform_apply(scale=True)
+        bpy.ops.object.shade_smooth()
+        bpy.ops.mesh.primitive_cone_add(vertices=16, radius1=1.0, depth=2.0, location=(0, 0, 2))
+        b = bpy.context.active_object
+        bpy.ops.mesh.primitive_cube_add(size=1.0, location=(0, 0, -1))
+        c = bpy.context.active_object
+        for o in (a, b, c):
+            o.select_set(True)
+        bpy.context.view_layer.objects.active = a
+        bpy.ops.object.join()
+        return a
+
+    def sans_operateur():
+        a = sphere_uv(segments=32, anneaux=16, rayon=1.0, echelle=(1.5, 1.0, 1.0))
+        appliquer_transformations(a, rotation=False)
+        lisser(a)
+        b = cone(sommets=16, rayon1=1.0, profondeur=2.0, location=(0, 0, 2))
+        c = cube(taille=1.0, location=(0, 0, -1))
+        return joindre([a, b, c])
+
+    resultats = []
+    for construire in (avec_operateurs, sans_operateur):
+        crees = []
+        debut = time.perf_counter()
+        for _ in range(nombre):
+            crees.append(construire())
+        duree = (time.perf_counter() - debut) / nombre * 1000
+        resultats.append(duree)
+        for obj in crees:
+            maillage = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if maillage.users == 0:
+                bpy.data.meshes.remove(maillage)
+
+    bprint(f"Primitives ({nombre} séquences) : bpy.ops {resultats[0]:.2f} ms, sans opérateur {resultats[1]:.2f} ms "
+           f"(x{resultats[0] / max(resultats[1], 1e-9):.1f})")
+    return tuple(resultats)
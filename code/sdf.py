@@ -0,0 +1,254 @@
+import math
+import time
+
+import numpy as np
+
+
+
+# ==========================================
+#  SURFACES IMPLICITES (CHAMPS DE DISTANCE SIGNÉE)
+# ==========================================
+#
+# Une forme est une fonction f(p) -> distance signée, négative à l'intérieur, évaluée sur un tableau
+# de points (N, 3). Les découpes booléennes deviennent des min/max de champs :
+#   union(a, b)      = min(a, b)
+#   difference(a, b) = max(a, -b)
+# et un Displace de force s le long de la normale devient f - s * (bruit - mid_level).
+#
+# Le maillage est extrait ensuite sur une grille de voxels, tranche par tranche (voir extraire_surface),
+# sans bpy : le nombre de faces suit la taille du voxel (~ aire / taille_voxel²).
+#
+# Les primitives reprennent les conventions des primitives Blender (rotation = angles d'Euler XYZ
+# en radians, appliqués après l'échelle), pour qu'un outil booléen se traduise directement.
+
+
+
+def matrice_euler(rotation):
+    """Matrice 3x3 d'une rotation d'Euler XYZ (convention de rotation_euler)"""
+    rx, ry, rz = rotation
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    mx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    my = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    mz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return mz @ my @ mx
+
+
+def _dans_repere(p, centre, rotation):
+    """Coordonnées des points dans le repère local d'une primitive (centre, rotation)"""
+    q = p - np.asarray(centre, dtype=np.float64)
+    if rotation is not None and any(rotation):
+        # p = R q  ->  q = R^T p, soit en lignes q = p R
+        q = q @ matrice_euler(rotation)
+    return q
+
+
+def ellipsoide(p, centre, rayons, rotation=None):
+    """
+    Ellipsoïde (sphère UV mise à l'échelle).
+
+    Distance approchée (borne de Quilez) : exacte sur la surface et pour une sphère, un peu sous-estimée
+    ailleurs, ce qui suffit pour l'extraction du maillage.
+    """
+    q = _dans_repere(p, centre, rotation)
+    r = np.asarray(rayons, dtype=np.float64)
+    k0 = np.linalg.norm(q / r, axis=1)
+    k1 = np.maximum(np.linalg.norm(q / (r * r), axis=1), 1e-12)
+    return k0 * (k0 - 1.0) / k1
+
+
+def cylindre_elliptique(p, centre, rayons, longueur, rotation=None):
+    """Cylindre d'axe Z local, de section elliptique rayons=(rx, ry) et de longueur totale donnée"""
+    q = _dans_repere(p, centre, rotation)
+    r = np.asarray(rayons, dtype=np.float64)
+    xy = q[:, :2]
+    k0 = np.linalg.norm(xy / r, axis=1)
+    k1 = np.maximum(np.linalg.norm(xy / (r * r), axis=1), 1e-12)
+    section = k0 * (k0 - 1.0) / k1
+    return np.maximum(section, np.abs(q[:, 2]) - longueur / 2.0)
+
+
+def pyramide(p, centre, rayon, hauteur, cotes=3, rotation=None):
+    """
+    Cône à base polygonale (primitive_cone_add avec peu de sommets) : base de rayon donné en z = -hauteur/2,
+    pointe en z = +hauteur/2. Le premier sommet de la base est sur +Y, comme dans Blender.
+
+    Distance : max des plans des faces (exacte sur les faces, bornée près des arêtes).
+    """
+    q = _dans_repere(p, centre, rotation)
+    apotheme = rayon * math.cos(math.pi / cotes)
+    pente = apotheme / hauteur
+    norme = math.sqrt(1.0 + pente * pente)
+    h = q[:, 2] + hauteur / 2.0
+
+    d = np.maximum(-h, q[:, 2] - hauteur / 2.0)
+    for k in range(cotes):
+        # normale de la face k : à mi-chemin entre les sommets k et k+1, vus depuis l'axe
+        angle = math.pi / 2 + 2 * math.pi * (k + 0.5) / cotes
+        face = (q[:, 0] * math.cos(angle) + q[:, 1] * math.sin(angle) + pente * h - apotheme) / norme
+        d = np.maximum(d, face)
+    return d
+
+
+
+# ==========================================
+#  EXTRACTION DE LA SURFACE
+# ==========================================
+
+# Octets de travail par point de la grille pendant l'évaluation d'une tranche (champ, coordonnées,
+# temporaires NumPy du champ et des croisements) : sert à dimensionner les tranches
+OCTETS_PAR_POINT = 200
+
+
+def _sommets_tranche(d, dedans):
+    """
+    Un sommet par cellule traversée par la surface ("surface nets") : moyenne des points où la surface
+    coupe les 12 arêtes de la cellule, en coordonnées locales à la cellule ([0, 1]^3).
+
+    Returns:
+        tuple: (somme des positions (cx, cy, cz, 3), nombre de croisements (cx, cy, cz))
+    """
+    nx, ny, nz = d.shape
+    somme = np.zeros((nx - 1, ny - 1, nz - 1, 3), dtype=np.float32)
+    compte = np.zeros((nx - 1, ny - 1, nz - 1), dtype=np.uint8)
+
+    for axe in range(3):
+        bas = [slice(None)] * 3
+        haut = [slice(None)] * 3
+        bas[axe] = slice(0, -1)
+        haut[axe] = slice(1, None)
+        d0, d1 = d[tuple(bas)], d[tuple(haut)]
+        change = dedans[tuple(bas)] != dedans[tuple(haut)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(change, d0 / (d0 - d1), 0.0).astype(np.float32)
+
+        # Chaque arête touche 4 cellules : décalages (0 ou 1) sur les deux autres axes
+        autres = [a for a in range(3) if a != axe]
+        for da in (0, 1):
+            for db in (0, 1):
+                sel = [slice(None)] * 3
+                sel[axe] = slice(None)
+                sel[autres[0]] = slice(da, da + d.shape[autres[0]] - 1)
+                sel[autres[1]] = slice(db, db + d.shape[autres[1]] - 1)
+                sel = tuple(sel)
+                c = change[sel]
+                compte += c
+                somme[..., axe] += t[sel]
+                somme[..., autres[0]] += c * da
+                somme[..., autres[1]] += c * db
+    return somme, compte
+
+
+def _quads_tranche(dedans, nb_couches, k0, nz, ids_cellule):
+    """
+    Une face par arête de la grille traversée par la surface, reliant les sommets des 4 cellules qui la
+    partagent. L'ordre des cellules est inversé selon le sens de traversée : normales vers l'extérieur.
+
+    Seules les arêtes "possédées" par la tranche (couches k0 .. k0 + nb_couches - 1) sont traitées,
+    pour qu'aucune face ne soit créée deux fois entre deux tranches.
+    """
+    quads = []
+    # (axe de l'arête, les deux autres axes dans le sens direct)
+    for axe, (a, b) in ((0, (1, 2)), (1, (2, 0)), (2, (0, 1))):
+        bas = [slice(None)] * 3
+        haut = [slice(None)] * 3
+        bas[axe] = slice(0, -1)
+        haut[axe] = slice(1, None)
+        d_bas, d_haut = dedans[tuple(bas)], dedans[tuple(haut)]
+        change = d_bas != d_haut
+        i, j, k = np.nonzero(change[:, :, :nb_couches])
+        idx = [i, j, k]
+        # Arêtes du bord de la grille : il leur manque des cellules (le champ y est positif normalement)
+        garde = np.ones(len(i), dtype=bool)
+        for autre in (a, b):
+            n = nz if autre == 2 else dedans.shape[autre]
+            position = idx[autre] + (k0 if autre == 2 else 0)
+            garde &= (position >= 1) & (position < n - 1)
+        i, j, k = i[garde], j[garde], k[garde]
+        entrant = d_bas[i, j, k]
+        idx = [i, j, k]
+
+        # Les 4 cellules autour de l'arête : (a-1, b-1), (a, b-1), (a, b), (a-1, b)
+        coins = []
+        for da, db in ((1, 1), (0, 1), (0, 0), (1, 0)):
+            c = list(idx)
+            c[a] = c[a] - da
+            c[b] = c[b] - db
+            coins.append(ids_cellule(c[0], c[1], c[2] + k0))
+        face = np.stack(coins, axis=1)
+        face[~entrant] = face[~entrant][:, ::-1]
+        quads.append(face)
+    return np.concatenate(quads)
+
+
+def extraire_surface(champ, boite_min, boite_max, taille_voxel, memoire_max_mo=256):
+    """
+    Maille la surface f = 0 d'un champ de distance signée sur une grille régulière.
+
+    La grille est parcourue par tranches de couches en Z : seule une tranche du champ est en mémoire à la
+    fois (taille bornée par memoire_max_mo), seuls les sommets et faces de la surface sont conservés.
+    Le champ doit être positif sur le bord de la boîte (prévoir une marge de quelques voxels).
+    Le maillage (des quads) est fermé ; aux pincements plus fins qu'un voxel, une arête peut border 4 faces.
+
+    Args:
+        champ (callable): champ(points (N, 3)) -> distances (N,).
+        boite_min, boite_max (tuple): Boîte englobante de la forme.
+        taille_voxel (float): Pas de la grille ; le maillage a ~ aire / taille_voxel² faces.
+        memoire_max_mo (float): Mémoire de travail visée pour une tranche.
+
+    Returns:
+        tuple: (co (V, 3) float32, quads (F, 4) int32, statistiques)
+    """
+    debut = time.perf_counter()
+    boite_min = np.asarray(boite_min, dtype=np.float64)
+    boite_max = np.asarray(boite_max, dtype=np.float64)
+    nx, ny, nz = (np.ceil((boite_max - boite_min) / taille_voxel).astype(int) + 1).tolist()
+    axes = [boite_min[i] + np.arange(n) * taille_voxel for i, n in enumerate((nx, ny, nz))]
+    cx, cy = nx - 1, ny - 1
+
+    couches = int(memoire_max_mo * 1024 * 1024 // (nx * ny * OCTETS_PAR_POINT))
+    couches = max(1, min(couches, nz - 1))
+
+    def ids_cellule(i, j, k):
+        return (k.astype(np.int64) * cy + j) * cx + i
+
+    ids, positions, faces = [], [], []
+    pic = 0
+    gx, gy = np.meshgrid(axes[0], axes[1], indexing="ij")
+    for k0 in range(0, nz - 1, couches):
+        k1 = min(k0 + couches, nz - 1)
+        z = axes[2][k0:k1 + 1]
+        points = np.empty((nx, ny, len(z), 3))
+        points[..., 0] = gx[..., None]
+        points[..., 1] = gy[..., None]
+        points[..., 2] = z
+        d = np.asarray(champ(points.reshape(-1, 3)), dtype=np.float32).reshape(nx, ny, len(z))
+        del points
+        dedans = d < 0
+
+        somme, compte = _sommets_tranche(d, dedans)
+        i, j, k = np.nonzero(compte)
+        local = somme[i, j, k] / compte[i, j, k, None]
+        ids.append(ids_cellule(i, j, k + k0))
+        positions.append(boite_min + (np.column_stack((i, j, k + k0)) + local) * taille_voxel)
+
+        if k1 - k0 > 0:
+            faces.append(_quads_tranche(dedans, k1 - k0, k0, nz, ids_cellule))
+        pic = max(pic, d.size * OCTETS_PAR_POINT)
+
+    # Sommets rangés par identifiant de cellule et faces par sommets : le maillage ne dépend pas
+    # du découpage en tranches (même résultat, sommet pour sommet, quelle que soit memoire_max_mo)
+    ids = np.concatenate(ids)
+    ordre = np.argsort(ids)
+    co = np.concatenate(positions)[ordre].astype(np.float32)
+    quads = np.searchsorted(ids[ordre], np.concatenate(faces)).astype(np.int32)
+    quads = quads[np.lexsort(quads.T[::-1])]
+
+    stats = {
+        "grille": (nx, ny, nz),
+        "tranches": math.ceil((nz - 1) / couches),
+        "memoire_tranche_mo": pic / (1024 * 1024),
+        "temps": time.perf_counter() - debut,
+    }
+    return co, quads, stats
@@ -0,0 +1,226 @@
+import hashlib
+import time
+
+import bpy
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+from utils import bprint
+import terrain
+
+
+
+# ==========================================
+#  SOL DES ÎLES
+# ==========================================
+#
+# Chaque île expose un champ de hauteur (voir terrain.rasteriser_hauteurs) calculé une fois
+# sur son maillage final évalué (modificateurs compris, coordonnées monde). Les générateurs
+# de décor y lisent la hauteur et la normale du sol en bloc, au lieu de poser leurs objets
+# à une hauteur fixe ou de lancer un rayon par objet.
+#
+# Le champ est gardé en mémoire tant que la géométrie de l'île ne change pas (empreinte des
+# sommets monde) : un second générateur sur la même île ne le recalcule pas.
+
+PAS_CHAMP = 0.5
+
+_champs = {}  # nom de l'île -> {"empreinte", "pas", "champ"}
+_arbres = {}  # nom de l'objet -> {"empreinte", "arbre", "z_max"}
+
+
+
+def triangles_monde(obj, evalue=True):
+    """
+    Sommets (coordonnées monde) et triangles d'un objet, en deux foreach_get.
+
+    Args:
+        obj (bpy.types.Object): Objet maillage.
+        evalue (bool): Lit le maillage évalué (modificateurs appliqués) plutôt que le maillage brut.
+
+    Returns:
+        tuple: (co (N, 3) float64, triangles (M, 3) int32)
+    """
+    source = obj.evaluated_get(bpy.context.evaluated_depsgraph_get()) if evalue else obj
+    mesh = source.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+        mesh.vertices.foreach_get("co", co)
+        triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", triangles)
+    finally:
+        source.to_mesh_clear()
+
+    matrice = np.array(obj.matrix_world)
+    co = co.reshape(-1, 3) @ matrice[:3, :3].T + matrice[:3, 3]
+    return co, triangles.reshape(-1, 3)
+
+
+def empreinte_geometrie(co, triangles):
+    """Empreinte d'une géométrie monde : change dès qu'un sommet bouge ou que la topologie change"""
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(co, dtype=np.float32).tobytes())
+    h.update(np.ascontiguousarray(triangles, dtype=np.int32).tobytes())
+    return h.hexdigest()
+
+
+def champ_hauteur(obj, pas=PAS_CHAMP):
+    """
+    Champ de hauteur du maillage final d'une île (recalculé seulement si sa géométrie a changé).
+
+    Args:
+        obj (bpy.types.Object): Île (ou tout objet maillage servant de sol).
+        pas (float): Distance entre deux nœuds de la grille, en mètres.
+
+    Returns:
+        dict: Champ à interroger avec hauteur_en / normale_en (None si obj est None).
+    """
+    if obj is None:
+        return None
+
+    debut = time.perf_counter()
+    co, triangles = triangles_monde(obj)
+    empreinte = empreinte_geometrie(co, triangles)
+    entree = _champs.get(obj.name)
+    if entree is not None and entree["empreinte"] == empreinte and entree["pas"] == pas:
+        return entree["champ"]
+
+    champ = terrain.rasteriser_hauteurs(co, triangles, pas)
+    _champs[obj.name] = {"empreinte": empreinte, "pas": pas, "champ": champ}
+    ny, nx = champ["z"].shape
+    bprint(f"⛰️ Champ de hauteur '{obj.name}' : {nx}x{ny} nœuds ({len(triangles):,} triangles) "
+           f"en {time.perf_counter() - debut:.2f}s")
+    return champ
+
+
+def oublier(nom=None):
+    """Retire le champ et l'arbre BVH d'une île de la mémoire (tous si nom est None)"""
+    if nom is None:
+        _champs.clear()
+        _arbres.clear()
+    else:
+        _champs.pop(nom, None)
+        _arbres.pop(nom, None)
+
+
+def hauteur_en(champ, x, y):
+    """Hauteur du sol en (x, y), scalaires ou tableaux (NaN hors de l'île)"""
+    return terrain.hauteur_en(champ, x, y)
+
+
+def normale_en(champ, x, y):
+    """Normale du sol en (x, y) : tableau (..., 3) (NaN hors de l'île)"""
+    return terrain.normale_en(champ, x, y)
+
+
+def incliner(rotation, normale):
+    """
+    Penche une rotation pour que l'axe Z local de l'objet suive la normale du sol.
+
+    Args:
+        rotation (Euler): Rotation de l'objet posé à plat (son cap est conservé).
+        normale (tuple): Normale du sol ; une normale NaN laisse la rotation inchangée.
+
+    Returns:
+        Euler: La rotation penchée.
+    """
+    n = Vector(normale)
+    if n.length < 1e-9 or n.length != n.length:
+        return rotation.copy()
+    penche = Vector((0.0, 0.0, 1.0)).rotation_difference(n.normalized())
+    return (penche @ rotation.to_quaternion()).to_euler(rotation.order, rotation)
+
+
+
+# ==========================================
+#  ACCROCHAGE PAR LANCER DE RAYONS
+# ==========================================
+#
+# Alternative exacte au champ de hauteur : un BVHTree par île (maillage évalué, coordonnées monde),
+# gardé tant que l'empreinte de sa géométrie ne change pas. Tous les placements en attente sont
+# accrochés en un seul passage : un rayon vertical par point, lancé depuis au-dessus de l'île.
+
+PENTE_MAX_DEG = 35.0
+
+
+def arbre_bvh(obj):
+    """
+    BVHTree du maillage final d'un objet (reconstruit seulement si sa géométrie a changé).
+
+    Returns:
+        dict: {"empreinte", "arbre" (BVHTree), "z_max" (plus haut sommet monde)}.
+    """
+    co, triangles = triangles_monde(obj)
+    empreinte = empreinte_geometrie(co, triangles)
+    entree = _arbres.get(obj.name)
+    if entree is not None and entree["empreinte"] == empreinte:
+        return entree
+
+    debut = time.perf_counter()
+    entree = {
+        "empreinte": empreinte,
+        "arbre": BVHTree.FromPolygons(co.tolist(), triangles.tolist(), all_triangles=True),
+        "z_max": float(co[:, 2].max()) if len(co) else 0.0,
+    }
+    _arbres[obj.name] = entree
+    bprint(f"🌲 BVH '{obj.name}' : {len(triangles):,} triangles en {time.perf_counter() - debut:.2f}s")
+    return entree
+
+
+def accrocher(obj, xs, ys, pente_max_deg=PENTE_MAX_DEG, niveau_eau=None, eaux=(), rapport=True, arbre=None):
+    """
+    Accroche un lot de placements au sol d'une île par lancer de rayons verticaux.
+
+    Un placement est rejeté si son rayon manque l'île, si la pente dépasse pente_max_deg,
+    si le point touché est sous niveau_eau, ou si une des surfaces d'eau est touchée avant le sol.
+
+    Args:
+        obj (bpy.types.Object): Île servant de sol.
+        xs, ys (array-like): Coordonnées monde des placements.
+        pente_max_deg (float): Pente maximale acceptée, en degrés.
+        niveau_eau (float): Hauteur monde sous laquelle le sol est considéré comme immergé (None : ignorée).
+        eaux (iterable): Objets d'eau (surfaces) qui masquent le sol.
+        rapport (bool): Affiche le nombre de rayons, le débit (rayons/s) et les rejets.
+        arbre (dict): Entrée déjà obtenue par arbre_bvh(obj), pour ne pas relire le maillage à chaque lot.
+
+    Returns:
+        dict: "z" (N,), "normales" (N, 3), "rejet" (N,) booléens ; NaN là où le rayon a manqué l'île.
+    """
+    xs = np.atleast_1d(np.asarray(xs, dtype=np.float64)).ravel()
+    ys = np.atleast_1d(np.asarray(ys, dtype=np.float64)).ravel()
+    n = len(xs)
+    z = np.full(n, np.nan)
+    normales = np.full((n, 3), np.nan)
+    rejet = np.ones(n, dtype=bool)
+
+    entree = arbre if arbre is not None else arbre_bvh(obj)
+    surfaces_eau = [arbre_bvh(e) for e in eaux if e is not None]
+    depart = max([entree["z_max"]] + [e["z_max"] for e in surfaces_eau]) + 1.0
+    cos_pente = np.cos(np.radians(pente_max_deg))
+    vers_le_bas = Vector((0.0, 0.0, -1.0))
+    lancer = entree["arbre"].ray_cast
+
+    debut = time.perf_counter()
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        origine = Vector((x, y, depart))
+        impact, normale, _, _ = lancer(origine, vers_le_bas)
+        if impact is None:
+            continue
+        if normale.z < 0.0:
+            normale = -normale
+        z[i] = impact.z
+        normales[i] = normale
+
+        if normale.z < cos_pente or (niveau_eau is not None and impact.z <= niveau_eau):
+            continue
+        eau = [e["arbre"].ray_cast(origine, vers_le_bas)[0] for e in surfaces_eau]
+        if any(h is not None and h.z >= impact.z for h in eau):
+            continue
+        rejet[i] = False
+    duree = time.perf_counter() - debut
+
+    if rapport:
+        bprint(f"🎯 Accrochage sur '{obj.name}' : {n} rayons en {duree:.3f}s "
+               f"({n / max(duree, 1e-9):,.0f} rayons/s), {int(rejet.sum())} rejetés")
+    return {"z": z, "normales": normales, "rejet": rejet}
@@ -0,0 +1,389 @@
+import math
+import random
+import time
+from array import array
+
+import numpy as np
+
+
+
+class GrilleOccupation:
+    """
+    Index d'occupation sur grille uniforme pour le placement d'objets.
+
+    Chaque entrée est un disque (x, y, rayon), stocké dans des tableaux compacts ; la grille associe
+    à chaque cellule la liste des entrées dont le centre y tombe. La question "ce disque est-il libre ?"
+    ne regarde que les cellules voisines : temps constant en moyenne, quel que soit le nombre d'objets.
+
+    Deux règles de collision existent :
+        "somme"    : conflit si distance < rayon_demande + rayon_entree (cimetière de Ringo)
+        "obstacle" : conflit si distance < rayon_entree, ou < rayon_demande si l'entrée n'a pas de rayon
+                     propre (rayon 0). C'est la règle de la Capitale : les zones réservées imposent leur
+                     propre rayon, les maisons et arbres utilisent la distance minimale demandée.
+    """
+
+    def __init__(self, taille_cellule=2.0, regle="somme"):
+        if regle not in ("somme", "obstacle"):
+            raise ValueError(f"Règle de collision inconnue : {regle}")
+        self.taille_cellule = float(taille_cellule)
+        self.regle = regle
+        self.xs = array('d')
+        self.ys = array('d')
+        self.rayons = array('f')
+        self.rayon_max = 0.0
+        self._cellules = {}
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cellule(self, x, y):
+        return math.floor(x / self.taille_cellule), math.floor(y / self.taille_cellule)
+
+    def ajouter(self, x, y, rayon=0.0):
+        """Enregistre un disque occupé et retourne son indice"""
+        indice = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.rayons.append(rayon)
+        self.rayon_max = max(self.rayon_max, rayon)
+        self._cellules.setdefault(self._cellule(x, y), []).append(indice)
+        return indice
+
+    def copier(self):
+        """Retourne une copie indépendante de l'index"""
+        copie = GrilleOccupation(self.taille_cellule, self.regle)
+        copie.xs, copie.ys, copie.rayons = array('d', self.xs), array('d', self.ys), array('f', self.rayons)
+        copie.rayon_max = self.rayon_max
+        copie._cellules = {c: list(indices) for c, indices in self._cellules.items()}
+        return copie
+
+    def est_libre(self, x, y, rayon):
+        """Retourne True si un disque de ce rayon centré en (x, y) ne chevauche aucune entrée"""
+        if self.regle == "somme":
+            portee = rayon + self.rayon_max
+        else:
+            portee = max(rayon, self.rayon_max)
+
+        n = int(math.ceil(portee / self.taille_cellule))
+        cx, cy = self._cellule(x, y)
+        xs, ys, rayons = self.xs, self.ys, self.rayons
+
+        for gx in range(cx - n, cx + n + 1):
+            for gy in range(cy - n, cy + n + 1):
+                for i in self._cellules.get((gx, gy), ()):
+                    if self.regle == "somme":
+                        seuil = rayon + rayons[i]
+                    else:
+                        seuil = rayons[i] if rayons[i] > 0.0 else rayon
+                    dx = x - xs[i]
+                    dy = y - ys[i]
+                    if dx * dx + dy * dy < seuil * seuil:
+                        return False
+        return True
+
+
+
+# ==========================================
+#  ÉCHANTILLONNAGE DE POISSON (BRIDSON)
+# ==========================================
+
+def echantillonner_poisson(grille, rayon, est_valide, rayon_zone, centre=(0.0, 0.0), alea=random,
+                           k=30, rayon_entree=0.0, echecs_graines=30):
+    """
+    Remplit une zone circulaire avec un semis "bruit bleu" (algorithme de Bridson) jusqu'à saturation.
+
+    Chaque point actif propose k candidats dans l'anneau [rayon, 2*rayon] autour de lui, puis est
+    retiré s'il n'en place aucun : le coût est linéaire en nombre de points. Quand la liste active
+    est vide, de nouvelles graines sont tirées au hasard pour atteindre les régions déconnectées
+    (ex : séparées par une rivière) ; on s'arrête après echecs_graines graines refusées d'affilée.
+
+    Args:
+        grille (GrilleOccupation): Emplacements déjà pris (non modifiée, on travaille sur une copie).
+        rayon (float): Distance minimale demandée pour chaque nouveau point.
+        est_valide (callable): est_valide(x, y) -> bool, exclut les zones interdites.
+        rayon_zone (float): Rayon du disque à remplir.
+        centre (tuple): Centre (x, y) du disque.
+        alea: Source aléatoire (module random ou random.Random).
+        k (int): Nombre de candidats par point actif.
+        rayon_entree (float): Rayon enregistré pour chaque point accepté (règle de la grille).
+        echecs_graines (int): Nombre de graines refusées d'affilée avant d'arrêter.
+
+    Returns:
+        list: Les points (x, y) acceptés. Leur nombre est la densité maximale atteignable.
+    """
+    travail = grille.copier()
+    cx, cy = centre
+    points = []
+    actifs = []
+
+    def accepter(x, y):
+        travail.ajouter(x, y, rayon_entree)
+        points.append((x, y))
+        actifs.append((x, y))
+
+    def acceptable(x, y):
+        return (math.hypot(x - cx, y - cy) <= rayon_zone
+                and est_valide(x, y)
+                and travail.est_libre(x, y, rayon))
+
+    echecs = 0
+    while True:
+        if not actifs:
+            if echecs >= echecs_graines:
+                break
+            angle = alea.uniform(0, 2 * math.pi)
+            r = rayon_zone * math.sqrt(alea.random())
+            x, y = cx + r * math.cos(angle), cy + r * math.sin(angle)
+            if acceptable(x, y):
+                accepter(x, y)
+                echecs = 0
+            else:
+                echecs += 1
+            continue
+
+        i = alea.randrange(len(actifs))
+        px, py = actifs[i]
+        for _ in range(k):
+            angle = alea.uniform(0, 2 * math.pi)
+            # Tirage uniforme en surface dans l'anneau [rayon, 2*rayon]
+            r = rayon * math.sqrt(alea.uniform(1.0, 4.0))
+            x, y = px + r * math.cos(angle), py + r * math.sin(angle)
+            if acceptable(x, y):
+                accepter(x, y)
+                break
+        else:
+            actifs[i] = actifs[-1]
+            actifs.pop()
+
+    return points
+
+
+
+# ==========================================
+#  DISPERSION PAR LOTS (NUMPY)
+# ==========================================
+
+def _paires_voisines(px, py, qx, qy, portee, taille_cellule):
+    """
+    Énumère les paires (point P, point Q) situées dans des cellules voisines, sans boucle Python par point.
+
+    Les points Q sont triés par clé de cellule ; pour chaque décalage de cellule, une recherche
+    dichotomique donne la plage de Q de la cellule voisine de chaque P. On avance ensuite "rang par rang"
+    dans ces plages : le nombre de tours est le nombre maximal de points par cellule, pas len(P).
+
+    Yields:
+        tuple: (indices dans P, indices dans Q) des paires candidates (à filtrer par distance).
+    """
+    if len(qx) == 0 or len(px) == 0:
+        return
+
+    decalage = 1 << 30
+    def cle(gx, gy):
+        return (gx + decalage) * (1 << 31) + (gy + decalage)
+
+    gqx = np.floor(qx / taille_cellule).astype(np.int64)
+    gqy = np.floor(qy / taille_cellule).astype(np.int64)
+    ordre = np.argsort(cle(gqx, gqy), kind="stable")
+    cles_q = cle(gqx, gqy)[ordre]
+
+    gpx = np.floor(px / taille_cellule).astype(np.int64)
+    gpy = np.floor(py / taille_cellule).astype(np.int64)
+    n = int(math.ceil(portee / taille_cellule))
+
+    for dx in range(-n, n + 1):
+        for dy in range(-n, n + 1):
+            cles = cle(gpx + dx, gpy + dy)
+            debut = np.searchsorted(cles_q, cles, side="left")
+            compte = np.searchsorted(cles_q, cles, side="right") - debut
+            for rang in range(int(compte.max())):
+                ip = np.flatnonzero(compte > rang)
+                yield ip, ordre[debut[ip] + rang]
+
+
+def disperser_anneau(grille, quantite, rayon, rayon_min, rayon_max, centre=(0.0, 0.0), alea=None,
+                     taille_lot=None, lots_vides_max=3):
+    """
+    Place jusqu'à quantite disques de rayon donné dans l'anneau [rayon_min, rayon_max], par lots NumPy.
+
+    Chaque lot tire des milliers de candidats d'un coup, élimine ceux qui touchent une entrée de la grille
+    (passe vectorisée), puis ne garde que les candidats qui ne touchent aucun candidat tiré avant eux
+    dans le même lot. Cette règle est un peu plus stricte que le placement un par un (un candidat
+    peut être écarté par un voisin lui-même rejeté) mais elle garantit l'absence de chevauchement sans
+    aucune boucle par candidat ; les lots suivants comblent les trous.
+
+    Args:
+        grille (GrilleOccupation): Emplacements déjà pris ; les disques acceptés y sont ajoutés.
+        quantite (int): Nombre de disques voulus.
+        rayon (float): Rayon de collision de chaque disque.
+        rayon_min, rayon_max (float): Bornes de l'anneau autour du centre.
+        centre (tuple): Centre (x, y) de l'anneau.
+        alea (np.random.Generator): Source aléatoire NumPy (une nouvelle par défaut).
+        taille_lot (int): Candidats par lot (par défaut 4 x le nombre restant, au moins 256).
+        lots_vides_max (int): On s'arrête après ce nombre de lots d'affilée sans aucun disque accepté.
+
+    Returns:
+        tuple: (xs, ys) tableaux des centres acceptés, dans l'ordre d'acceptation.
+    """
+    alea = alea if alea is not None else np.random.default_rng()
+    cx, cy = centre
+    acceptes_x, acceptes_y = [], []
+    restant = quantite
+    lots_vides = 0
+
+    while restant > 0 and lots_vides < lots_vides_max:
+        m = taille_lot or max(256, 4 * restant)
+
+        # 1. Candidats uniformes en surface dans l'anneau
+        angle = alea.uniform(0.0, 2 * math.pi, m)
+        r = np.sqrt(alea.uniform(rayon_min ** 2, rayon_max ** 2, m))
+        x = cx + r * np.cos(angle)
+        y = cy + r * np.sin(angle)
+        ok = np.ones(m, dtype=bool)
+
+        # 2. Conflits avec les disques déjà enregistrés (même règle que GrilleOccupation.est_libre)
+        # (copies : la grille doit rester redimensionnable pendant qu'on y ajoute les acceptés)
+        gx = np.array(grille.xs, dtype=np.float64)
+        gy = np.array(grille.ys, dtype=np.float64)
+        gr = np.array(grille.rayons, dtype=np.float64)
+        portee = rayon + grille.rayon_max if grille.regle == "somme" else max(rayon, grille.rayon_max)
+        for ip, iq in _paires_voisines(x, y, gx, gy, portee, grille.taille_cellule):
+            if grille.regle == "somme":
+                seuil = rayon + gr[iq]
+            else:
+                seuil = np.where(gr[iq] > 0.0, gr[iq], rayon)
+            proches = (x[ip] - gx[iq]) ** 2 + (y[ip] - gy[iq]) ** 2 < seuil ** 2
+            ok[ip[proches]] = False
+
+        # 3. Conflits entre candidats du lot : un candidat cède la place à tout candidat tiré avant lui
+        ix = np.flatnonzero(ok)
+        seuil = 2 * rayon if grille.regle == "somme" else rayon
+        garde = np.ones(len(ix), dtype=bool)
+        for ip, iq in _paires_voisines(x[ix], y[ix], x[ix], y[ix], seuil, grille.taille_cellule):
+            proches = (iq < ip) & ((x[ix[ip]] - x[ix[iq]]) ** 2 + (y[ix[ip]] - y[ix[iq]]) ** 2 < seuil ** 2)
+            garde[ip[proches]] = False
+        ix = ix[garde][:restant]
+
+        # 4. Enregistrement des disques acceptés
+        for px, py in zip(x[ix].tolist(), y[ix].tolist()):
+            grille.ajouter(px, py, rayon)
+        acceptes_x.append(x[ix])
+        acceptes_y.append(y[ix])
+        restant -= len(ix)
+        lots_vides = lots_vides + 1 if len(ix) == 0 else 0
+
+    if not acceptes_x:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(acceptes_x), np.concatenate(acceptes_y)
+
+
+
+# ==========================================
+#  BENCHMARK
+# ==========================================
+
+def benchmark_placement(tailles=(100, 1000, 10000), rayon_objet=1.0, essais=30, graine=0):
+    """
+    Compare le placement par parcours linéaire de la liste des objets et par GrilleOccupation.
+
+    La zone de placement grandit avec le nombre d'objets (densité constante), comme quand on
+    augmente nb_maisons / nb_tombes avec la taille de l'île.
+
+    Args:
+        tailles (tuple): Nombres d'objets à placer.
+        rayon_objet (float): Rayon de collision de chaque objet.
+        essais (int): Tentatives aléatoires par objet.
+        graine (int): Graine du tirage (les deux méthodes voient les mêmes candidats).
+
+    Returns:
+        list: Un tuple (n, places_lineaire, temps_lineaire, places_grille, temps_grille) par taille.
+    """
+    resultats = []
+    for n in tailles:
+        # Surface choisie pour qu'environ 25% du disque soit couvert une fois les n objets posés
+        rayon_zone = math.sqrt(n * (2 * rayon_objet) ** 2 / 0.25)
+
+        def placer(est_libre, ajouter):
+            alea = random.Random(graine)
+            places = 0
+            for _ in range(n):
+                for _ in range(essais):
+                    angle = alea.uniform(0, 2 * math.pi)
+                    r = rayon_zone * math.sqrt(alea.random())
+                    x, y = r * math.cos(angle), r * math.sin(angle)
+                    if est_libre(x, y):
+                        ajouter(x, y)
+                        places += 1
+                        break
+            return places
+
+        objets = []
+
+        def libre_lineaire(x, y):
+            for ox, oy, orayon in objets:
+                if math.hypot(x - ox, y - oy) < rayon_objet + orayon:
+                    return False
+            return True
+
+        debut = time.perf_counter()
+        places_lineaire = placer(libre_lineaire, lambda x, y: objets.append((x, y, rayon_objet)))
+        temps_lineaire = time.perf_counter() - debut
+
+        grille = GrilleOccupation(taille_cellule=2 * rayon_objet, regle="somme")
+        debut = time.perf_counter()
+        places_grille = placer(lambda x, y: grille.est_libre(x, y, rayon_objet),
+                               lambda x, y: grille.ajouter(x, y, rayon_objet))
+        temps_grille = time.perf_counter() - debut
+
+        print(f"{n:>6} objets : linéaire {temps_lineaire:8.3f} s ({places_lineaire} posés) | "
+              f"grille {temps_grille:8.3f} s ({places_grille} posés) | x{temps_lineaire / max(temps_grille, 1e-9):.0f}")
+        resultats.append((n, places_lineaire, temps_lineaire, places_grille, temps_grille))
+
+    return resultats
+
+
+
+def benchmark_dispersion(tailles=(150, 1000, 10000), rayon_objet=0.8, graine=0):
+    """
+    Compare la dispersion un par un (50 essais par objet, comme le cimetière de Ringo) et disperser_anneau().
+
+    L'anneau grandit avec le nombre d'objets pour garder une densité atteignable (~25% de surface couverte).
+
+    Returns:
+        list: Un tuple (n, places_un_par_un, temps_un_par_un, places_lots, temps_lots) par taille.
+    """
+    resultats = []
+    for n in tailles:
+        rayon_max = math.sqrt(n * (2 * rayon_objet) ** 2 / 0.25 / math.pi) * 1.05
+        rayon_min = 0.3 * rayon_max
+
+        alea = random.Random(graine)
+        grille = GrilleOccupation(taille_cellule=2.0, regle="somme")
+        debut = time.perf_counter()
+        places_un = 0
+        for _ in range(n):
+            for _ in range(50):
+                angle = alea.uniform(0, 2 * math.pi)
+                r = math.sqrt(alea.uniform(rayon_min ** 2, rayon_max ** 2))
+                x, y = r * math.cos(angle), r * math.sin(angle)
+                if grille.est_libre(x, y, rayon_objet):
+                    grille.ajouter(x, y, rayon_objet)
+                    places_un += 1
+                    break
+        temps_un = time.perf_counter() - debut
+
+        grille = GrilleOccupation(taille_cellule=2.0, regle="somme")
+        debut = time.perf_counter()
+        xs, _ = disperser_anneau(grille, n, rayon_objet, rayon_min, rayon_max, alea=np.random.default_rng(graine))
+        temps_lots = time.perf_counter() - debut
+
+        print(f"{n:>6} objets : un par un {temps_un:8.3f} s ({places_un} posés) | "
+              f"par lots {temps_lots:8.3f} s ({len(xs)} posés)")
+        resultats.append((n, places_un, temps_un, len(xs), temps_lots))
+
+    return resultats
+
+
+
+if __name__ == "__main__":
+    benchmark_placement()
+    benchmark_dispersion()
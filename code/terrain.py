@@ -0,0 +1,453 @@
+import math
+
+import numpy as np
+
+
+
+# ==========================================
+#  DESCRIPTION DES RELIEFS
+# ==========================================
+#
+# Un relief est une liste de "features" (des dictionnaires), appliquées dans l'ordre.
+# Chaque feature décrit :
+#   - une FORME (où elle agit) :
+#       "disque"  : centre (x, y), rayon
+#       "anneau"  : centre (x, y), rayon_int, rayon
+#       "boite"   : min (x, y), max (x, y), exclure [((x, y), rayon), ...] (disques retirés de la boîte)
+#       "partout" : tous les sommets
+#   - un PROFIL (quelle hauteur elle propose) :
+#       "cosinus"  : base + min(cos(d / rayon * pi/2) * hauteur, plafond), d = distance au centre
+#       "constant" : valeur
+#   - une OPÉRATION (comment cette hauteur se combine avec z) : "max", "min", "set", "add", "sub"
+#     (None : la feature ne modifie pas le terrain, ex : une allée seulement peinte)
+#   - optionnellement une "marge_placement" : la forme élargie de cette marge est interdite
+#     au placement d'objets (voir rasteriser_exclusions)
+#
+# Les coordonnées sont celles du maillage de l'île (repère local).
+
+
+
+def distance_signee(feature, x, y):
+    """
+    Distance signée de points 2D à la forme d'une feature (négative à l'intérieur).
+
+    Args:
+        feature (dict): La feature à évaluer.
+        x, y (np.ndarray): Coordonnées des points.
+
+    Returns:
+        np.ndarray: Distance signée de chaque point.
+    """
+    forme = feature["forme"]
+
+    if forme == "partout":
+        return np.full(np.shape(x), -np.inf)
+
+    if forme == "disque":
+        cx, cy = feature["centre"]
+        return np.hypot(x - cx, y - cy) - feature["rayon"]
+
+    if forme == "anneau":
+        cx, cy = feature["centre"]
+        d = np.hypot(x - cx, y - cy)
+        return np.maximum(feature["rayon_int"] - d, d - feature["rayon"])
+
+    if forme == "boite":
+        (xmin, ymin), (xmax, ymax) = feature["min"], feature["max"]
+        # Distance à une boîte alignée sur les axes (les bornes peuvent être infinies)
+        dx = np.maximum(xmin - x, x - xmax)
+        dy = np.maximum(ymin - y, y - ymax)
+        d = np.where((dx > 0) & (dy > 0), np.hypot(np.maximum(dx, 0), np.maximum(dy, 0)), np.maximum(dx, dy))
+        for (cx, cy), rayon in feature.get("exclure", ()):
+            d = np.maximum(d, rayon - np.hypot(x - cx, y - cy))
+        return d
+
+    raise ValueError(f"Forme de relief inconnue : {forme}")
+
+
+def boite_englobante(feature, marge=0.0):
+    """Retourne (xmin, xmax, ymin, ymax) : aucun point hors de cette boîte n'est touché par la feature"""
+    forme = feature["forme"]
+
+    if forme == "partout":
+        return -math.inf, math.inf, -math.inf, math.inf
+
+    if forme in ("disque", "anneau"):
+        cx, cy = feature["centre"]
+        r = feature["rayon"] + marge
+        return cx - r, cx + r, cy - r, cy + r
+
+    if forme == "boite":
+        (xmin, ymin), (xmax, ymax) = feature["min"], feature["max"]
+        return xmin - marge, xmax + marge, ymin - marge, ymax + marge
+
+    raise ValueError(f"Forme de relief inconnue : {forme}")
+
+
+def hauteur_profil(feature, x, y):
+    """Hauteur proposée par le profil de la feature pour des points situés dans sa forme"""
+    profil = feature["profil"]
+
+    if profil == "constant":
+        return np.full(np.shape(x), float(feature["valeur"]))
+
+    if profil == "cosinus":
+        cx, cy = feature["centre"]
+        d = np.hypot(x - cx, y - cy)
+        courbe = np.cos(d / feature["rayon"] * (math.pi / 2)) * feature["hauteur"]
+        if feature.get("plafond") is not None:
+            # On "coupe" la pointe pour obtenir un sommet plat
+            courbe = np.minimum(courbe, feature["plafond"])
+        return feature.get("base", 0.0) + courbe
+
+    raise ValueError(f"Profil de relief inconnu : {profil}")
+
+
+def _combiner(z, valeur, operation):
+    if operation == "max":
+        return np.maximum(z, valeur)
+    if operation == "min":
+        return np.minimum(z, valeur)
+    if operation == "set":
+        return valeur
+    if operation == "add":
+        return z + valeur
+    if operation == "sub":
+        return z - valeur
+    raise ValueError(f"Opération de relief inconnue : {operation}")
+
+
+
+# ==========================================
+#  ÉVALUATION VECTORISÉE
+# ==========================================
+
+def evaluer_relief(x, y, z, features):
+    """
+    Applique une liste de features sur un ensemble de sommets.
+
+    Les sommets sont triés une fois selon X : chaque feature ne lit que la bande de sommets comprise
+    dans sa boîte englobante (recherche dichotomique), puis filtre sur Y et sur sa forme exacte.
+    Le coût suit donc (sommets dans la zone x features) et non (tous les sommets x features).
+
+    Args:
+        x, y (np.ndarray): Coordonnées 2D des sommets.
+        z (np.ndarray): Hauteurs de départ.
+        features (list): La description du relief (voir en tête de module).
+
+    Returns:
+        np.ndarray: Les nouvelles hauteurs.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.array(z, dtype=np.float64)
+
+    ordre = np.argsort(x, kind="stable")
+    x_trie = x[ordre]
+
+    for feature in features:
+        if feature.get("operation") is None:
+            continue
+
+        xmin, xmax, ymin, ymax = boite_englobante(feature)
+        debut = np.searchsorted(x_trie, xmin, side="left")
+        fin = np.searchsorted(x_trie, xmax, side="right")
+        idx = ordre[debut:fin]
+        idx = idx[(y[idx] >= ymin) & (y[idx] <= ymax)]
+
+        idx = idx[distance_signee(feature, x[idx], y[idx]) < 0]
+        if len(idx) == 0:
+            continue
+
+        valeur = hauteur_profil(feature, x[idx], y[idx])
+        z[idx] = _combiner(z[idx], valeur, feature["operation"])
+
+    return z
+
+
+
+# ==========================================
+#  MASQUE DE PLACEMENT RASTERISÉ
+# ==========================================
+
+def rasteriser_exclusions(features, rayon_zone, pas=0.25, marge_bord=0.0, avec_distance=False):
+    """
+    Compile les zones interdites d'un relief en une grille de cellules, une fois pour toutes.
+
+    Une cellule est libre si son centre est à plus de marge_bord du bord du disque de rayon rayon_zone
+    et hors de la forme (élargie de "marge_placement") de chaque feature qui déclare une marge.
+
+    Args:
+        features (list): La même description de relief que pour la sculpture.
+        rayon_zone (float): Rayon du disque de placement, centré sur l'origine du relief.
+        pas (float): Taille d'une cellule en mètres (résolution du masque).
+        marge_bord (float): Distance minimale au bord du disque.
+        avec_distance (bool): Conserve aussi la distance (en m) de chaque cellule à la zone interdite la plus proche.
+
+    Returns:
+        dict: "libre" (tableau booléen [iy, ix]), "origine", "pas", "rayon", "indices_libres"
+              et, si demandé, "distance" (positive dans les cellules libres).
+    """
+    n = max(1, int(math.ceil(2 * rayon_zone / pas)))
+    x0 = y0 = -rayon_zone
+    centres = x0 + (np.arange(n) + 0.5) * pas
+    x, y = np.meshgrid(centres, centres)
+
+    # Distance signée à la zone interdite la plus proche (positive = libre)
+    distance = (rayon_zone - marge_bord) - np.hypot(x, y)
+    for feature in features:
+        marge = feature.get("marge_placement")
+        if marge is None:
+            continue
+        distance = np.minimum(distance, distance_signee(feature, x, y) - marge)
+
+    libre = distance > 0
+    masque = {
+        "libre": libre,
+        "origine": (x0, y0),
+        "pas": pas,
+        "rayon": rayon_zone,
+        "indices_libres": np.flatnonzero(libre),
+    }
+    if avec_distance:
+        masque["distance"] = distance.astype(np.float32)
+    return masque
+
+
+def lire_masque(masque, x, y):
+    """Retourne True si le point (x, y) tombe dans une cellule libre du masque (une seule lecture)"""
+    ix = int((x - masque["origine"][0]) // masque["pas"])
+    iy = int((y - masque["origine"][1]) // masque["pas"])
+    libre = masque["libre"]
+    if ix < 0 or iy < 0 or iy >= libre.shape[0] or ix >= libre.shape[1]:
+        return False
+    return bool(libre[iy, ix])
+
+
+def tirer_point_libre(masque, alea):
+    """
+    Tire un point uniformément parmi les cellules libres du masque (position aléatoire dans la cellule).
+
+    Args:
+        masque (dict): Résultat de rasteriser_exclusions().
+        alea: Source aléatoire (module random ou random.Random).
+
+    Returns:
+        tuple: (x, y) ou None si aucune cellule n'est libre.
+    """
+    indices = masque["indices_libres"]
+    if len(indices) == 0:
+        return None
+    iy, ix = divmod(int(indices[alea.randrange(len(indices))]), masque["libre"].shape[1])
+    x = masque["origine"][0] + (ix + alea.random()) * masque["pas"]
+    y = masque["origine"][1] + (iy + alea.random()) * masque["pas"]
+    return x, y
+
+
+
+# ==========================================
+#  MAILLAGES EN CHAMP DE HAUTEUR
+# ==========================================
+
+def _recoudre_anneaux(debut_int, n_int, debut_ext, n_ext):
+    """
+    Triangule la bande entre deux anneaux concentriques (parcourus dans le sens trigonométrique, départ à l'angle 0).
+
+    On avance sur l'anneau dont le prochain sommet a le plus petit angle : chaque pas émet un triangle.
+    """
+    pas_int = np.arange(1, n_int + 1) / n_int
+    pas_ext = np.arange(1, n_ext + 1) / n_ext
+    ordre = np.argsort(np.concatenate([pas_int, pas_ext]), kind="stable")
+    externe = ordre >= n_int
+
+    i = np.cumsum(~externe) - (~externe)
+    j = np.cumsum(externe) - externe
+    a = debut_int + i % n_int
+    b = debut_ext + j % n_ext
+    c = np.where(externe, debut_ext + (j + 1) % n_ext, debut_int + (i + 1) % n_int)
+    triangles = np.column_stack((a, b, c))
+    # Au centre (anneau intérieur d'un seul sommet), les pas "intérieurs" donneraient des triangles plats
+    return triangles[externe] if n_int == 1 else triangles
+
+
+def disque_triangule(rayon, nb_triangles):
+    """
+    Disque plat en anneaux concentriques de 6k sommets : triangles de taille homogène, sans n-gone.
+
+    Args:
+        rayon (float): Rayon du disque.
+        nb_triangles (int): Budget de triangles visé (le disque en a 6 * K^2 pour K anneaux).
+
+    Returns:
+        tuple: (xy (N, 2) positions des sommets, triangles (T, 3) indices, nb_bord nombre de sommets
+               de l'anneau extérieur, qui sont les nb_bord derniers sommets).
+    """
+    nb_anneaux = max(1, int(round(math.sqrt(nb_triangles / 6.0))))
+    xy = [np.zeros((1, 2))]
+    triangles = []
+    debut_int, n_int = 0, 1
+    for k in range(1, nb_anneaux + 1):
+        n_ext = 6 * k
+        angle = 2 * math.pi * np.arange(n_ext) / n_ext
+        r = rayon * k / nb_anneaux
+        xy.append(np.column_stack((r * np.cos(angle), r * np.sin(angle))))
+        debut_ext = debut_int + n_int
+        triangles.append(_recoudre_anneaux(debut_int, n_int, debut_ext, n_ext))
+        debut_int, n_int = debut_ext, n_ext
+    return np.concatenate(xy), np.concatenate(triangles), n_int
+
+
+def dalle_epaisse(xy, z, triangles, nb_bord, epaisseur):
+    """
+    Donne de l'épaisseur à un champ de hauteur : face du dessus (z + epaisseur), face du dessous (z)
+    et bandeau sur le bord. Remplace un modificateur Solidify.
+
+    Args:
+        xy (np.ndarray): (N, 2) positions des sommets.
+        z (np.ndarray): (N,) hauteurs du dessous.
+        triangles (np.ndarray): (T, 3) triangles du dessus, dans le sens trigonométrique.
+        nb_bord (int): Les nb_bord derniers sommets forment le contour (dans l'ordre trigonométrique).
+        epaisseur (float): Épaisseur ajoutée vers le haut.
+
+    Returns:
+        tuple: (co (2N, 3) positions, faces (liste de tableaux d'indices : triangles puis quads du bord)).
+    """
+    n = len(xy)
+    dessous = np.column_stack((xy, z))
+    dessus = np.column_stack((xy, z + epaisseur))
+    co = np.concatenate([dessus, dessous])
+
+    bord = np.arange(n - nb_bord, n)
+    suivant = np.roll(bord, -1)
+    # Quads du bandeau orientés vers l'extérieur
+    quads = np.column_stack((bord + n, suivant + n, suivant, bord))
+    return co, [triangles, triangles[:, ::-1] + n, quads]
+
+
+
+# ==========================================
+#  CHAMP DE HAUTEUR INTERROGEABLE
+# ==========================================
+#
+# Le dessus d'un maillage (coordonnées monde) rasterisé une fois sur une grille régulière :
+# hauteur du point le plus haut du maillage à la verticale de chaque nœud, et normale du sol.
+# Les requêtes (hauteur_en, normale_en) sont des interpolations bilinéaires vectorisées,
+# sans lancer de rayon par objet. Hors du maillage, elles renvoient NaN.
+
+# Nombre maximal de couples (triangle, nœud) évalués à la fois pendant la rasterisation
+COUPLES_PAR_LOT = 4_000_000
+
+
+def rasteriser_hauteurs(co, triangles, pas=0.5):
+    """
+    Construit le champ de hauteur du dessus d'un maillage triangulé.
+
+    Seuls les triangles tournés vers le haut comptent ; là où plusieurs se superposent (surplomb),
+    le plus haut l'emporte, comme pour un rayon lancé depuis le ciel.
+
+    Args:
+        co (np.ndarray): Sommets (N, 3), coordonnées monde.
+        triangles (np.ndarray): Indices des triangles (M, 3).
+        pas (float): Distance entre deux nœuds de la grille, en mètres.
+
+    Returns:
+        dict: "z" (tableau [iy, ix], NaN hors du maillage), "normales" ([iy, ix, 3]), "origine", "pas".
+    """
+    co = np.asarray(co, dtype=np.float64)
+    v = co[np.asarray(triangles)]
+    normale_z = ((v[:, 1, 0] - v[:, 0, 0]) * (v[:, 2, 1] - v[:, 0, 1])
+                 - (v[:, 1, 1] - v[:, 0, 1]) * (v[:, 2, 0] - v[:, 0, 0]))
+    v = v[normale_z > 1e-12]
+
+    x0, y0 = co[:, 0].min(), co[:, 1].min()
+    nx = int(math.floor((co[:, 0].max() - x0) / pas)) + 1
+    ny = int(math.floor((co[:, 1].max() - y0) / pas)) + 1
+    z = np.full(ny * nx, -np.inf)
+
+    # Nœuds de la grille couverts par la boîte englobante de chaque triangle
+    ix_min = np.ceil((v[:, :, 0].min(axis=1) - x0) / pas).astype(np.int64)
+    ix_max = np.minimum(np.floor((v[:, :, 0].max(axis=1) - x0) / pas).astype(np.int64), nx - 1)
+    iy_min = np.ceil((v[:, :, 1].min(axis=1) - y0) / pas).astype(np.int64)
+    iy_max = np.minimum(np.floor((v[:, :, 1].max(axis=1) - y0) / pas).astype(np.int64), ny - 1)
+    larg = np.maximum(ix_max - ix_min + 1, 0)
+    nb = larg * np.maximum(iy_max - iy_min + 1, 0)
+
+    cumul = np.cumsum(nb)
+    debut = 0
+    while debut < len(v):
+        fin = int(np.searchsorted(cumul, (cumul[debut - 1] if debut else 0) + COUPLES_PAR_LOT, side="right"))
+        fin = max(fin, debut + 1)
+        lot = np.arange(debut, fin)
+        tri = np.repeat(lot, nb[lot])
+        rang = np.arange(len(tri)) - np.repeat(np.cumsum(nb[lot]) - nb[lot], nb[lot])
+        ix = ix_min[tri] + rang % larg[tri]
+        iy = iy_min[tri] + rang // np.maximum(larg[tri], 1)
+        px, py = x0 + ix * pas, y0 + iy * pas
+
+        # Coordonnées barycentriques du nœud dans son triangle (projeté sur XY)
+        a, b, c = v[tri, 0], v[tri, 1], v[tri, 2]
+        aire = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        wb = ((px - a[:, 0]) * (c[:, 1] - a[:, 1]) - (py - a[:, 1]) * (c[:, 0] - a[:, 0])) / aire
+        wc = ((b[:, 0] - a[:, 0]) * (py - a[:, 1]) - (b[:, 1] - a[:, 1]) * (px - a[:, 0])) / aire
+        wa = 1.0 - wb - wc
+        dedans = (wa >= -1e-9) & (wb >= -1e-9) & (wc >= -1e-9)
+        hauteur = wa * a[:, 2] + wb * b[:, 2] + wc * c[:, 2]
+        np.maximum.at(z, iy[dedans] * nx + ix[dedans], hauteur[dedans])
+        debut = fin
+
+    z = z.reshape(ny, nx)
+    z[np.isinf(z)] = np.nan
+
+    # Normale du sol : gradient du champ (différences centrées, décentrées au bord)
+    gy, gx = np.gradient(z, pas) if min(nx, ny) > 1 else (np.zeros_like(z), np.zeros_like(z))
+    normales = np.stack((-gx, -gy, np.ones_like(z)), axis=-1)
+    normales /= np.linalg.norm(normales, axis=-1, keepdims=True)
+
+    return {"z": z, "normales": normales, "origine": (x0, y0), "pas": pas}
+
+
+def _bilineaire(champ, grille, x, y):
+    """
+    Interpolation bilinéaire d'une grille [iy, ix, ...] du champ en des points (x, y).
+    Les nœuds NaN (hors maillage) sont ignorés ; NaN si aucun des quatre nœuds n'est défini.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    forme = np.broadcast(x, y).shape
+    x, y = np.broadcast_to(x, forme).ravel(), np.broadcast_to(y, forme).ravel()
+    ny, nx = grille.shape[:2]
+
+    fx = (x - champ["origine"][0]) / champ["pas"]
+    fy = (y - champ["origine"][1]) / champ["pas"]
+    dehors = (fx < 0) | (fy < 0) | (fx > nx - 1) | (fy > ny - 1) | np.isnan(fx) | np.isnan(fy)
+    ix = np.clip(np.floor(np.nan_to_num(fx)).astype(np.int64), 0, max(nx - 2, 0))
+    iy = np.clip(np.floor(np.nan_to_num(fy)).astype(np.int64), 0, max(ny - 2, 0))
+    tx = np.clip(np.nan_to_num(fx) - ix, 0.0, 1.0)
+    ty = np.clip(np.nan_to_num(fy) - iy, 0.0, 1.0)
+
+    extra = grille.shape[2:]
+    somme = np.zeros((len(x),) + extra)
+    poids_total = np.zeros((len(x),) + extra)
+    for dx, dy, poids in ((0, 0, (1 - tx) * (1 - ty)), (1, 0, tx * (1 - ty)), (0, 1, (1 - tx) * ty), (1, 1, tx * ty)):
+        valeur = grille[np.minimum(iy + dy, ny - 1), np.minimum(ix + dx, nx - 1)]
+        poids = poids.reshape((-1,) + (1,) * len(extra))
+        defini = ~np.isnan(valeur)
+        somme += np.where(defini, valeur, 0.0) * poids
+        poids_total += defini * poids
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resultat = np.where(poids_total > 1e-9, somme / poids_total, np.nan)
+    resultat[dehors] = np.nan
+    return resultat.reshape(forme + extra)
+
+
+def hauteur_en(champ, x, y):
+    """Hauteur du sol en (x, y) (scalaires ou tableaux), NaN hors du maillage"""
+    return _bilineaire(champ, champ["z"], x, y)
+
+
+def normale_en(champ, x, y):
+    """Normale unitaire du sol en (x, y) : tableau (..., 3), NaN hors du maillage"""
+    n = _bilineaire(champ, champ["normales"], x, y)
+    with np.errstate(invalid="ignore"):
+        return n / np.linalg.norm(n, axis=-1, keepdims=True)
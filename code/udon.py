@@ -1,9 +1,38 @@
 import bpy
 import math
 import importlib
+
+import numpy as np
+
 import utils
 importlib.reload(utils)
-from utils import hex_to_rgba
+from utils import hex_to_rgba, lire_sommets, ecrire_sommets
+import terrain
+
+# ==========================================
+# LE RELIEF D'UDON (voir terrain.py)
+# ==========================================
+
+RELIEF_UDON = (
+    # TOUR CENTRALE : la courbe irait jusqu'à 25m, mais on la "coupe" à 16m pour faire un plateau plat
+    [{"nom": "tour_centrale", "forme": "disque", "centre": (0.0, 0.0), "rayon": 8.0,
+      "profil": "cosinus", "hauteur": 25.0, "plafond": 16.0, "base": 4.0, "operation": "max"}]
+
+    # LES 6 AUTRES TRUCS (fosses creusées autour de la tour)
+    + [{"nom": f"fosse_{i}", "forme": "disque",
+        "centre": (math.cos(i * (math.pi / 3)) * 11.0, math.sin(i * (math.pi / 3)) * 11.0), "rayon": 5.5,
+        "profil": "cosinus", "hauteur": 6.0, "operation": "sub"} for i in range(6)]
+
+    # LES 6 PILIERS EXTÉRIEURS (Plus excentrés, sommets plats)
+    + [{"nom": f"pilier_{i}", "forme": "disque",
+        "centre": (math.cos(i * (math.pi / 3) + (math.pi / 6)) * 16.5, math.sin(i * (math.pi / 3) + (math.pi / 6)) * 16.5),
+        "rayon": 4.5, "profil": "cosinus", "hauteur": 20.0, "plafond": 13.0, "base": 4.0, "operation": "max"}
+       for i in range(6)]
+
+    # Le fond des fosses ne descend jamais sous -1m
+    + [{"nom": "plancher", "forme": "partout", "profil": "constant", "valeur": -1.0, "operation": "max"}]
+)
+
 
 def sculpter_ile_udon(nom_ile):
 
@@ -11,48 +40,14 @@ def sculpter_ile_udon(nom_ile):
     if not ile: return
 
     scale_z = ile.scale[2]
-    
-    for v in ile.data.vertices:
-        if abs(v.co.z) < 0.001 or v.co.z > 0.0:
-            x, y = v.co.x, v.co.y
-            
-            z_val = 4.0 
-            dist_centre = math.hypot(x, y)
-            
-            # TOUR CENTRALE 
-            if dist_centre < 8.0: # Rayon augmenté pour plus de largeur
-                # La courbe irait jusqu'à 25m, mais on la "coupe" à 16m pour faire un plateau plat
-                courbe = math.cos(dist_centre / 8.0 * (math.pi / 2)) * 25.0
-                hauteur = min(courbe, 16.0) 
-                z_val = max(z_val, 4.0 + hauteur)
-            
-            # LES 6 AUTRES TRUCS 
-            for i in range(6):
-                angle = i * (math.pi / 3) 
-                px = math.cos(angle) * 11.0 # Poussées plus loin
-                py = math.sin(angle) * 11.0
-                dist_fosse = math.hypot(x - px, y - py)
-                
-                if dist_fosse < 5.5:
-                    creux = math.cos(dist_fosse / 5.5 * (math.pi / 2)) * 6.0
-                    z_val -= creux 
-                    
-            # LES 6 PILIERS EXTÉRIEURS (Plus excentrés, sommets plats)
-            for i in range(6):
-                angle = i * (math.pi / 3) + (math.pi / 6) 
-                px = math.cos(angle) * 16.5 # Fortement excentrés vers les bords
-                py = math.sin(angle) * 16.5
-                dist_pilier = math.hypot(x - px, y - py)
-                
-                if dist_pilier < 4.5:
-                    # Même astuce : on coupe la pointe pour faire un sommet plat
-                    courbe = math.cos(dist_pilier / 4.5 * (math.pi / 2)) * 20.0
-                    hauteur = min(courbe, 13.0) 
-                    z_val = max(z_val, 4.0 + hauteur)
-                    
-            v.co.z = max(-1.0, z_val) / scale_z
-            
-    ile.data.update()
+
+    # Seuls le plateau et le dessus de la falaise sont sculptés, à partir d'un sol à 4m
+    co = lire_sommets(ile.data)
+    dessus = (np.abs(co[:, 2]) < 0.001) | (co[:, 2] > 0.0)
+    z_val = terrain.evaluer_relief(co[dessus, 0], co[dessus, 1], np.full(dessus.sum(), 4.0), RELIEF_UDON)
+
+    co[dessus, 2] = z_val / scale_z
+    ecrire_sommets(ile.data, co)
     
     
 def appliquer_materiel_udon(nom_ile):
@@ -1,3 +1,4 @@
+import numpy as np
 import bpy
 
 
@@ -23,3 +24,18 @@ def hex_to_rgba(hex_str):
         hex_str = hex_str.lstrip('#')
         r, g, b = tuple(int(hex_str[i:i+2], 16) / 255.0 for i in (0, 2, 4))
         return (r**2.2, g**2.2, b**2.2, 1.0)
+
+
+
+def lire_sommets(mesh):
+    """Récupère les coordonnées de tous les sommets d'un maillage en un seul appel (tableau (N, 3))"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+
+def ecrire_sommets(mesh, co):
+    """Réécrit toutes les coordonnées d'un maillage en un seul appel puis le met à jour"""
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+    mesh.update()
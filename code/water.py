@@ -2,23 +2,26 @@ import math
 
 import bpy
 
+import mesh_cache
+import budget
+import primitives
+
 
 def create_water(name="Ocean", radius=150.0, location=(0, 0, 0)):
     """
     Génère un immense disque d'eau pour remplir le cratère.
     """
     # Création du disque d'eau (un cylindre très plat)
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=64, 
-        radius=radius, 
-        depth=1.0, 
+    water = primitives.cylindre(
+        name,
+        sommets=64,
+        rayon=radius,
+        profondeur=1.0,
         location=location
     )
-    water = bpy.context.active_object
-    water.name = name
     
     #  Lissage
-    bpy.ops.object.shade_smooth()
+    primitives.lisser(water)
 
     #  Le Matériau de l'eau
     mat_name = "Water_Material"
@@ -46,22 +49,22 @@ def create_water(name="Ocean", radius=150.0, location=(0, 0, 0)):
     return water
 
 
-def create_water(name="Ocean", radius=150.0, location=(0, 0, 0)):
+def create_water(name="Ocean", radius=150.0, location=(0, 0, 0), vertices=64):
     """
     Génère un immense disque d'eau pour remplir le cratère.
+    vertices : nombre de côtés du disque (voir declarer_budget).
     """
     # 1. Création du disque d'eau (un cylindre très plat)
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=64, 
-        radius=radius, 
-        depth=1.0, 
+    water = primitives.cylindre(
+        name,
+        sommets=vertices,
+        rayon=radius,
+        profondeur=1.0,
         location=location
     )
-    water = bpy.context.active_object
-    water.name = name
     
     # 2. Lissage
-    bpy.ops.object.shade_smooth()
+    primitives.lisser(water)
 
     # 3. Le Matériau de l'eau
     mat_name = "Water_Material"
@@ -91,45 +94,56 @@ def create_water(name="Ocean", radius=150.0, location=(0, 0, 0)):
 
 
 
-def create_waterfall(name="Cascade_Wano", width=40.0, height=150.0, location=(0, -145, 0)):
+def create_waterfall(name="Cascade_Wano", width=40.0, height=150.0, location=(0, -145, 0), utiliser_cache=True, subdivisions=64):
     """
     Génère une cascade avec un bord  courbé.
+    subdivisions : nombre de découpes sur la hauteur (c'est là que se fait la courbure).
     """
-  #On utilise une "Grid" pour avoir plein de sommets à courber (comme un tapis roulant)
-    bpy.ops.mesh.primitive_grid_add(x_subdivisions=2, y_subdivisions=64, size=1.0, location=location)
-    cascade = bpy.context.active_object
-    cascade.name = name
-    
-    # la "douceur" de la courbure
-    rayon_courbure = 15.0
-    
-    # on courbe le haut de la cascade
-    for v in cascade.data.vertices:
-        # x va de -0.5 à +0.5, on le multiplie pour avoir la largeur totale
-        x = v.co.x * width
+    cle = mesh_cache.cle_cache("cascade", {"width": width, "height": height, "subdivisions": subdivisions}, create_waterfall)
+    en_cache = mesh_cache.charger(cle, name) if utiliser_cache else None
+
+    if en_cache:
+        # La courbure est déjà calculée dans le maillage en cache
+        cascade = bpy.data.objects.new(name, en_cache[0])
+        bpy.context.collection.objects.link(cascade)
+        cascade.location = location
+    else:
+        #On utilise une "Grid" pour avoir plein de sommets à courber (comme un tapis roulant)
+        cascade = primitives.grille(name, subdivisions_x=2, subdivisions_y=subdivisions, taille=1.0, location=location)
+    
+        # la "douceur" de la courbure
+        rayon_courbure = 15.0
+    
+        # on courbe le haut de la cascade
+        for v in cascade.data.vertices:
+            # x va de -0.5 à +0.5, on le multiplie pour avoir la largeur totale
+            x = v.co.x * width
         
-        # h_norm va de 0 tout en bas, à 1 tout en haut
-        h_norm = v.co.y + 0.5 
-        distance_depuis_haut = (1.0 - h_norm) * height
+            # h_norm va de 0 tout en bas, à 1 tout en haut
+            h_norm = v.co.y + 0.5 
+            distance_depuis_haut = (1.0 - h_norm) * height
         
-        #si on est dans les 15 derniers mètres du haut, on courbe
-        if distance_depuis_haut < rayon_courbure:
-            #calcul de l'angle 
-            angle = (1.0 - (distance_depuis_haut / rayon_courbure)) * (math.pi / 2.0)
+            #si on est dans les 15 derniers mètres du haut, on courbe
+            if distance_depuis_haut < rayon_courbure:
+                #calcul de l'angle 
+                angle = (1.0 - (distance_depuis_haut / rayon_courbure)) * (math.pi / 2.0)
             
-            z = -rayon_courbure + math.sin(angle) * rayon_courbure
-            y = rayon_courbure - math.cos(angle) * rayon_courbure
-        else:
-            # Sinon, l'eau chute tout droit vers la mer
-            z = -distance_depuis_haut
-            y = 0.0
+                z = -rayon_courbure + math.sin(angle) * rayon_courbure
+                y = rayon_courbure - math.cos(angle) * rayon_courbure
+            else:
+                # Sinon, l'eau chute tout droit vers la mer
+                z = -distance_depuis_haut
+                y = 0.0
             
-        # on donne les nouvelles coordonnées au ppoint
-        v.co.x = x
-        v.co.y = y
-        v.co.z = z
-        
-    bpy.ops.object.shade_smooth()
+            # on donne les nouvelles coordonnées au ppoint
+            v.co.x = x
+            v.co.y = y
+            v.co.z = z
+
+        if utiliser_cache:
+            mesh_cache.sauver(cle, cascade)
+
+    primitives.lisser(cascade)
     
    # definition du Matériau
     mat_name = "Waterfall_Material"
@@ -216,3 +230,24 @@ def create_waterfall(name="Cascade_Wano", width=40.0, height=150.0, location=(0,
                 
     cascade.data.materials.append(mat)
     return cascade
+
+
+
+def cout_eau(vertices=64):
+    """Triangles du disque d'eau : cylindre plat (côtés en quads, deux faces n-gones)"""
+    return budget.cout_subdivision(quads=vertices, ngones=(vertices, vertices))
+
+
+def cout_cascade(subdivisions=64):
+    """Triangles de la cascade : grille de 2 x subdivisions faces"""
+    return 2 * 2 * subdivisions
+
+
+def declarer_budget(region="Wano_Base", nom_eau="Eau_Wano", nom_cascade="Grande_Cascade"):
+    """Déclare l'eau et la cascade au budget de polygones"""
+    budget.declarer("eau", region, {"vertices": 64}, cout_eau,
+                    lambda tri: budget.choisir([{"vertices": v} for v in range(16, 1025, 8)], cout_eau, tri),
+                    objets=(nom_eau,))
+    budget.declarer("cascade", region, {"subdivisions": 64}, cout_cascade,
+                    lambda tri: budget.choisir([{"subdivisions": n} for n in range(8, 1025, 8)], cout_cascade, tri),
+                    objets=(nom_cascade,))